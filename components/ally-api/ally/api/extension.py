@@ -23,13 +23,16 @@ class IterPart(Iterable):
     total = int
     offset = int
     limit = int
+    cursor = str
 
-    def __init__(self, wrapped, total, offset=None, limit=None):
+    def __init__(self, wrapped, total, offset=None, limit=None, cursor=None):
         '''
         Construct the partial iterable.
         
         @param wrapped: Iterable
             The iterable that provides the actual data.
+        @param cursor: string|None
+            The opaque cursor to be used for fetching the next part, None if not available.
         '''
         assert isinstance(wrapped, Iterable), 'Invalid iterable %s' % wrapped
 
@@ -40,6 +43,7 @@ class IterPart(Iterable):
         if limit is None: self.limit = total
         elif limit > total: self.limit = total
         else: self.limit = limit
+        self.cursor = cursor
 
     def __iter__(self): return self.wrapped.__iter__()
 
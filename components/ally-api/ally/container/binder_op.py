@@ -22,7 +22,7 @@ from functools import partial
 from inspect import isclass
 import functools
 from ally.container.binder import BindableSupport
-from ally.api.type import Input
+from ally.api.type import Input, List
 
 # --------------------------------------------------------------------
 
@@ -163,12 +163,16 @@ def bindValidations(proxy, mappings=None):
             for k, inp in enumerate(call.inputs):
                 assert isinstance(inp, Input)
                 typ = inp.type
+                # The lists of models are used by the bulk insert and update methods.
+                isList = isinstance(typ, List) and isinstance(typ.itemType, TypeModel)
+                if isList: typ = typ.itemType
                 if isinstance(typ, TypeModel):
                     if typ.clazz in mappings:
                         typ = typeFor(mappings[typ.clazz])
                         assert isinstance(typ, TypeModel), 'Invalid model mapping class %s' % mappings[typ.clazz]
                     if isinstance(typ.clazz, BindableSupport):
-                        positions[k] = typ
+                        if isList: positions[k] = List(typ.clazz)
+                        else: positions[k] = typ
             if positions:
                 bindBeforeListener(getattr(proxy, call.name),
                                    partial(onCallValidateModel, call.method == INSERT, positions))
@@ -275,9 +279,9 @@ def onCallValidateModel(onInsert, positions, args, keyargs):
     
     @param onInsert: boolean
         Flag indicating that the validation should be performed for insert if True, False for update.
-    @param positions: dictionary{integer:TypeModel}
+    @param positions: dictionary{integer:TypeModel|List}
         As a key the indexes in the arguments (args) where to find the model(s) entity(s) to perform validations on and
-        as a value the TypeModel for that position.
+        as a value the TypeModel for that position or the List of TypeModel for the lists of entities.
     @param args: arguments
         The arguments of the call invocation.
     @param keyargs: key arguments
@@ -291,15 +295,38 @@ def onCallValidateModel(onInsert, positions, args, keyargs):
         typ = positions.get(k)
         if typ is None: continue
 
-        assert isinstance(typ, TypeModel), 'Invalid model type %s for index %s' % (typ, k)
-        assert typ.isValid(obj), 'Invalid object %s for %s' % (obj, typ)
-        if onInsert:
-            if callListeners(typ.clazz, EVENT_MODEL_INSERT, obj, errors):
-                for prop in typ.container.properties:
-                    callListeners(typ.clazz, EVENT_PROP_INSERT % prop, prop, obj, errors)
-        else:
-            if callListeners(typ.clazz, EVENT_MODEL_UPDATE, obj, errors):
-                for prop in typ.container.properties:
-                    callListeners(typ.clazz, EVENT_PROP_UPDATE % prop, prop, obj, errors)
+        if isinstance(typ, List):
+            assert isinstance(typ, List)
+            # All the entities are validated in order to report the errors for all of them at once.
+            for index, item in enumerate(obj):
+                itemErrors = []
+                onValidateModel(onInsert, typ.itemType, item, itemErrors)
+                for ref in itemErrors: ref.index = index
+                errors.extend(itemErrors)
+        else: onValidateModel(onInsert, typ, obj, errors)
 
     if errors: raise InputError(*errors)
+
+def onValidateModel(onInsert, typ, obj, errors):
+    '''
+    Process the validation for a model entity.
+    
+    @param onInsert: boolean
+        Flag indicating that the validation should be performed for insert if True, False for update.
+    @param typ: TypeModel
+        The model type of the entity.
+    @param obj: object
+        The entity to validate.
+    @param errors: list[Ref]
+        The list of errors.
+    '''
+    assert isinstance(typ, TypeModel), 'Invalid model type %s' % typ
+    assert typ.isValid(obj), 'Invalid object %s for %s' % (obj, typ)
+    if onInsert:
+        if callListeners(typ.clazz, EVENT_MODEL_INSERT, obj, errors):
+            for prop in typ.container.properties:
+                callListeners(typ.clazz, EVENT_PROP_INSERT % prop, prop, obj, errors)
+    else:
+        if callListeners(typ.clazz, EVENT_MODEL_UPDATE, obj, errors):
+            for prop in typ.container.properties:
+                callListeners(typ.clazz, EVENT_PROP_UPDATE % prop, prop, obj, errors)
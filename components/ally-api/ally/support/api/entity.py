@@ -10,7 +10,7 @@ General specifications for the entities API that poses an integer Id identifier.
 '''
 
 from ally.api.config import model, query, service, call, LIMIT_DEFAULT
-from ally.api.type import Iter
+from ally.api.type import Iter, List
 
 # --------------------------------------------------------------------
 
@@ -55,7 +55,7 @@ class IEntityFindService:
     '''
 
     @call
-    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True) -> Iter(Entity):
+    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True, cursor:str=None) -> Iter(Entity):
         '''
         Provides the entities.
         
@@ -65,13 +65,18 @@ class IEntityFindService:
             The limit of entities to retrieve.
         @param detailed: boolean
             If true will present the total count, limit and offset for the partially returned collection.
+        @param cursor: string
+            The cursor provided as an attribute by the previous detailed collection to retrieve the next entities from,
+            if provided the offset is ignored. An empty cursor provides the first entities together with the cursor for
+            the next entities.
         '''
 
 @service
 class IEntityQueryService:
 
     @call
-    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True, q:QEntity=None) -> Iter(Entity):
+    def getAll(self, offset:int=None, limit:int=LIMIT_DEFAULT, detailed:bool=True, q:QEntity=None,
+               cursor:str=None) -> Iter(Entity):
         '''
         Provides the entities searched by the provided query.
         
@@ -83,6 +88,10 @@ class IEntityQueryService:
             If true will present the total count, limit and offset for the partially returned collection.
         @param q: QEntity
             The query to search by.
+        @param cursor: string
+            The cursor provided as an attribute by the previous detailed collection to retrieve the next entities from,
+            if provided the offset is ignored. An empty cursor provides the first entities together with the cursor for
+            the next entities.
         '''
 
 @service
@@ -123,6 +132,34 @@ class IEntityCRUDService:
         @return: True if the delete is successful, false otherwise.
         '''
 
+@service
+class IEntityBulkService:
+    '''
+    Provides the entity bulk services, the entities are persisted in one go.
+    '''
+
+    @call(webName='Bulk')
+    def insertAll(self, entities:List(Entity)) -> Iter(Entity.Id):
+        '''
+        Insert the entities, also the entities will have automatically assigned the Id to them.
+        
+        @param entities: list[Entity]
+            The entities to be inserted.
+        
+        @return: The ids assigned to the entities in the order of the entities.
+        @raise InputError: If any of the entities is not valid. 
+        '''
+
+    @call(webName='Bulk')
+    def updateAll(self, entities:List(Entity)):
+        '''
+        Update the entities.
+        
+        @param entities: list[Entity]
+            The entities to be updated.
+        @raise InputError: If any of the entities is not valid. 
+        '''
+
 @service
 class IEntityGetCRUDService(IEntityGetService, IEntityCRUDService):
     '''
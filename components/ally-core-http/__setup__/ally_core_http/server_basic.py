@@ -9,9 +9,10 @@ Created on Nov 23, 2011
 Runs the basic web server.
 '''
 
+from ..ally_core.processor import allow_chuncked_response
 from . import server_type, server_version, server_host, server_port
 from .processor import pathAssemblies
-from ally.container import ioc
+from ally.container import ioc, support
 from ally.core.http.server import server_basic
 from ally.core.http.server.wsgi import RequestHandler
 from threading import Thread
@@ -26,6 +27,11 @@ def requestHandlerWSGI():
 
 # --------------------------------------------------------------------
 
+@ioc.before(allow_chuncked_response)
+def allow_chuncked_response_basic():
+    # The basic server frames the streamed responses using the chunked transfer encoding.
+    if server_type() == 'basic': support.force(allow_chuncked_response, True)
+
 @ioc.start
 def runServer():
     if server_type() == 'basic':
@@ -19,14 +19,16 @@ from ally.core.http.spec.transform.support_model import DataModel, NO_MODEL_PATH
     IFetcher
 from ally.core.impl.processor import encoder
 from ally.core.impl.processor.encoder import CreateEncoderHandler, EncodeObject, \
-    EncodeCollection
-from ally.core.spec.resources import Path, Normalizer, Invoker
+    EncodeCollection, EncodePrimitive
+from ally.core.spec.resources import Path, Normalizer, Invoker, PathExtended, \
+    INodeChildListener, INodeInvokerListener
 from ally.core.spec.transform.exploit import handleExploitError
 from ally.core.spec.transform.render import IRender
 from ally.design.context import requires, defines
 from ally.support.core.util_resources import pathLongName
 from ally.support.util import lastCheck, firstOf
 from collections import deque, OrderedDict
+from threading import Lock
 
 # --------------------------------------------------------------------
 
@@ -36,6 +38,11 @@ class Request(encoder.Request):
     '''
     # ---------------------------------------------------------------- Required
     path = requires(Path)
+    # ---------------------------------------------------------------- Defined
+    propertiesHint = defines(tuple, doc='''
+    @rtype: tuple(Model, frozenset(string))
+    The model that is encoded and the names of the model properties that are going to be rendered.
+    ''')
 
 class Response(encoder.Response):
     '''
@@ -53,7 +60,7 @@ class Response(encoder.Response):
 # --------------------------------------------------------------------
 
 @injected
-class CreateEncoderPathHandler(CreateEncoderHandler):
+class CreateEncoderPathHandler(CreateEncoderHandler, INodeChildListener, INodeInvokerListener):
     '''
     Extends the model encoder with paths also.
     '''
@@ -70,6 +77,8 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
     # Separator used for filter names.
     valueDenied = 'denied'
     # Values used to set on the x filter attribute when the fetching is denied
+    cacheSize = 500
+    # The maximum number of data models to be cached.
 
     def __init__(self):
         '''
@@ -81,8 +90,12 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
         assert isinstance(self.nameAll, str), 'Invalid filter name all %s' % self.nameAll
         assert isinstance(self.separatorNames, str), 'Invalid names separator %s' % self.separatorNames
         assert isinstance(self.valueDenied, str), 'Invalid value denied %s' % self.valueDenied
+        assert isinstance(self.cacheSize, int), 'Invalid cache size %s' % self.cacheSize
         super().__init__()
 
+        self._dataCache = OrderedDict()
+        self._dataLock = Lock()
+
     def process(self, request:Request, response:Response, **keyargs):
         '''
         @see: CreateEncoderHandler.process
@@ -94,13 +107,65 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
         encoder = response.encoder
         if encoder is None: return
         assert isinstance(request.invoker, Invoker), 'Invalid request invoker %s' % request.invoker
+        assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid decoder header %s' % request.decoderHeader
+
+        value = request.decoderHeader.decode(self.nameXFilter)
+        if value is not None: value = tuple(val for val, _attr in value)
+
+        path = request.path
+        # The data model depends only on the path node and not on the path values, the values are bound afterwards.
+        key = (request.invoker, encoder, None if path is None else id(path.node), response.normalizer, value)
+        with self._dataLock:
+            entry = self._dataCache.get(key)
+            if entry is not None: self._dataCache.move_to_end(key)
+        if entry is None:
+            if path is not None:
+                assert isinstance(path, Path), 'Invalid request path %s' % path
+                path.node.root.addStructureListener(self)
+            if value is not None: value = deque(value)
+            data, error = self.dataModelFor(request.invoker, encoder, path, value, response.normalizer)
+            entry = (path, data, error, self.propertiesHintFor(encoder, data))
+            with self._dataLock:
+                self._dataCache[key] = entry
+                while len(self._dataCache) > self.cacheSize: self._dataCache.popitem(last=False)
+
+        pathFrom, data, error, hint = entry
+        if hint is not None: request.propertiesHint = hint
+        if data is not None:
+            data = self.bindDataModel(data, pathFrom, path, {})
+            response.encoderDataModel = data
+            response.encoderData.update(dataModel=data, encoderPath=response.encoderPath)
+        else: response.encoderData.update(encoderPath=response.encoderPath)
+
+        if error:
+            response.text, response.errorMessage = error
+            response.code = INVALID_HEADER_VALUE
+
+    def dataModelFor(self, invoker, encoder, path, value, normalizer):
+        '''
+        Create the data model for the provided encoder.
+        
+        @param invoker: Invoker
+            The invoker of the request.
+        @param encoder: callable(**data)
+            The encoder of the response.
+        @param path: Path|None
+            The path of the request.
+        @param value: deque[string]|None
+            The filter values.
+        @param normalizer: Normalizer
+            The normalizer used in the response.
+        @return: tuple(DataModel|None, tuple(text, errorMessage)|None)
+            The data model, None if there is no model to encode, and the error in case the filter is not valid.
+        '''
+        assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
 
         encodeModel = None
         showPath = showAccessible = showAll = True
         if isinstance(encoder, EncodeModel):
             assert isinstance(encoder, EncodeModel)
             encodeModel = encoder
-            if isinstance(request.invoker.output, TypeModelProperty): showAccessible = showAll = False
+            if isinstance(invoker.output, TypeModelProperty): showAccessible = showAll = False
             else: showPath = False
         elif isinstance(encoder, EncodeCollection):
             assert isinstance(encoder, EncodeCollection)
@@ -111,25 +176,104 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
 
         if encodeModel is not None:
             assert isinstance(encodeModel, EncodeModel)
-            data = self.createDataModel(encodeModel, request.path, showAccessible, not showAccessible)
-            response.encoderDataModel = data
-            response.encoderData.update(dataModel=data, encoderPath=response.encoderPath)
+            data = self.createDataModel(encodeModel, path, showAccessible, not showAccessible)
             assert isinstance(data, DataModel)
             if not showPath: data.flag |= NO_MODEL_PATH
-        else:
-            response.encoderData.update(encoderPath=response.encoderPath)
-            data = None
-        assert isinstance(request.decoderHeader, IDecoderHeader), 'Invalid decoder header %s' % request.decoderHeader
+        else: data = None
 
-        value = request.decoderHeader.decode(self.nameXFilter)
-        if value is not None: value = deque(val for val, _attr in value)
+        error = self.processFilter(encodeModel, data, value, normalizer)
+        if not error: self.processFilterDefault(encodeModel, data, showAll)
+        return data, error
 
-        error = self.processFilter(encodeModel, data, value, response.normalizer)
-        if error:
-            response.text, response.errorMessage = error
-            response.code = INVALID_HEADER_VALUE
-            return
-        self.processFilterDefault(encodeModel, data, showAll)
+    def propertiesHintFor(self, encoder, data):
+        '''
+        Provides the properties hint for the encoded model.
+        
+        @param encoder: callable(**data)
+            The encoder of the response.
+        @param data: DataModel|None
+            The data model of the encoder.
+        @return: tuple(Model, frozenset(string))|None
+            The model and the names of the model properties that are rendered, None if all the properties are rendered.
+        '''
+        if data is None: return
+        assert isinstance(data, DataModel), 'Invalid data model %s' % data
+        if DataModel.filter not in data or data.filter is None: return
+
+        if isinstance(encoder, EncodeCollection):
+            assert isinstance(encoder, EncodeCollection)
+            encoder = encoder.exploitItem
+        # The model property encoders render only the property value.
+        if not isinstance(encoder, EncodeModel) or isinstance(encoder, EncodeModelProperty): return
+        assert isinstance(encoder.modelType, TypeModel), 'Invalid encode model type %s' % encoder.modelType
+
+        model = encoder.modelType.container
+        assert isinstance(model, Model)
+        return model, frozenset(name for name in data.filter if name in model.properties)
+
+    def bindDataModel(self, data, pathFrom, pathTo, binded):
+        '''
+        Binds the data model to a new request path, the paths of the data model are extensions of the request path
+        so the data model is copied having the paths rebuilt on the new request path.
+        
+        @param data: DataModel
+            The data model to bind.
+        @param pathFrom: Path|None
+            The request path used in creating the data model.
+        @param pathTo: Path|None
+            The request path to bind to.
+        @param binded: dictionary{integer, object}
+            The already binded data models and paths indexed by the id of the original, used in preserving the
+            sharing of paths.
+        @return: DataModel
+            The binded data model.
+        '''
+        assert isinstance(data, DataModel), 'Invalid data model %s' % data
+        assert isinstance(binded, dict), 'Invalid binded %s' % binded
+
+        bdata = binded.get(id(data))
+        if bdata is not None: return bdata
+        bdata = binded[id(data)] = DataModel()
+        assert isinstance(bdata, DataModel)
+
+        bdata.flag = data.flag
+        bdata.accessibleIsProcessed = data.accessibleIsProcessed
+        bdata.path = self.bindPath(data.path, pathFrom, pathTo, binded)
+        bdata.accessiblePath = self.bindPath(data.accessiblePath, pathFrom, pathTo, binded)
+        if DataModel.accessible in data:
+            bdata.accessible = OrderedDict((name, self.bindPath(path, pathFrom, pathTo, binded))
+                                           for name, path in data.accessible.items())
+        # The filter is not changed after the data model is created so it can be shared.
+        if DataModel.filter in data: bdata.filter = data.filter
+        if DataModel.datas in data:
+            bdata.datas = {name: None if cdata is None else self.bindDataModel(cdata, pathFrom, pathTo, binded)
+                           for name, cdata in data.datas.items()}
+        bdata.fetchReference = data.fetchReference
+        bdata.fetchEncode = data.fetchEncode
+        if data.fetchData is not None: bdata.fetchData = self.bindDataModel(data.fetchData, pathFrom, pathTo, binded)
+
+        return bdata
+
+    def bindPath(self, path, pathFrom, pathTo, binded):
+        '''
+        Binds the path to a new request path, @see: bindDataModel.
+        
+        @return: Path|None
+            The binded path.
+        '''
+        if path is None: return
+        assert isinstance(path, Path), 'Invalid path %s' % path
+
+        bpath = binded.get(id(path))
+        if bpath is None:
+            if path is pathFrom: bpath = pathTo
+            elif isinstance(path, PathExtended):
+                assert isinstance(path, PathExtended)
+                bpath = PathExtended(self.bindPath(path.parent, pathFrom, pathTo, binded),
+                                     [match.clone() for match in path.matchesOwned], path.node, path.index)
+            else: bpath = path.clone()
+            binded[id(path)] = bpath
+        return bpath
 
     def createDataModel(self, encode, path, showAccessible, inCollection):
         '''
@@ -292,6 +436,20 @@ class CreateEncoderPathHandler(CreateEncoderHandler):
 
     # ----------------------------------------------------------------
 
+    def onChildAdded(self, node, child):
+        '''
+        @see: INodeChildListener.onChildAdded
+        '''
+        with self._dataLock: self._dataCache.clear()
+
+    def onInvokerChange(self, node, old, new):
+        '''
+        @see: INodeInvokerListener.onInvokerChange
+        '''
+        with self._dataLock: self._dataCache.clear()
+
+    # ----------------------------------------------------------------
+
     def encoderItem(self, ofType):
         '''
         @see: EncoderHandler.encoderItem
@@ -338,7 +496,7 @@ class EncodeModel(EncodeObject):
     '''
     Exploit for model encoding.
     '''
-    __slots__ = ('encoder', 'modelType', 'updateType')
+    __slots__ = ('encoder', 'modelType', 'updateType', 'encoders')
 
     def __init__(self, encoder, modelType, getter=None, updateType=None):
         '''
@@ -359,6 +517,7 @@ class EncodeModel(EncodeObject):
         self.encoder = encoder
         self.modelType = modelType
         self.updateType = updateType or modelType
+        self.encoders = {}
 
     def __call__(self, value, render, normalizer, encoderPath, name=None, dataModel=None, fetcher=None, **data):
         assert isinstance(render, IRender), 'Invalid render %s' % render
@@ -395,8 +554,15 @@ class EncodeModel(EncodeObject):
 
         render.objectStart(normalizer.normalize(name or self.name), attrs)
 
-        for nameProp, encodeProp in self.properties.items():
+        encoders = self.encoders.get(normalizer)
+        if encoders is None: encoders = self.encoders[normalizer] = self.encodersFor(normalizer)
+        converter, converterId = data.get('converter'), data.get('converterId')
+        for nameProp, encodeProp, encode in encoders:
             if DataModel.filter in dataModel and nameProp not in dataModel.filter: continue
+            if encode is not None:
+                try: encode(value, render, converter, converterId)
+                except: handleExploitError(encodeProp)
+                continue
             if DataModel.datas in dataModel: data.update(dataModel=dataModel.datas.get(nameProp))
             try: encodeProp(name=nameProp, **data)
             except: handleExploitError(encodeProp)
@@ -412,6 +578,33 @@ class EncodeModel(EncodeObject):
 
         render.objectEnd()
 
+    def compile(self, name, normalizer):
+        '''
+        @see: EncodeObject.compile
+        
+        The model encoding depends on the data model so it cannot be compiled as a whole, only the primitive properties
+        are compiled, @see: encodersFor.
+        '''
+        return None
+
+    def encodersFor(self, normalizer):
+        '''
+        Provides the property encoders for the normalizer.
+        
+        @param normalizer: Normalizer
+            The normalizer to compile the primitive properties with.
+        @return: list[tuple(string, callable(**data), callable|None)]
+            The list containing the property name, the property exploit and the compiled encode for the property if
+            the property is a primitive.
+        '''
+        encoders = []
+        for nameProp, encodeProp in self.properties.items():
+            if isinstance(encodeProp, EncodePrimitive):
+                assert isinstance(encodeProp, EncodePrimitive)
+                encoders.append((nameProp, encodeProp, encodeProp.compile(nameProp, normalizer)))
+            else: encoders.append((nameProp, encodeProp, None))
+        return encoders
+
 class EncodeModelProperty(EncodeModel):
     '''
     Exploit for model encoding that represents only a property.
@@ -9,9 +9,11 @@ Created on Jul 31, 2012
 Provides the standard headers handling.
 '''
 
+from ally.api.extension import IterPart
 from ally.api.operator.type import TypeModelProperty, TypeModel
 from ally.api.type import Input, typeFor, TypeClass, Type
 from ally.container.ioc import injected
+from ally.core.impl.invoker import InvokerCall
 from ally.core.http.spec.transform.support_model import DataModel, IFetcher
 from ally.core.spec.codes import Code
 from ally.core.spec.resources import Path, Node, Invoker, INodeInvokerListener
@@ -53,12 +55,16 @@ class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
     Implementation for a handler that provides the fetcher used in getting the filtered models.
     '''
     typeResponse = TypeClass(Response)
+    nameBatch = '%ss'
+    # The pattern used for the batch method name, the pattern receives the invoker call name, the batch method is looked
+    # up on the invoker implementation and it needs to take a list of ids and return the models for those ids.
 
     def __init__(self):
         '''
         Construct the encoder.
         '''
         assert isinstance(self.typeResponse, Type), 'Invalid type response %s' % self.typeResponse
+        assert isinstance(self.nameBatch, str), 'Invalid batch name %s' % self.nameBatch
         super().__init__()
 
         self._cache = WeakKeyDictionary()
@@ -122,7 +128,7 @@ class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
                                 log.warning('Cannot locate any input main invoker %s input for invoker %s and input %s',
                                             invokerMain, invoker, inp)
                                 break
-                    else: fetcher.addFetch(reference, invoker, indexes)
+                    else: fetcher.addFetch(reference, invoker, indexes, self.batchFor(reference, invoker, indexes))
 
                 fetcher.inputs.append(Input('$response', self.typeResponse, True, None))
 
@@ -155,6 +161,38 @@ class FetcherHandler(HandlerProcessorProceed, INodeInvokerListener):
 
         return fetch
 
+    def batchFor(self, reference, invoker, indexes):
+        '''
+        Provides the batch fetching for the reference if the invoker implementation has a batch method.
+        
+        @param reference: Reference
+            The reference for fetching.
+        @param invoker: Invoker
+            The invoker associated with the reference.
+        @param indexes: list[integer]
+            The indexes of the arguments to be used for calling the invoker.
+        @return: tuple(Callable, TypeModel, string, string)|None
+            The batch method, the model type containing the reference, the reference property name and the id property
+            name of the fetched model, None if there is no batch fetching for the reference.
+        '''
+        assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
+        assert isinstance(indexes, list), 'Invalid indexes list %s' % indexes
+
+        if not isinstance(invoker, InvokerCall) or indexes != [None]: return
+        assert isinstance(invoker, InvokerCall)
+
+        propertyType = typeFor(reference)
+        if not isinstance(propertyType, TypeModelProperty): return
+        assert isinstance(propertyType, TypeModelProperty)
+        modelType = propertyType.type
+        if not isinstance(modelType, TypeModel): return
+        assert isinstance(modelType, TypeModel)
+
+        batch = getattr(invoker.implementation, self.nameBatch % invoker.call.name, None)
+        if not callable(batch): return
+
+        return batch, propertyType.parent, propertyType.property, modelType.container.propertyId
+
     # ----------------------------------------------------------------
 
     def onInvokerChange(self, node, old, new):
@@ -199,7 +237,7 @@ class FetcherInvoker(Invoker):
 
         return len(self.inputs) - 1
 
-    def addFetch(self, reference, invoker, indexes):
+    def addFetch(self, reference, invoker, indexes, batch=None):
         '''
         Add a new reference entry in the fetcher.
         
@@ -210,12 +248,15 @@ class FetcherInvoker(Invoker):
         @param indexes: list[integer]
             The indexes in the invoker arguments to be used for the invoker at fetching, basically all the indexes of
             the arguments (beside of the model id one which is None in the indexes) to be used for call the invoker.
+        @param batch: tuple(Callable, TypeModel, string, string)|None
+            The batch fetching for the reference, @see: FetcherHandler.batchFor
         '''
         assert isinstance(invoker, Invoker), 'Invalid invoker %s' % invoker
         assert isinstance(indexes, list), 'Invalid indexes list %s' % indexes
+        assert batch is None or isinstance(batch, tuple), 'Invalid batch %s' % batch
 
         self.references[reference] = len(self.invokers)
-        self.invokers.append((invoker, indexes))
+        self.invokers.append((invoker, indexes, batch))
 
     def invoke(self, *args):
         '''
@@ -223,26 +264,32 @@ class FetcherInvoker(Invoker):
         '''
         response = args[-1]
         assert isinstance(response, Response), 'Invalid response %s' % response
-        response.encoderData.update(fetcher=Fetcher(self, args))
-        return self.invoker.invoke(*args[:len(self.invoker.inputs)])
+        value = self.invoker.invoke(*args[:len(self.invoker.inputs)])
+        response.encoderData.update(fetcher=Fetcher(self, args, value))
+        return value
 
 class Fetcher(IFetcher):
     '''
     The fetcher implementation.
     '''
-    __slots__ = ('fetcher', 'args', '_cache')
+    __slots__ = ('fetcher', 'args', 'value', '_cache', '_batched')
 
-    def __init__(self, fetcher, args):
+    def __init__(self, fetcher, args, value=None):
         '''
         Construct the fetcher.
+        
+        @param value: object
+            The value returned by the main invoker, used in collecting the ids for batch fetching.
         '''
         assert isinstance(fetcher, FetcherInvoker), 'Invalid fetcher invoker %s' % fetcher
         assert isinstance(args, (tuple, list)), 'Invalid arguments %s' % args
 
         self.fetcher = fetcher
         self.args = args
+        self.value = value
 
         self._cache = {}
+        self._batched = set()
 
     def fetch(self, reference, valueId):
         '''
@@ -258,11 +305,55 @@ class Fetcher(IFetcher):
             index = fetcher.references.get(reference)
             if index is None: value = None
             else:
-                invoker, indexes = fetcher.invokers[index]
+                invoker, indexes, batch = fetcher.invokers[index]
                 assert isinstance(invoker, Invoker)
 
-                value = invoker.invoke(*(valueId if k is None else self.args[k] for k in indexes))
+                if batch and reference not in self._batched:
+                    self._batched.add(reference)
+                    self.fetchBatch(values, *batch)
+                    value = values.get(valueId, self)
+
+                # The ids that the batch did not deliver are fetched one by one.
+                if value is self: value = invoker.invoke(*(valueId if k is None else self.args[k] for k in indexes))
             values[valueId] = value
 
         return value
 
+    def fetchBatch(self, values, batch, modelType, nameRef, nameId):
+        '''
+        Fetches in one call the models for all the reference ids that can be found in the main value and the already
+        fetched models.
+        
+        @param values: dictionary{object: object}
+            The fetched models indexed by id for the reference.
+        @param batch: Callable
+            The batch method that takes a list of ids and returns the models.
+        @param modelType: TypeModel
+            The model type that contains the reference.
+        @param nameRef: string
+            The reference property name in the model.
+        @param nameId: string
+            The id property name of the fetched models.
+        '''
+        assert isinstance(values, dict), 'Invalid values %s' % values
+        assert callable(batch), 'Invalid batch %s' % batch
+        assert isinstance(modelType, TypeModel), 'Invalid model type %s' % modelType
+
+        items = self.value
+        if isinstance(items, IterPart):
+            assert isinstance(items, IterPart)
+            items = items.wrapped
+        if not isinstance(items, (list, tuple)): items = (items,)
+
+        ids, known = [], set(values)
+        for models in (items,) + tuple(fvalues.values() for fvalues in self._cache.values()):
+            for model in models:
+                if not modelType.isValid(model): continue
+                valueId = getattr(model, nameRef, None)
+                if valueId is None or valueId in known: continue
+                known.add(valueId)
+                ids.append(valueId)
+
+        if ids:
+            for model in batch(ids): values[getattr(model, nameId)] = model
+
@@ -10,7 +10,7 @@ Provides the converters for the response content and request content.
 '''
 
 from ally.api.operator.container import Model
-from ally.api.operator.type import TypeModel
+from ally.api.operator.type import TypeModel, TypeProperty
 from ally.api.type import Type, Percentage, Number, Date, DateTime, Time, \
     Boolean, List, Locale as TypeLocale
 from ally.container.ioc import injected
@@ -23,7 +23,9 @@ from ally.design.processor import HandlerProcessorProceed
 from ally.internationalization import _
 from babel import numbers as bn, dates as bd
 from babel.core import Locale
+from collections import OrderedDict
 from datetime import datetime
+from threading import Lock
 import logging
 
 # --------------------------------------------------------------------
@@ -119,6 +121,8 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
                DateTime:'short'
                }
     # The default formats.
+    cacheSize = 500
+    # The maximum number of locales and converters to be cached.
 
     def __init__(self):
         assert isinstance(self.normalizer, Normalizer), 'Invalid normalizer %s' % self.normalizer
@@ -127,8 +131,12 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
         assert isinstance(self.formatContentNameX, str), 'Invalid name content format %s' % self.formatContentNameX
         assert isinstance(self.formats, dict), 'Invalid formats %s' % self.formats
         assert isinstance(self.defaults, dict), 'Invalid defaults %s' % self.defaults
+        assert isinstance(self.cacheSize, int), 'Invalid cache size %s' % self.cacheSize
         super().__init__()
 
+        self._cache = OrderedDict()
+        self._lock = Lock()
+
     def process(self, request:RequestDecode, response:ResponseDecode, **keyargs):
         '''
         @see: HandlerProcessorProceed.process
@@ -147,14 +155,14 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
 
         locale = None
         if RequestDecode.language in request:
-            try: locale = Locale.parse(request.language, sep='-')
-            except: assert log.debug('Invalid request content language %s', request.language) or True
+            locale = self.localeFor(request.language, '-')
+            if locale is None: assert log.debug('Invalid request content language %s', request.language) or True
 
         if locale is None:
             request.language = self.languageDefault
-            locale = Locale.parse(self.languageDefault)
+            locale = self.localeFor(self.languageDefault)
 
-        try: formats = self.processFormats(locale, formats)
+        try: converter = self.converterFor(locale, formats)
         except FormatError as e:
             assert isinstance(e, FormatError)
             if ResponseDecode.code in response and not response.code.isSuccess: return
@@ -162,7 +170,7 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
             response.errorMessage = 'Bad request content formatting, %s' % e.message
             return
 
-        request.converter = ConverterBabel(locale, formats)
+        request.converter = converter
         request.normalizer = self.normalizer
 
         formats = {}
@@ -172,21 +180,21 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
 
         locale = None
         if ResponseDecode.language in response:
-            try: locale = Locale.parse(response.language, sep='-')
-            except: assert log.debug('Invalid response content language %s', response.language) or True
+            locale = self.localeFor(response.language, '-')
+            if locale is None: assert log.debug('Invalid response content language %s', response.language) or True
 
         if locale is None:
             if RequestDecode.accLanguages in request:
                 for lang in request.accLanguages:
-                    try: locale = Locale.parse(lang, sep='-')
-                    except:
+                    locale = self.localeFor(lang, '-')
+                    if locale is None:
                         assert log.debug('Invalid accepted content language %s', lang) or True
                         continue
                     assert log.debug('Accepted language %s for response', locale) or True
                     break
 
             if locale is None:
-                locale = Locale.parse(self.languageDefault)
+                locale = self.localeFor(self.languageDefault)
                 if RequestDecode.accLanguages in request: request.accLanguages.insert(0, self.languageDefault)
                 else: request.accLanguages = [self.languageDefault]
                 if RequestDecode.argumentsOfType in request: request.argumentsOfType[LIST_LOCALE] = request.accLanguages
@@ -197,7 +205,7 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
             if RequestDecode.argumentsOfType in request:
                 request.argumentsOfType[TypeLocale] = response.language
 
-        try: formats = self.processFormats(locale, formats)
+        try: converter = self.converterFor(locale, formats)
         except FormatError as e:
             assert isinstance(e, FormatError)
             if ResponseDecode.code in response and not response.code.isSuccess: return
@@ -205,11 +213,62 @@ class BabelConversionDecodeHandler(HandlerProcessorProceed):
             response.errorMessage = 'Bad content formatting for response, %s' % e.message
             return
 
-        response.converter = ConverterBabel(locale, formats)
+        response.converter = converter
         response.normalizer = self.normalizer
 
     # ----------------------------------------------------------------
 
+    def localeFor(self, language, sep='_'):
+        '''
+        Provides the cached locale for the language.
+        
+        @param language: string
+            The language to parse the locale for.
+        @param sep: string
+            The separator used in the language.
+        @return: Locale|None
+            The locale or None if the language is not a valid locale.
+        '''
+        key = ('locale', language, sep)
+        with self._lock: locale = self._cache.get(key, self)
+        if locale is self:
+            try: locale = Locale.parse(language, sep=sep)
+            except: locale = None
+            self._cacheAdd(key, locale)
+        return locale
+
+    def converterFor(self, locale, formats):
+        '''
+        Provides the cached converter for the locale and formats.
+        
+        @param locale: Locale
+            The locale of the converter.
+        @param formats: dictionary{class, string}
+            The formats of the converter.
+        @return: ConverterBabel
+            The converter.
+        @raise FormatError: in case of invalid formats.
+        '''
+        assert isinstance(locale, Locale), 'Invalid locale %s' % locale
+        assert isinstance(formats, dict), 'Invalid formats %s' % formats
+
+        key = ('converter', str(locale)) + tuple(formats.get(clsTyp) for clsTyp in FORMATTED_TYPE)
+        with self._lock: converter = self._cache.get(key)
+        if converter is None:
+            try: converter = ConverterBabel(locale, self.processFormats(locale, formats))
+            except FormatError as e: converter = e
+            self._cacheAdd(key, converter)
+        if isinstance(converter, FormatError): raise FormatError(converter.message)
+        return converter
+
+    def _cacheAdd(self, key, value):
+        '''
+        Adds the value to the cache.
+        '''
+        with self._lock:
+            self._cache[key] = value
+            while len(self._cache) > self.cacheSize: self._cache.popitem(last=False)
+
     def processFormats(self, locale, formats):
         '''
         Process the formats to a complete list of formats that will be used by conversion.
@@ -237,7 +296,7 @@ class ConverterBabel(Converter):
     '''
     Converter implementation based on Babel.
     '''
-    __slots__ = ('locale', 'formats')
+    __slots__ = ('locale', 'formats', 'patterns', 'formatters')
 
     def __init__(self, locale, formats):
         assert isinstance(locale, Locale), 'Invalid locale %s' % locale
@@ -245,6 +304,24 @@ class ConverterBabel(Converter):
         self.locale = locale
         self.formats = formats
 
+        self.patterns = {}
+        for clsTyp in (Number, Percentage):
+            if clsTyp in formats: self.patterns[clsTyp] = bn.parse_pattern(formats[clsTyp])
+        for clsTyp, named in ((Date, locale.date_formats), (Time, locale.time_formats)):
+            format = formats.get(clsTyp)
+            if format is None: continue
+            if format in ('full', 'long', 'medium', 'short'): format = named[format]
+            self.patterns[clsTyp] = bd.parse_pattern(format)
+        format = formats.get(DateTime)
+        if format in ('full', 'long', 'medium', 'short'):
+            # The named date time formats are composed from the date and time formats with the same name.
+            self.patterns[DateTime] = (bd.get_datetime_format(format, locale),
+                                       bd.parse_pattern(locale.date_formats[format]),
+                                       bd.parse_pattern(locale.time_formats[format]))
+        elif format is not None: self.patterns[DateTime] = bd.parse_pattern(format)
+
+        self.formatters = {}
+
     def asString(self, objValue, objType):
         '''
         @see: Converter.asString
@@ -255,20 +332,50 @@ class ConverterBabel(Converter):
             container = objType.container
             assert isinstance(container, Model)
             objType = container.properties[container.propertyId]
+        # The property types are checked based on the type they wrap, the property types that have the same parent and
+        # name might wrap different types.
+        while isinstance(objType, TypeProperty): objType = objType.type
+
+        formatter = self.formatters.get(objType)
+        if formatter is None: formatter = self.formatters[objType] = self.formatterFor(objType)
+        return formatter(objValue)
+
+    def formatterFor(self, objType):
+        '''
+        Provides the formatter for the type.
+        
+        @param objType: Type
+            The type to provide the formatter for.
+        @return: callable(object) -> string
+            The formatter that converts the value to string.
+        '''
+        assert isinstance(objType, Type), 'Invalid object type %s' % objType
+        locale = self.locale
         if objType.isOf(str):
-            return objValue
+            return lambda objValue: objValue
         if objType.isOf(bool):
-            return str(objValue)
+            return str
         if objType.isOf(Percentage):
-            return bn.format_percent(objValue, self.formats.get(Percentage, None), self.locale)
+            pattern = self.patterns.get(Percentage)
+            if pattern is None: return lambda objValue: bn.format_percent(objValue, None, locale)
+            return lambda objValue: pattern.apply(objValue, locale)
         if objType.isOf(Number):
-            return bn.format_decimal(objValue, self.formats.get(Number, None), self.locale)
+            pattern = self.patterns.get(Number)
+            if pattern is None: return lambda objValue: bn.format_decimal(objValue, None, locale)
+            return lambda objValue: pattern.apply(objValue, locale)
         if objType.isOf(Date):
-            return bd.format_date(objValue, self.formats.get(Date, None), self.locale)
+            pattern = self.patterns.get(Date)
+            return lambda objValue: bd.format_date(objValue, pattern, locale)
         if objType.isOf(Time):
-            return bd.format_time(objValue, self.formats.get(Time, None), self.locale)
+            pattern = self.patterns.get(Time)
+            return lambda objValue: bd.format_time(objValue, pattern, None, locale)
         if objType.isOf(DateTime):
-            return bd.format_datetime(objValue, self.formats.get(DateTime, None), None, self.locale)
+            pattern = self.patterns.get(DateTime)
+            if isinstance(pattern, tuple):
+                format, patternDate, patternTime = pattern
+                return lambda objValue: format.replace('{0}', bd.format_time(objValue, patternTime, None, locale))\
+                    .replace('{1}', bd.format_date(objValue, patternDate, locale))
+            return lambda objValue: bd.format_datetime(objValue, pattern, None, locale)
         raise TypeError('Invalid object type %s for Babel converter' % objType)
 
     # TODO: add proper support for parsing.
@@ -12,6 +12,7 @@ Provides the URI request path handler.
 from ally.api.type import Scheme
 from ally.container.ioc import injected
 from ally.core.http.spec.server import IEncoderPath, IDecoderHeader
+from ally.core.impl.node import MatchRoot, MatchString, MatchProperty
 from ally.core.spec.codes import RESOURCE_NOT_FOUND, RESOURCE_FOUND, Code
 from ally.core.spec.resources import ConverterPath, Path, IResourcesLocator, \
     Converter, Normalizer
@@ -112,6 +113,8 @@ class URIHandler(HandlerProcessorProceed):
         assert isinstance(self.headerHost, str), 'Invalid string %s' % self.headerHost
         super().__init__()
 
+        self._templates = {}
+
     def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
         '''
         @see: HandlerProcessorProceed.process
@@ -156,7 +159,8 @@ class URIHandler(HandlerProcessorProceed):
             response.code, response.text = MISSING_HEADER, 'Missing the %s header' % self.headerHost
             assert log.debug('No host header available for URI %s', request.uri) or True
             return
-        response.encoderPath = EncoderPathURI(request.scheme, host, request.uriRoot, self.converterPath, extension)
+        response.encoderPath = EncoderPathURI(request.scheme, host, request.uriRoot, self.converterPath, extension,
+                                              self._templates)
 
         response.code = RESOURCE_FOUND
         response.converterId = self.converterPath
@@ -169,9 +173,9 @@ class EncoderPathURI(IEncoderPath):
     Provides encoding for the URI paths generated by the URI processor.
     '''
 
-    __slots__ = ('scheme', 'host', 'root', 'converterPath', 'extension')
+    __slots__ = ('scheme', 'host', 'root', 'converterPath', 'extension', 'templates', 'prefix')
 
-    def __init__(self, scheme, host, root, converterPath, extension):
+    def __init__(self, scheme, host, root, converterPath, extension, templates=None):
         '''
         @param scheme: string
             The encoded path scheme.
@@ -184,17 +188,24 @@ class EncoderPathURI(IEncoderPath):
             The converter path to be used on Path objects to get the URL.
         @param extension: string
             The extension to use on the encoded paths.
+        @param templates: dictionary{integer, tuple}|None
+            The compiled path templates indexed by the path node id, the templates only depend on the converter path so
+            the dictionary can be shared by all the encoders that use the same converter path.
         '''
         assert isinstance(scheme, str), 'Invalid scheme %s' % scheme
         assert isinstance(host, str), 'Invalid host %s' % host
         assert isinstance(root, str), 'Invalid root URI %s' % root
         assert isinstance(converterPath, ConverterPath), 'Invalid converter path %s' % converterPath
         assert extension is None or isinstance(extension, str), 'Invalid extension %s' % extension
+        assert templates is None or isinstance(templates, dict), 'Invalid templates %s' % templates
         self.scheme = scheme
         self.host = host
         self.root = root
         self.converterPath = converterPath
         self.extension = extension
+        self.templates = {} if templates is None else templates
+        # The scheme and host part of the URL, the path part always starts with a slash.
+        self.prefix = urlunsplit((scheme, host, '/', '', ''))[:-1]
 
     def encode(self, path, parameters=None):
         '''
@@ -204,6 +215,23 @@ class EncoderPathURI(IEncoderPath):
         if isinstance(path, Path):
             assert isinstance(path, Path)
 
+            tokens = self.templateFor(path)
+            if tokens is not None:
+                url, matches = [self.root], path.matches
+                for token in tokens:
+                    if isinstance(token, int): url.append(matches[token].toPath(self.converterPath, False, False))
+                    else: url.append(token)
+                if self.extension:
+                    url.append('.')
+                    url.append(self.extension)
+                elif path.node.isGroup:
+                    url.append('/')
+
+                url = ''.join(url)
+                if url and url[0] != '/': url = '/' + url
+                if parameters: return ''.join((self.prefix, url, '?', urlencode(parameters)))
+                return self.prefix + url
+
             url = deque()
             url.append(self.root)
             url.append('/'.join(path.toPaths(self.converterPath)))
@@ -224,3 +252,39 @@ class EncoderPathURI(IEncoderPath):
             # The path is relative to this server so we will convert it in an absolute path
             url = urlsplit(path)
             return urlunsplit((self.scheme, self.host, url.path, url.query, url.fragment))
+
+    def templateFor(self, path):
+        '''
+        Provides the compiled template for the path, the template contains the static path elements already normalized
+        and joined and the indexes of the matches that need to be converted.
+        
+        @param path: Path
+            The path to provide the template for.
+        @return: list[string|integer]|None
+            The template tokens or None if the path cannot be compiled.
+        '''
+        assert isinstance(path, Path), 'Invalid path %s' % path
+
+        entry = self.templates.get(id(path.node))
+        if entry is not None:
+            node, count, tokens = entry
+            if node is path.node and count == len(path.matches): return tokens
+
+        tokens, static, first = [], [], True
+        for k, match in enumerate(path.matches):
+            if isinstance(match, MatchRoot): continue
+            if not first: static.append('/')
+            first = False
+            if isinstance(match, MatchProperty):
+                tokens.append(''.join(static))
+                tokens.append(k)
+                static = []
+            elif isinstance(match, MatchString):
+                static.append(match.toPath(self.converterPath, False, False))
+            else:
+                tokens = None
+                break
+        else: tokens.append(''.join(static))
+
+        self.templates[id(path.node)] = (path.node, len(path.matches), tokens)
+        return tokens
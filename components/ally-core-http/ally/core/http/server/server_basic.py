@@ -16,10 +16,13 @@ from ally.core.http.spec.server import METHOD_OPTIONS, RequestHTTP, ResponseHTTP
 from ally.core.spec.codes import Code
 from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
     CREATE_REPORT, Chain
+from ally.support.http.util_http import chunkedGenerator, \
+    HEADER_TRANSFER_ENCODING, TRANSFER_CHUNKED
 from ally.support.util_io import IOutputStream, readGenerator
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qsl
 import logging
+import os
 import re
 
 # --------------------------------------------------------------------
@@ -33,6 +36,12 @@ class RequestHandler(BaseHTTPRequestHandler):
     The server class that handles the HTTP requests.
     '''
 
+    protocol_version = 'HTTP/1.1'
+    # The HTTP protocol version used in responses, needs to be 1.1 in order to support chunked responses, the connections
+    # are not persisted since the server handles one request at a time.
+    headerContentLength = 'content-length'
+    # The lower case name of the header that provides the content length.
+
     def do_GET(self):
         self._process(GET)
 
@@ -73,6 +82,7 @@ class RequestHandler(BaseHTTPRequestHandler):
                 break
         else:
             self.send_response(404)
+            self.send_header('Connection', 'close')
             self.end_headers()
             return
 
@@ -83,8 +93,19 @@ class RequestHandler(BaseHTTPRequestHandler):
         Chain(processing).process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt).doAll()
 
         assert isinstance(rsp.code, Code), 'Invalid response code %s' % rsp.code
+        chunked = False
         if ResponseHTTP.headers in rsp:
-            for name, value in rsp.headers.items(): self.send_header(name, value)
+            hasLength = False
+            for name, value in rsp.headers.items():
+                if name.lower() == self.headerContentLength: hasLength = True
+                self.send_header(name, value)
+        else: hasLength = False
+        if rspCnt.source is not None and not hasLength and self.request_version == 'HTTP/1.1':
+            # The content is streamed so we need to use chunked transfer, HTTP/1.0 clients just read until close.
+            self.send_header(HEADER_TRANSFER_ENCODING, TRANSFER_CHUNKED)
+            chunked = True
+        self.send_header('Connection', 'close')
+        self.close_connection = 1
 
         if ResponseHTTP.text in rsp: self.send_response(rsp.code.code, rsp.text)
         else: self.send_response(rsp.code.code)
@@ -92,10 +113,50 @@ class RequestHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
         if rspCnt.source is not None:
+            if ResponseContentHTTP.sourceFile in rspCnt and rspCnt.sourceFile and not rspCnt.sourceFile[0].closed \
+            and not chunked and hasattr(os, 'sendfile'):
+                self._sendFile(*rspCnt.sourceFile)
+                return
+
             if isinstance(rspCnt.source, IOutputStream): source = readGenerator(rspCnt.source)
             else: source = rspCnt.source
+            if chunked: source = chunkedGenerator(source)
+
+            try:
+                for bytes in source: self.wfile.write(bytes)
+            except:
+                # The status and headers are already sent so the only option left is to drop the connection, this
+                # server closes the connection after each response.
+                log.exception('Exception occurred while providing the content for \'%s\'' % self.connection)
 
-            for bytes in source: self.wfile.write(bytes)
+    def _sendFile(self, file, offset, count):
+        '''
+        Sends the file content directly to the connection socket.
+        
+        @param file: file
+            The file to send the content from, the file is closed after sending.
+        @param offset: integer
+            The offset in the file where the content starts.
+        @param count: integer
+            The number of bytes to send.
+        '''
+        self.wfile.flush()
+        with file:
+            try:
+                while count > 0:
+                    sent = os.sendfile(self.connection.fileno(), file.fileno(), offset, count)
+                    if not sent:
+                        log.error('The file ended with %s bytes not sent to the connection \'%s\'', count,
+                                  self.connection)
+                        break
+                    offset += sent
+                    count -= sent
+            except (OSError, ValueError):
+                # The value error is raised if the file has been closed.
+                log.exception('Exception occurred while writing to the connection \'%s\'' % self.connection)
+        # The status and headers are already sent so if the content is not complete the connection needs to be dropped,
+        # this server closes the connection after each response.
+        self.close_connection = 1
 
     # ----------------------------------------------------------------
 
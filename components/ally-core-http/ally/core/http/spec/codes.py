@@ -22,3 +22,7 @@ UNKNOWN_CONTENT_TYPE = Code(406, False) # HTTP code 406 Not acceptable
 UNKNOWN_CHARSET = Code(406, False) # HTTP code 406 Not acceptable
 UNKNOWN_PROPERTY = Code(400, False) # HTTP code 400 Bad Request
 UNAUTHORIZED = Code(401 , False) # HTTP code 401 Unauthorized
+RANGE_NOT_SATISFIABLE = Code(416, False) # HTTP code 416 Requested range not satisfiable
+
+PARTIAL_CONTENT = Code(206, True) # HTTP code 206 Partial Content
+NOT_MODIFIED = Code(304, True) # HTTP code 304 Not Modified
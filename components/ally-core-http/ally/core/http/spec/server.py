@@ -90,6 +90,14 @@ class ResponseContentHTTP(Context):
     @rtype: IOutputStream|Iterable
     The source for the response content.
     ''')
+    # ---------------------------------------------------------------- Optional
+    sourceFile = optional(tuple, doc='''
+    @rtype: tuple(file, integer, integer)
+    Marks a response content that is read from a file, contains the file object, the offset in the file and the number
+    of bytes to deliver. The server can send the content directly from the file instead of reading the source, in which
+    case the server closes the file. The file is not used if is closed, the source is used instead, this is the case
+    when the source has been consumed before sending.
+    ''')
 
 # --------------------------------------------------------------------
 
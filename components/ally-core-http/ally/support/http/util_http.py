@@ -0,0 +1,36 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides HTTP utility functions.
+'''
+
+from collections import Iterable
+
+# --------------------------------------------------------------------
+
+HEADER_TRANSFER_ENCODING = 'Transfer-Encoding'
+# The transfer encoding header name.
+TRANSFER_CHUNKED = 'chunked'
+# The chunked transfer encoding value.
+
+# --------------------------------------------------------------------
+
+def chunkedGenerator(source):
+    '''
+    Provides a generator that encodes the content from the source using the HTTP/1.1 chunked transfer coding, the last
+    chunk is also provided.
+    
+    @param source: Iterable(bytes)
+        The iterable providing the content bytes.
+    '''
+    assert isinstance(source, Iterable), 'Invalid source %s' % source
+
+    for bytes in source:
+        if not bytes: continue  # An empty chunk marks the end of the content.
+        yield b''.join((('%X\r\n' % len(bytes)).encode('ascii'), bytes, b'\r\n'))
+    yield b'0\r\n\r\n'
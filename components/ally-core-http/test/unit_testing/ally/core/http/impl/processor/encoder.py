@@ -0,0 +1,145 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the encoder path data model caching.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, service, call
+from ally.api.type import Iter
+from ally.container import ioc
+from ally.core.http.impl.processor.encoder import CreateEncoderPathHandler, \
+    Request, Response
+from ally.core.http.impl.processor.header import HeaderHandler, DecoderHeader
+from ally.core.impl.assembler import AssembleGet
+from ally.core.impl.node import NodeRoot
+from ally.core.impl.resources_management import ResourcesManager
+from ally.core.spec.resources import ConverterPath
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Article:
+    Id = int
+    Name = str
+
+@model(id='Id')
+class Comment:
+    Id = int
+    Article = Article
+    Text = str
+
+@service
+class IArticleService:
+
+    @call
+    def getById(self, id:Article.Id) -> Article:
+        '''
+        Nothing.
+        '''
+
+    @call
+    def getComments(self, articleId:Article.Id) -> Iter(Comment):
+        '''
+        Nothing.
+        '''
+
+@service
+class ICommentService:
+
+    @call
+    def getById(self, id:Comment.Id) -> Comment:
+        '''
+        Nothing.
+        '''
+
+class ArticleService(IArticleService):
+
+    def getById(self, id): pass
+
+    def getComments(self, articleId): pass
+
+class CommentService(ICommentService):
+
+    def getById(self, id): pass
+
+# --------------------------------------------------------------------
+
+class TestEncoderPath(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ResourcesManager()
+        self.manager.root, self.manager.assemblers = NodeRoot(), [AssembleGet()]
+        for assembler in self.manager.assemblers: ioc.initialize(assembler)
+        ioc.initialize(self.manager)
+        self.manager.register(ArticleService())
+
+        self.converter = ConverterPath()
+        self.handler = CreateEncoderPathHandler()
+        ioc.initialize(self.handler)
+        self.headerHandler = HeaderHandler()
+        ioc.initialize(self.headerHandler)
+
+    def process(self, id, xfilter=None):
+        path = self.manager.findPath(self.converter, ['Article', id])
+        request, response = Request(), Response()
+        request.invoker, request.path = path.node.get, path
+        request.decoderHeader = DecoderHeader(self.headerHandler, {} if xfilter is None else {'X-Filter': xfilter})
+        response.converterId = response.converter = response.normalizer = self.converter
+        response.encoderPath = None
+
+        self.handler.process(request, response)
+        return path, response.encoderDataModel
+
+    def testBind(self):
+        path1, data1 = self.process('1', 'Name')
+        path2, data2 = self.process('2', 'Name')
+        # The same invoker and filter use the same cached data model.
+        self.assertEqual(len(self.handler._dataCache), 1)
+
+        self.assertIsNot(data1, data2)
+        self.assertEqual(data1.filter, data2.filter)
+        self.assertIs(data1.path.parent, path1)
+        self.assertIs(data2.path.parent, path2)
+        self.assertEqual(data1.accessible['Comment'].toPaths(self.converter), ['Article', '1', 'Comment'])
+        self.assertEqual(data2.accessible['Comment'].toPaths(self.converter), ['Article', '2', 'Comment'])
+
+        # Binding another request does not alter the previously binded data models.
+        _path3, data3 = self.process('3', 'Name')
+        self.assertEqual(data3.accessible['Comment'].toPaths(self.converter), ['Article', '3', 'Comment'])
+        self.assertEqual(data2.accessible['Comment'].toPaths(self.converter), ['Article', '2', 'Comment'])
+
+        self.process('1')
+        self.assertEqual(len(self.handler._dataCache), 2)
+
+    def testStructureChange(self):
+        path, _data = self.process('1', 'Name')
+        self.assertEqual(len(self.handler._dataCache), 1)
+        self.handler.onChildAdded(path.node, path.node)
+        self.assertEqual(len(self.handler._dataCache), 0)
+
+        path, _data = self.process('1', 'Name')
+        self.assertEqual(len(self.handler._dataCache), 1)
+        self.handler.onInvokerChange(path.node, None, path.node.get)
+        self.assertEqual(len(self.handler._dataCache), 0)
+
+        # The handler is registered as a structure listener on the resources root.
+        self.process('1', 'Name')
+        self.manager.register(CommentService())
+        self.assertEqual(len(self.handler._dataCache), 0)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,164 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the models fetcher.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, service, call
+from ally.api.extension import IterPart
+from ally.api.type import typeFor, Iter
+from ally.container import ioc
+from ally.core.http.impl.processor.fetcher import FetcherHandler, \
+    FetcherInvoker, Fetcher, Response
+from ally.core.impl.invoker import InvokerCall
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class User:
+    Id = int
+    Name = str
+
+@model(id='Id')
+class Article:
+    Id = int
+    Author = User
+
+@service
+class IUserService:
+
+    @call
+    def getById(self, id:User.Id) -> User:
+        '''
+        Nothing.
+        '''
+
+@service
+class IArticleService:
+
+    @call
+    def getAll(self) -> Iter(Article):
+        '''
+        Nothing.
+        '''
+
+class UserService(IUserService):
+
+    def __init__(self, missing=()):
+        self.missing = missing
+        self.calls = []
+
+    def getById(self, id):
+        self.calls.append(('getById', id))
+        return self.userFor(id)
+
+    def getByIds(self, ids):
+        self.calls.append(('getByIds', list(ids)))
+        return [self.userFor(id) for id in ids if id not in self.missing]
+
+    def userFor(self, id):
+        user = User()
+        user.Id, user.Name = id, 'User %s' % id
+        return user
+
+class UserServiceNoBatch(IUserService):
+
+    def getById(self, id): pass
+
+class ArticleService(IArticleService):
+
+    def __init__(self, articles): self.articles = articles
+
+    def getAll(self): return self.articles
+
+def invokerFor(implementation, clazz, name):
+    for call in typeFor(clazz).service.calls:
+        if call.name == name: return InvokerCall(implementation, call)
+
+def articlesFor(*authors):
+    articles = []
+    for k, author in enumerate(authors):
+        article = Article()
+        article.Id, article.Author = k, author
+        articles.append(article)
+    return articles
+
+# --------------------------------------------------------------------
+
+class TestFetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = FetcherHandler()
+        ioc.initialize(self.handler)
+
+    def fetcherFor(self, userService, articles):
+        invoker = invokerFor(userService, IUserService, 'getById')
+        batch = self.handler.batchFor(Article.Author, invoker, [None])
+        self.assertIsNotNone(batch)
+
+        fetcherInvoker = FetcherInvoker(invokerFor(ArticleService(articles), IArticleService, 'getAll'))
+        fetcherInvoker.addFetch(Article.Author, invoker, [None], batch)
+        response = Response()
+        response.encoderData = {}
+        value = fetcherInvoker.invoke(response)
+        self.assertIs(value, articles)
+
+        fetcher = response.encoderData['fetcher']
+        self.assertIsInstance(fetcher, Fetcher)
+        return fetcher
+
+    def testBatchFor(self):
+        batch = self.handler.batchFor(Article.Author, invokerFor(UserService(), IUserService, 'getById'), [None])
+        self.assertEqual(batch[1:], (typeFor(Article), 'Author', 'Id'))
+
+        # No batch if the implementation has no batch method or the invoker needs other arguments beside the id.
+        self.assertIsNone(self.handler.batchFor(Article.Author,
+                                                invokerFor(UserServiceNoBatch(), IUserService, 'getById'), [None]))
+        self.assertIsNone(self.handler.batchFor(Article.Author, invokerFor(UserService(), IUserService, 'getById'),
+                                                [None, 0]))
+
+    def testBatch(self):
+        userService = UserService()
+        fetcher = self.fetcherFor(userService, articlesFor(1, 2, 3, 2, 4))
+
+        for author in (1, 2, 3, 2, 4):
+            user = fetcher.fetch(Article.Author, author)
+            self.assertEqual((user.Id, user.Name), (author, 'User %s' % author))
+        self.assertEqual(userService.calls, [('getByIds', [1, 2, 3, 4])])
+
+    def testBatchMissing(self):
+        userService = UserService(missing=(3,))
+        fetcher = self.fetcherFor(userService, articlesFor(1, 2, 3))
+
+        for author in (1, 2, 3): self.assertEqual(fetcher.fetch(Article.Author, author).Id, author)
+        # The ids that are not delivered by the batch are fetched one by one.
+        self.assertEqual(userService.calls, [('getByIds', [1, 2, 3]), ('getById', 3)])
+
+        fetcher.fetch(Article.Author, 3)
+        fetcher.fetch(Article.Author, 5)
+        self.assertEqual(userService.calls, [('getByIds', [1, 2, 3]), ('getById', 3), ('getById', 5)])
+
+    def testBatchPart(self):
+        userService = UserService()
+        fetcher = self.fetcherFor(userService, IterPart(articlesFor(1, 2), 10, 0, 2))
+
+        self.assertEqual(fetcher.fetch(Article.Author, 2).Id, 2)
+        self.assertEqual(fetcher.fetch(Article.Author, 1).Id, 1)
+        self.assertEqual(userService.calls, [('getByIds', [1, 2])])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
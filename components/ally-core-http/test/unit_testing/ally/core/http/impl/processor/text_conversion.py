@@ -0,0 +1,93 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the Babel text conversion.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.type import typeFor, Number, Percentage, Date, Time, DateTime
+from ally.container import ioc
+from ally.core.http.impl.processor.text_conversion import \
+    BabelConversionDecodeHandler, ConverterBabel, FormatError
+from ally.core.spec.resources import Normalizer
+from datetime import date, time, datetime
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestConverterBabel(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = BabelConversionDecodeHandler()
+        self.handler.normalizer = Normalizer()
+        self.handler.languageDefault = 'en'
+        ioc.initialize(self.handler)
+        self.locale = self.handler.localeFor('en-US', '-')
+
+    def assertFormats(self, converter, expected):
+        for clsTyp, value, text in expected:
+            self.assertEqual(converter.asString(value, typeFor(clsTyp)), text)
+
+    def testDefaults(self):
+        converter = self.handler.converterFor(self.locale, {})
+        self.assertIsInstance(converter, ConverterBabel)
+        self.assertFormats(converter, ((Percentage, 0.256, '26%'),
+                                       (Date, date(2012, 10, 18), '10/18/12'),
+                                       (Time, time(13, 5, 7), '1:05 PM'),
+                                       (DateTime, datetime(2012, 10, 18, 13, 5, 7), '10/18/12 1:05 PM')))
+
+    def testPatterns(self):
+        formats = {Number: '#,##0.000', Percentage: '#0.0%', Date: 'yyyy/MM/dd', Time: 'HH:mm:ss',
+                   DateTime: 'yyyy-MM-dd HH:mm'}
+        converter = self.handler.converterFor(self.locale, dict(formats))
+        self.assertFormats(converter, ((Percentage, 0.256, '25.6%'),
+                                       (Date, date(2012, 10, 18), '2012/10/18'),
+                                       (Time, time(13, 5, 7), '13:05:07'),
+                                       (DateTime, datetime(2012, 10, 18, 13, 5, 7), '2012-10-18 13:05')))
+        # The numbers are boolean compatible types so they are not formatted.
+        self.assertEqual(converter.asString(1234.5, typeFor(Number)), '1234.5')
+        self.assertEqual(converter.patterns[Number].apply(1234.5, self.locale), '1,234.500')
+
+        # The converters and formatters are reused for the same locale and formats.
+        self.assertIs(self.handler.converterFor(self.locale, dict(formats)), converter)
+        self.assertEqual(set(converter.formatters), set(typeFor(clsTyp) for clsTyp in formats))
+        self.assertIsNot(self.handler.converterFor(self.locale, {Time: 'HH:mm'}), converter)
+        self.assertIs(self.handler.localeFor('en-US', '-'), self.locale)
+        self.assertIsNone(self.handler.localeFor('not a locale'))
+
+    def testNamedPatterns(self):
+        converter = self.handler.converterFor(self.locale, {Date: 'long', Time: 'medium', DateTime: 'medium'})
+        self.assertFormats(converter, ((Date, date(2012, 10, 18), 'October 18, 2012'),
+                                       (Time, time(13, 5, 7), '1:05:07 PM'),
+                                       (DateTime, datetime(2012, 10, 18, 13, 5, 7), 'Oct 18, 2012 1:05:07 PM')))
+
+    def testFormatError(self):
+        calls = []
+        processFormats = self.handler.processFormats
+        def process(locale, formats):
+            calls.append(formats)
+            return processFormats(locale, formats)
+        self.handler.processFormats = process
+
+        with self.assertRaises(FormatError) as first: self.handler.converterFor(self.locale, {Number: 'abc'})
+        # The invalid formats are cached and the error is raised again without processing the formats.
+        with self.assertRaises(FormatError) as second: self.handler.converterFor(self.locale, {Number: 'abc'})
+        self.assertEqual(len(calls), 1)
+        self.assertIsNot(first.exception, second.exception)
+        self.assertEqual(first.exception.message, second.exception.message)
+        self.assertTrue(second.exception.message.startswith('invalid Number format \'abc\''))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,131 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the URI path encoder.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, service, call
+from ally.api.type import Iter
+from ally.container import ioc
+from ally.core.http.impl.processor.uri import EncoderPathURI
+from ally.core.impl.assembler import AssembleGet
+from ally.core.impl.node import NodeRoot
+from ally.core.impl.resources_management import ResourcesManager
+from ally.core.spec.resources import ConverterPath
+from urllib.parse import urlencode, urlunsplit
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Article:
+    Id = int
+    Name = str
+
+@model(id='Id')
+class Comment:
+    Id = int
+    Article = Article
+
+@service
+class IArticleService:
+
+    @call
+    def getById(self, id:Article.Id) -> Article:
+        '''
+        Nothing.
+        '''
+
+    @call
+    def getAll(self) -> Iter(Article):
+        '''
+        Nothing.
+        '''
+
+    @call
+    def getComments(self, articleId:Article.Id) -> Iter(Comment):
+        '''
+        Nothing.
+        '''
+
+class ArticleService(IArticleService):
+
+    def getById(self, id): pass
+
+    def getAll(self): pass
+
+    def getComments(self, articleId): pass
+
+# --------------------------------------------------------------------
+
+class TestEncoderPathURI(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = ResourcesManager()
+        self.manager.root, self.manager.assemblers = NodeRoot(), [AssembleGet()]
+        for assembler in self.manager.assemblers: ioc.initialize(assembler)
+        ioc.initialize(self.manager)
+        self.manager.register(ArticleService())
+        self.converter = ConverterPath()
+
+    def expectedFor(self, encoder, path, parameters=None):
+        '''
+        Provides the URL constructed from all the path elements.
+        '''
+        url = encoder.root + '/'.join(path.toPaths(self.converter))
+        if encoder.extension: url += '.' + encoder.extension
+        elif path.node.isGroup: url += '/'
+        query = urlencode(parameters) if parameters else ''
+        return urlunsplit((encoder.scheme, encoder.host, url, query, ''))
+
+    def testEncode(self):
+        paths = [['Article', '1'], ['Article', '2', 'Comment'], ['Article'], []]
+        parameters = [None, [('offset', 10), ('limit', 5)], [('name', 'ä b&c')]]
+        templates = {}
+        for root in ('', 'resources/'):
+            for extension in (None, 'json'):
+                encoder = EncoderPathURI('http', 'localhost:8080', root, self.converter, extension, templates)
+                for elements in paths:
+                    path = self.manager.findPath(self.converter, elements)
+                    self.assertIsNotNone(path.node)
+                    for params in parameters:
+                        self.assertEqual(encoder.encode(path, params), self.expectedFor(encoder, path, params))
+
+        self.assertEqual(encoder.encode(self.manager.findPath(self.converter, ['Article']), [('offset', 10)]),
+                         'http://localhost:8080/resources/Article.json?offset=10')
+        self.assertEqual(encoder.encode(self.manager.findPath(self.converter, ['Article', '2', 'Comment'])),
+                         'http://localhost:8080/resources/Article/2/Comment.json')
+        # The relative string paths are encoded on the host and the absolute ones are left as they are.
+        self.assertEqual(encoder.encode('/some/file.txt?a=1'), 'http://localhost:8080/some/file.txt?a=1')
+        self.assertEqual(encoder.encode('http://other/file.txt'), 'http://other/file.txt')
+
+    def testTemplate(self):
+        encoder = EncoderPathURI('http', 'localhost', '', self.converter, None)
+
+        path = self.manager.findPath(self.converter, ['Article', '1', 'Comment'])
+        tokens = encoder.templateFor(path)
+        self.assertEqual(tokens, ['Article/', 2, '/Comment'])
+        # The template is compiled once for the path node and used for all the values.
+        path = self.manager.findPath(self.converter, ['Article', '7', 'Comment'])
+        self.assertIs(encoder.templateFor(path), tokens)
+        self.assertEqual(encoder.encode(path), 'http://localhost/Article/7/Comment/')
+
+        self.assertEqual(encoder.templateFor(self.manager.findPath(self.converter, ['Article'])), ['Article'])
+        self.assertEqual(encoder.templateFor(self.manager.findPath(self.converter, [])), [''])
+        self.assertEqual(len(encoder.templates), 3)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,114 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the basic server.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.http.server.server_basic import RequestHandler, BasicServer
+from ally.core.http.spec.server import RequestHTTP, RequestContentHTTP, \
+    ResponseHTTP, ResponseContentHTTP
+from ally.core.spec.codes import Code, RESOURCE_FOUND
+from ally.design.context import Context, defines
+from ally.design.processor import HandlerProcessorProceed, Assembly, \
+    ONLY_AVAILABLE, CREATE_REPORT
+from collections import Iterable
+from tempfile import TemporaryFile
+from threading import Thread
+import re
+import socket
+import unittest
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    uri = defines(str)
+
+class Response(Context):
+    code = defines(Code)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+    sourceFile = defines(tuple)
+
+class FileHandler(HandlerProcessorProceed):
+    '''
+    Responds with the request URI as content in a file, the 'range' URI with the content placed after an offset in the
+    file, the 'closed' URI with the file closed and the 'truncated' URI with a file that is truncated after the content
+    length is provided. The content source is upper cased in order to know if the file is not used.
+    '''
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        content = request.uri.encode()
+        response.code = RESOURCE_FOUND
+        response.headers = {'Content-Length': str(len(content))}
+        responseCnt.source = (content.upper(),)
+
+        file = TemporaryFile()
+        if request.uri == 'range':
+            file.write(b'before' + content + b'after')
+            responseCnt.sourceFile = (file, 6, len(content))
+        else:
+            file.write(content)
+            responseCnt.sourceFile = (file, 0, len(content))
+        file.flush()
+        if request.uri == 'truncated': file.truncate(4)
+        elif request.uri == 'closed': file.close()
+
+# --------------------------------------------------------------------
+
+class TestBasicServer(unittest.TestCase):
+
+    def setUp(self):
+        assembly = Assembly()
+        assembly.add(FileHandler())
+        processing = assembly.create(ONLY_AVAILABLE, CREATE_REPORT, request=RequestHTTP, requestCnt=RequestContentHTTP,
+                                     response=ResponseHTTP, responseCnt=ResponseContentHTTP)[0]
+        self.server = BasicServer(('127.0.0.1', 0), [(re.compile(''), processing)], RequestHandler)
+        thread = Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, uri):
+        connection = socket.create_connection(self.server.server_address, 5)
+        try:
+            connection.sendall(b'GET /' + uri.encode() + b' HTTP/1.1\r\n\r\n')
+            data = b''
+            while True:
+                received = connection.recv(1024)
+                if not received: break
+                data += received
+        finally: connection.close()
+        head, content = data.split(b'\r\n\r\n', 1)
+        self.assertIn(('Content-Length: %s' % len(uri)).encode(), head.split(b'\r\n'))
+        return content
+
+    def testFile(self):
+        self.assertEqual(self.request('full'), b'full')
+        self.assertEqual(self.request('range'), b'range')
+        # The closed file is not sent, the content source is used instead.
+        self.assertEqual(self.request('closed'), b'CLOSED')
+
+    def testFileTruncated(self):
+        # The connection is closed with the content shorter than the declared length.
+        self.assertEqual(self.request('truncated'), b'trun')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
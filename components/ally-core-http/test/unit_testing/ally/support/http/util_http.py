@@ -0,0 +1,42 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the HTTP utilities.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.support.http.util_http import chunkedGenerator
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestUtilHTTP(unittest.TestCase):
+
+    def testChunked(self):
+        content = b''.join(chunkedGenerator((b'Hello', b' ', b'world of chunks!')))
+        self.assertEqual(content, b'5\r\nHello\r\n1\r\n \r\n10\r\nworld of chunks!\r\n0\r\n\r\n')
+
+    def testChunkedEmpty(self):
+        self.assertEqual(list(chunkedGenerator(())), [b'0\r\n\r\n'])
+        # The empty chunks are not sent since they would mark the end of the content.
+        self.assertEqual(list(chunkedGenerator((b'', b'a', b''))), [b'1\r\na\r\n', b'0\r\n\r\n'])
+
+    def testChunkedLarge(self):
+        chunk = b'x' * 4096
+        content = b''.join(chunkedGenerator(iter((chunk,))))
+        self.assertEqual(content, b'1000\r\n' + chunk + b'\r\n0\r\n\r\n')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
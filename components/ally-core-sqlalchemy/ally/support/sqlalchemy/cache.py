@@ -0,0 +1,226 @@
+'''
+Created on Jan 15, 2013
+
+@package: ally core sql alchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the process local cache for mapped entities.
+'''
+
+from ally.api.operator.type import TypeModel
+from ally.api.type import typeFor
+from ally.support.sqlalchemy.mapper import addInsertListener, addUpdateListener, \
+    MappedSupport
+from collections import OrderedDict
+from inspect import isclass
+from sqlalchemy import event
+from sqlalchemy.orm.session import Session, object_session
+from threading import Lock
+import time
+
+# --------------------------------------------------------------------
+
+class EntityCache:
+    '''
+    Provides a cache of entity snapshots indexed by id, bounded by size with the least recently used entities evicted
+    first and with the entities expiring after a time out. The snapshots are API model objects detached from any
+    session, the cached entities are invalidated whenever they are inserted or updated through the mapper and again
+    after the session that changed them is committed or rolled back. A snapshot is cached only if the entity did not
+    change since the version obtained before reading it, this way a snapshot read from an uncommitted state or read
+    before a commit is never cached.
+    '''
+
+    def __init__(self, mapped, size, timeOut):
+        '''
+        Construct the entity cache.
+
+        @param mapped: class
+            The mapped class of the cached entities.
+        @param size: integer
+            The maximum number of entities to be cached.
+        @param timeOut: integer|float
+            The number of seconds after which a cached entity expires.
+        '''
+        assert isclass(mapped), 'Invalid class %s' % mapped
+        assert isinstance(mapped, MappedSupport), 'Invalid mapped class %s' % mapped
+        assert isinstance(size, int) and size > 0, 'Invalid size %s' % size
+        assert isinstance(timeOut, (int, float)) and timeOut > 0, 'Invalid time out %s' % timeOut
+        modelType = typeFor(mapped)
+        assert isinstance(modelType, TypeModel), 'Invalid mapped class %s' % mapped
+
+        self.size = size
+        self.timeOut = timeOut
+        self.hits = self.misses = 0
+
+        self._nameId = modelType.container.propertyId
+        self._entities = OrderedDict()
+        self._version = 0
+        self._changes = OrderedDict()
+        self._changesFloor = 0
+        self._lock = Lock()
+
+        addInsertListener(mapped, self._onChange, False)
+        addUpdateListener(mapped, self._onChange, False)
+
+    def get(self, id):
+        '''
+        Provides the cached snapshot for the id.
+
+        @param id: object
+            The id of the entity.
+        @return: object|None
+            The cached snapshot or None if there is no valid snapshot for the id.
+        '''
+        with self._lock:
+            entry = self._entities.get(id)
+            if entry is not None:
+                snapshot, expires = entry
+                if expires > time.time():
+                    self._entities.move_to_end(id)
+                    self.hits += 1
+                    return snapshot
+                del self._entities[id]
+            self.misses += 1
+
+    def version(self):
+        '''
+        Provides the current version of the cache, the version needs to be obtained before reading the entities that
+        are going to be put in the cache.
+
+        @return: integer
+            The current version.
+        '''
+        with self._lock: return self._version
+
+    def put(self, id, snapshot, version):
+        '''
+        Caches the snapshot for the id, if the entity did not change since the provided version.
+
+        @param id: object
+            The id of the entity.
+        @param snapshot: object
+            The snapshot to be cached, the snapshot is not allowed to be changed afterwards.
+        @param version: integer
+            The version as provided by @see: version before the entity has been read.
+        @return: boolean
+            True if the snapshot has been cached, False otherwise.
+        '''
+        assert isinstance(version, int), 'Invalid version %s' % version
+        with self._lock:
+            if self._changes.get(id, self._changesFloor) > version: return False
+            self._entities[id] = (snapshot, time.time() + self.timeOut)
+            self._entities.move_to_end(id)
+            while len(self._entities) > self.size: self._entities.popitem(last=False)
+            return True
+
+    def invalidate(self, id, session=None):
+        '''
+        Removes the cached snapshot for the id.
+
+        @param id: object
+            The id of the entity.
+        @param session: Session|None
+            The session that changed the entity, if provided the snapshot is invalidated again after the session is
+            committed or rolled back.
+        '''
+        with self._lock:
+            self._entities.pop(id, None)
+            self._version += 1
+            self._changes[id] = self._version
+            self._changes.move_to_end(id)
+            # The changes for which the version is not kept anymore are considered to be at the floor version.
+            while len(self._changes) > self.size: _id, self._changesFloor = self._changes.popitem(last=False)
+
+        if session is not None:
+            assert isinstance(session, Session), 'Invalid session %s' % session
+            try: changes = session._ally_cache_changes
+            except AttributeError:
+                changes = session._ally_cache_changes = set()
+                event.listen(session, 'after_commit', onSessionEnd)
+                event.listen(session, 'after_rollback', onSessionEnd)
+            changes.add((self, id))
+
+    def clear(self):
+        '''
+        Removes all the cached snapshots.
+        '''
+        with self._lock: self._entities.clear()
+
+    def hitRate(self):
+        '''
+        Provides the hit rate of the cache.
+
+        @return: float
+            The ratio of the hits from all the cache lookups, 0 if there are no lookups.
+        '''
+        with self._lock:
+            total = self.hits + self.misses
+            if total: return self.hits / total
+            return 0.0
+
+    # ----------------------------------------------------------------
+
+    def _onChange(self, entity):
+        '''
+        Invalidates the changed entity.
+        '''
+        self.invalidate(getattr(entity, self._nameId), object_session(entity))
+
+# --------------------------------------------------------------------
+
+_caches = {}
+# The entity caches indexed by the mapped class.
+_cachesLock = Lock()
+# The lock used for creating the entity caches.
+
+def cacheFor(mapped, size, timeOut):
+    '''
+    Provides the entity cache for the mapped class, the cache is created if there is not one already, the size and
+    time out of the first created cache are kept.
+
+    @param mapped: class
+        The mapped class to provide the cache for.
+    @param size: integer
+        The maximum number of entities to be cached.
+    @param timeOut: integer|float
+        The number of seconds after which a cached entity expires.
+    @return: EntityCache
+        The entity cache for the mapped class.
+    '''
+    with _cachesLock:
+        cache = _caches.get(mapped)
+        if cache is None: cache = _caches[mapped] = EntityCache(mapped, size, timeOut)
+    return cache
+
+def invalidateFor(mapped, id, session=None):
+    '''
+    Invalidates the entity for the id in the mapped class cache, if there is a cache for the mapped class.
+
+    @param mapped: class
+        The mapped class to invalidate the entity for.
+    @param id: object
+        The id of the entity to invalidate.
+    @param session: Session|None
+        The session that changed the entity, if provided the entity is invalidated again after the session is committed
+        or rolled back.
+    '''
+    cache = _caches.get(mapped)
+    if cache is not None:
+        assert isinstance(cache, EntityCache)
+        cache.invalidate(id, session)
+
+# --------------------------------------------------------------------
+
+def onSessionEnd(session):
+    '''
+    Invalidates again the entities changed by the ended session, a snapshot of the entity might have been cached from
+    the state before the commit.
+    '''
+    changes = session._ally_cache_changes
+    assert isinstance(changes, set)
+    while changes:
+        cache, id = changes.pop()
+        assert isinstance(cache, EntityCache)
+        cache.invalidate(id)
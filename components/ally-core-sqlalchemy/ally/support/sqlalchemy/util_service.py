@@ -11,15 +11,32 @@ Provides utility methods for SQL alchemy service implementations.
 
 from ally.api.criteria import AsLike, AsOrdered, AsBoolean, AsEqual, AsDate, \
     AsTime, AsDateTime, AsRange
+from ally.api.operator.type import TypeQuery
 from ally.api.type import typeFor
 from ally.exception import InputError, Ref
 from ally.internationalization import _
-from ally.support.api.util_service import namesForQuery
 from ally.support.sqlalchemy.mapper import mappingFor
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime, date, time
+from decimal import Decimal
 from itertools import chain
 from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.attributes import instance_state
 from sqlalchemy.orm.mapper import Mapper
 from sqlalchemy.orm.properties import ColumnProperty
+from sqlalchemy.sql.expression import func, and_, or_
+import binascii
+import json
+
+# --------------------------------------------------------------------
+
+COUNT_OVER_VERSIONS = {'postgresql': (8, 4), 'oracle': (8,), 'mssql': (9,), 'sqlite': (3, 25), 'mysql': (8,)}
+# The minimum database server versions, indexed by dialect name, that support the window COUNT(*) OVER ().
+
+CURSOR_FORMATS = {datetime: ('datetime', '%Y-%m-%d %H:%M:%S.%f'), date: ('date', '%Y-%m-%d'),
+                  time: ('time', '%H:%M:%S.%f')}
+# The formats used for encoding the temporal values in cursors, indexed by the value class.
 
 # --------------------------------------------------------------------
 
@@ -48,6 +65,228 @@ def buildLimits(sqlQuery, offset=None, limit=None):
     if limit is not None: sqlQuery = sqlQuery.limit(limit)
     return sqlQuery
 
+def buildLoading(sqlQuery, mapped, properties):
+    '''
+    Builds the columns loading on the SQL alchemy query, the mapped columns that are not for the provided properties are
+    deferred, the primary key columns are always loaded. The loaded entities need to be detached with
+    @see: detachLoading.
+    
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to use.
+    @param mapped: class
+        The mapped model class to load the columns for.
+    @param properties: set(string)|frozenset(string)
+        The names of the mapped properties to be loaded.
+    '''
+    assert isinstance(properties, (set, frozenset)), 'Invalid properties %s' % properties
+    mapper = mappingFor(mapped)
+    assert isinstance(mapper, Mapper)
+
+    deferred = []
+    for cp in mapper.iterate_properties:
+        if not isinstance(cp, ColumnProperty) or cp.key in properties: continue
+        if any(column.primary_key for column in cp.columns): continue
+        deferred.append(defer(getattr(mapped, cp.key)))
+    if deferred: sqlQuery = sqlQuery.options(*deferred)
+    return sqlQuery
+
+def detachLoading(session, mapped, entities):
+    '''
+    Detaches from the session the entities that have mapped columns that are not loaded, the partially loaded entities
+    are not provided anymore by the session to other queries and are not cached by the session.
+    
+    @param session: Session
+        The sql alchemy session that loaded the entities.
+    @param mapped: class
+        The mapped model class of the entities.
+    @param entities: Iterable
+        The entities loaded with @see: buildLoading.
+    '''
+    mapper = mappingFor(mapped)
+    assert isinstance(mapper, Mapper)
+
+    keys = set(cp.key for cp in mapper.iterate_properties if isinstance(cp, ColumnProperty))
+    for entity in entities:
+        if keys.intersection(instance_state(entity).unloaded): session.expunge(entity)
+
+def isCountOver(sqlQuery):
+    '''
+    Checks if the database of the SQL alchemy query supports the window COUNT(*) OVER (). The server version is known
+    only after the first connection so until then the window count is not considered supported.
+    
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to check.
+    @return: boolean
+        True if the window count can be used with the query.
+    '''
+    bind = sqlQuery.session.bind if sqlQuery.session else None
+    if bind is None: return False
+    version = COUNT_OVER_VERSIONS.get(bind.dialect.name)
+    if version is None or bind.dialect.server_version_info is None: return False
+    return tuple(bind.dialect.server_version_info[:len(version)]) >= version
+
+def buildAllWithCount(sqlQuery, offset=None, limit=None):
+    '''
+    Provides the limited elements of the SQL alchemy query and the total count of the query elements. If the database
+    supports it the elements and the total count are fetched in a single statement using COUNT(*) OVER (), otherwise
+    a separate count query is used.
+    
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to use, the query needs to be for a single entity.
+    @param offset: integer|None
+        The offset to fetch elements from.
+    @param limit: integer|None
+        The limit of elements to get.
+    @return: tuple(list, integer)
+        The list of the limited elements and the count of the total elements.
+    '''
+    if limit == 0: return [], sqlQuery.count()
+    if not isCountOver(sqlQuery): return buildLimits(sqlQuery, offset, limit).all(), sqlQuery.count()
+
+    rows = buildLimits(sqlQuery.add_columns(func.count().over()), offset, limit).all()
+    if rows: return [row[0] for row in rows], rows[0][-1]
+    # If the offset is past the last element there are no rows to provide the total.
+    if offset: return [], sqlQuery.count()
+    return [], 0
+
+def buildAllWithCursor(sqlQuery, ordering, limit=None, cursor=None):
+    '''
+    Provides the limited elements of the SQL alchemy query using keyset (seek) pagination, instead of skipping an offset
+    of rows the elements are fetched after the ordered values of the last element from the previous page. The cursor
+    is opaque for the client and it also contains the offset of the page and the total count calculated with the first
+    page, so the following pages need no count query.
+    
+    @param sqlQuery: SQL alchemy
+        The sql alchemy query to use, the query needs to be for a single entity, any ordering of the query is replaced
+        by the provided ordering.
+    @param ordering: list[tuple(string, Column, boolean)]
+        The ordering as provided by @see: orderingFor.
+    @param limit: integer|None
+        The limit of elements to get.
+    @param cursor: string|None
+        The cursor provided by a previous page, if None the first page is provided.
+    @return: tuple(list, integer, integer, string|None)
+        The list of the limited elements, the count of the total elements, the offset of the elements and the cursor
+        for the next page, the cursor is None if there is no next page or the ordering contains nullable columns.
+    @raise InputError: If the cursor is not valid for the ordering.
+    '''
+    assert isinstance(ordering, list) and ordering, 'Invalid ordering %s' % ordering
+    signature = ','.join('%s%s' % (name, '' if asc else '-') for name, _column, asc in ordering)
+    sqlQuery = sqlQuery.order_by(None).order_by(*(column if asc else column.desc() for _name, column, asc in ordering))
+    # The seek conditions exclude the null values and the position of the nulls in the ordering depends on the database,
+    # so no cursor is provided if an ordered column is nullable.
+    seekable = not any(getattr(column, 'nullable', True) for _name, column, _asc in ordering)
+
+    if cursor is None: offset, total = 0, None
+    elif not seekable: raise InputError(Ref(_('Invalid cursor'),))
+    else:
+        values, offset, total = decodeCursor(cursor, signature, len(ordering))
+        conditions = []
+        for k, (_name, column, asc) in enumerate(ordering):
+            equals = [ordered[1] == value for ordered, value in zip(ordering[:k], values[:k])]
+            equals.append(column > values[k] if asc else column < values[k])
+            conditions.append(and_(*equals))
+        sqlQuery = sqlQuery.filter(or_(*conditions))
+
+    if total is None: entities, total = buildAllWithCount(sqlQuery, None, limit)
+    elif limit == 0: entities = []
+    else: entities = buildLimits(sqlQuery, None, limit).all()
+
+    if not seekable or not limit or len(entities) < limit or offset + limit >= total: return entities, total, offset, None
+    values = [getattr(entities[-1], name) for name, _column, _asc in ordering]
+    return entities, total, offset, encodeCursor(values, signature, offset + limit, total)
+
+def encodeCursor(values, signature, offset, total):
+    '''
+    Encodes the opaque cursor.
+    
+    @param values: list[object]
+        The ordered values of the last element.
+    @param signature: string
+        The signature of the ordering the values are for.
+    @param offset: integer
+        The offset of the next page.
+    @param total: integer
+        The total count of elements.
+    @return: string
+        The opaque cursor.
+    '''
+    assert isinstance(values, list), 'Invalid values %s' % values
+    encoded = []
+    for value in values:
+        for clazz, (tag, format) in CURSOR_FORMATS.items():
+            if value.__class__ is clazz:
+                encoded.append([tag, value.strftime(format)])
+                break
+        else:
+            if isinstance(value, Decimal): encoded.append(['decimal', str(value)])
+            else: encoded.append(value)
+    content = json.dumps([signature, encoded, offset, total], separators=(',', ':'))
+    return urlsafe_b64encode(content.encode('utf8')).decode('ascii')
+
+def decodeCursor(cursor, signature, count):
+    '''
+    Decodes the opaque cursor.
+    
+    @param cursor: string
+        The cursor to decode.
+    @param signature: string
+        The signature of the ordering the cursor needs to be for.
+    @param count: integer
+        The number of ordered values the cursor needs to contain.
+    @return: tuple(list[object], integer, integer)
+        The ordered values, the offset and the total count.
+    @raise InputError: If the cursor is not valid for the ordering.
+    '''
+    assert isinstance(cursor, str), 'Invalid cursor %s' % cursor
+    formats = {tag: (clazz, format) for clazz, (tag, format) in CURSOR_FORMATS.items()}
+    try:
+        signatureCursor, encoded, offset, total = json.loads(urlsafe_b64decode(cursor.encode('ascii')).decode('utf8'))
+        if signatureCursor != signature or len(encoded) != count: raise ValueError('Invalid cursor')
+        if not isinstance(offset, int) or not isinstance(total, int): raise ValueError('Invalid cursor')
+        values = []
+        for value in encoded:
+            if isinstance(value, list):
+                tag, value = value
+                if tag == 'decimal': value = Decimal(value)
+                else:
+                    clazz, format = formats[tag]
+                    value = datetime.strptime(value, format)
+                    if clazz is date: value = value.date()
+                    elif clazz is time: value = value.time()
+            values.append(value)
+    except (ValueError, TypeError, KeyError, UnicodeError, binascii.Error):
+        raise InputError(Ref(_('Invalid cursor'),))
+    return values, offset, total
+
+def orderingFor(query, mapped):
+    '''
+    Provides the ordering of the SQL alchemy columns for the active ordered criteria of the query, in the same order as
+    applied by @see: buildQuery, followed by the primary key columns in order to have a total ordering.
+    
+    @param query: query|None
+        The REST query object to provide the ordering for.
+    @param mapped: class
+        The mapped model class to use the query on.
+    @return: list[tuple(string, Column, boolean)]
+        The ordering as a list of tuples containing the mapped attribute name, the column and True for ascending.
+    '''
+    mapper = mappingFor(mapped)
+    assert isinstance(mapper, Mapper)
+
+    ordering, names = [], set()
+    if query is not None:
+        for name, column, asc in orderedFor(query, builderFor(query.__class__, mapped)):
+            if name not in names:
+                names.add(name)
+                ordering.append((name, column, bool(asc)))
+    for column in mapper.primary_key:
+        name = mapper.get_property_by_column(column).key
+        if name not in names:
+            names.add(name)
+            ordering.append((name, getattr(mapper.c, name), True))
+    return ordering
+
 def buildQuery(sqlQuery, query, mapped):
     '''
     Builds the query on the SQL alchemy query.
@@ -60,49 +299,114 @@ def buildQuery(sqlQuery, query, mapped):
         The mapped model class to use the query on.
     '''
     assert query is not None, 'A query object is required'
-    clazz = query.__class__
+    builder = builderFor(query.__class__, mapped)
+
+    for descriptor, criteria, _name, column, filter, _isOrdered in builder:
+        if filter is not None and descriptor.__contained__(query):
+            sqlQuery = filter(sqlQuery, column, getattr(query, criteria))
+
+    ordering = [column if asc else column.desc() for _name, column, asc in orderedFor(query, builder)]
+    if ordering: sqlQuery = sqlQuery.order_by(*ordering)
+    return sqlQuery
+
+# --------------------------------------------------------------------
+
+_builders = {}
+# The compiled query builders indexed by the mapped class and query class.
+
+def builderFor(clazz, mapped):
+    '''
+    Provides the compiled builder for the query class and mapped class, the builder is compiled only once.
+    
+    @param clazz: class
+        The query class to provide the builder for.
+    @param mapped: class
+        The mapped model class to use the query on.
+    @return: tuple(tuple(IContained, string, string, Column, callable|None, boolean))
+        The builder entries for the criteria's that have a mapped column, each entry contains the criteria descriptor,
+        the criteria name, the mapped attribute name, the column, the filter function and True if the criteria is ordered.
+    '''
+    builder = _builders.get((mapped, clazz))
+    if builder is None:
+        mapper = mappingFor(mapped)
+        assert isinstance(mapper, Mapper)
+        queryType = typeFor(clazz)
+        assert isinstance(queryType, TypeQuery), 'Invalid query class %s' % clazz
 
+        properties = {cp.key.lower(): cp.key for cp in mapper.iterate_properties if isinstance(cp, ColumnProperty)}
+        entries = []
+        for criteria, criteriaClass in queryType.query.criterias.items():
+            name = properties.get(criteria.lower())
+            if name is None: continue
+
+            if issubclass(criteriaClass, AsBoolean): filter = filterBoolean
+            elif issubclass(criteriaClass, AsLike): filter = filterLike
+            elif issubclass(criteriaClass, AsEqual): filter = filterEqual
+            elif issubclass(criteriaClass, (AsDate, AsTime, AsDateTime, AsRange)): filter = filterRange
+            else: filter = None
+
+            entries.append((getattr(clazz, criteria), criteria, name, getattr(mapper.c, name), filter,
+                            issubclass(criteriaClass, AsOrdered)))
+        builder = _builders[(mapped, clazz)] = tuple(entries)
+    return builder
+
+def orderedFor(query, builder):
+    '''
+    Provides the ordering for the active ordered criteria of the query, the criteria's with a priority come first sorted
+    by priority followed by the ones without priority.
+    
+    @param query: query
+        The REST query object to provide the ordering for.
+    @param builder: tuple
+        The compiled builder as provided by @see: builderFor.
+    @return: list[tuple(string, Column, boolean)]
+        The ordering as a list of tuples containing the mapped attribute name, the column and True for ascending.
+    '''
     ordered, unordered = [], []
-    mapper = mappingFor(mapped)
-    assert isinstance(mapper, Mapper)
+    for descriptor, criteria, name, column, _filter, isOrdered in builder:
+        if not isOrdered or not descriptor.__contained__(query): continue
+        crt = getattr(query, criteria)
+        assert isinstance(crt, AsOrdered)
+        if AsOrdered.ascending in crt:
+            if AsOrdered.priority in crt and crt.priority: ordered.append((crt.priority, name, column, crt.ascending))
+            else: unordered.append((None, name, column, crt.ascending))
+
+    ordered.sort(key=lambda pack: pack[0])
+    return [(name, column, asc) for _priority, name, column, asc in chain(ordered, unordered)]
 
-    properties = {cp.key.lower(): getattr(mapper.c, cp.key)
-                  for cp in mapper.iterate_properties if isinstance(cp, ColumnProperty)}
-
-    for criteria in namesForQuery(clazz):
-        column = properties.get(criteria.lower())
-        if column is not None and getattr(clazz, criteria) in query:
-
-            crt = getattr(query, criteria)
-            if isinstance(crt, AsBoolean):
-                assert isinstance(crt, AsBoolean)
-                if AsBoolean.value in crt:
-                    sqlQuery = sqlQuery.filter(column == crt.value)
-            elif isinstance(crt, AsLike):
-                assert isinstance(crt, AsLike)
-                if AsLike.like in crt: sqlQuery = sqlQuery.filter(column.like(crt.like))
-                elif AsLike.ilike in crt: sqlQuery = sqlQuery.filter(column.ilike(crt.ilike))
-            elif isinstance(crt, AsEqual):
-                assert isinstance(crt, AsEqual)
-                if AsEqual.equal in crt:
-                    sqlQuery = sqlQuery.filter(column == crt.equal)
-            elif isinstance(crt, (AsDate, AsTime, AsDateTime, AsRange)):
-                if crt.__class__.start in crt: sqlQuery = sqlQuery.filter(column >= crt.start)
-                elif crt.__class__.until in crt: sqlQuery = sqlQuery.filter(column < crt.until)
-                if crt.__class__.end in crt: sqlQuery = sqlQuery.filter(column <= crt.end)
-                elif crt.__class__.since in crt: sqlQuery = sqlQuery.filter(column > crt.since)
-
-            if isinstance(crt, AsOrdered):
-                assert isinstance(crt, AsOrdered)
-                if AsOrdered.ascending in crt:
-                    if AsOrdered.priority in crt and crt.priority:
-                        ordered.append((column, crt.ascending, crt.priority))
-                    else:
-                        unordered.append((column, crt.ascending, None))
-
-            ordered.sort(key=lambda pack: pack[2])
-            for column, asc, __ in chain(ordered, unordered):
-                if asc: sqlQuery = sqlQuery.order_by(column)
-                else: sqlQuery = sqlQuery.order_by(column.desc())
+# --------------------------------------------------------------------
 
+def filterBoolean(sqlQuery, column, crt):
+    '''
+    Filters the SQL alchemy query for the boolean criteria.
+    '''
+    assert isinstance(crt, AsBoolean)
+    if AsBoolean.value in crt: sqlQuery = sqlQuery.filter(column == crt.value)
+    return sqlQuery
+
+def filterLike(sqlQuery, column, crt):
+    '''
+    Filters the SQL alchemy query for the like criteria.
+    '''
+    assert isinstance(crt, AsLike)
+    if AsLike.like in crt: sqlQuery = sqlQuery.filter(column.like(crt.like))
+    elif AsLike.ilike in crt: sqlQuery = sqlQuery.filter(column.ilike(crt.ilike))
+    return sqlQuery
+
+def filterEqual(sqlQuery, column, crt):
+    '''
+    Filters the SQL alchemy query for the equal criteria.
+    '''
+    assert isinstance(crt, AsEqual)
+    if AsEqual.equal in crt: sqlQuery = sqlQuery.filter(column == crt.equal)
+    return sqlQuery
+
+def filterRange(sqlQuery, column, crt):
+    '''
+    Filters the SQL alchemy query for the date, time, date time and range criteria.
+    '''
+    if crt.__class__.start in crt: sqlQuery = sqlQuery.filter(column >= crt.start)
+    elif crt.__class__.until in crt: sqlQuery = sqlQuery.filter(column < crt.until)
+    if crt.__class__.end in crt: sqlQuery = sqlQuery.filter(column <= crt.end)
+    elif crt.__class__.since in crt: sqlQuery = sqlQuery.filter(column > crt.since)
     return sqlQuery
@@ -0,0 +1,114 @@
+'''
+Created on Jan 15, 2013
+
+@package: ally core sql alchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the sql alchemy entity cache.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.support.sqlalchemy.cache import EntityCache
+from ally.support.sqlalchemy.mapper import validate, DeclarativeMetaModel
+from sqlalchemy.engine import create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm.session import sessionmaker
+from sqlalchemy.schema import MetaData, Column
+from sqlalchemy.types import String, Integer
+import unittest
+
+# --------------------------------------------------------------------
+
+meta = MetaData()
+
+# --------------------------------------------------------------------
+
+Base = declarative_base(metadata=meta, metaclass=DeclarativeMetaModel)
+
+@model(id='Id')
+class Item:
+    '''
+    Provides the item model.
+    '''
+    Id = int
+    Name = str
+
+@validate
+class ItemMapped(Base, Item):
+    '''
+    Provides the mapping for Item entity.
+    '''
+    __tablename__ = 'item'
+
+    Id = Column('id', Integer, primary_key=True)
+    Name = Column('name', String(20))
+
+# --------------------------------------------------------------------
+
+class TestEntityCache(unittest.TestCase):
+
+    def testCache(self):
+        engine = create_engine('sqlite:///:memory:')
+        meta.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        for k in range(3): session.add(ItemMapped(Name='item %s' % k))
+        session.flush()
+
+        cache = EntityCache(ItemMapped, 2, 60)
+        self.assertIsNone(cache.get(1))
+        for id in (1, 2, 3): cache.put(id, id, cache.version())
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(2), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        self.assertEqual(cache.hitRate(), 1 / 3)
+
+        session.query(ItemMapped).get(2).Name = 'changed'
+        session.flush()
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), 3)
+
+        cache.timeOut = -1
+        cache.put(3, 3, cache.version())
+        self.assertIsNone(cache.get(3))
+        session.close()
+
+    def testCacheCommit(self):
+        engine = create_engine('sqlite:///:memory:')
+        meta.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        session.add(ItemMapped(Name='item'))
+        session.commit()
+
+        cache = EntityCache(ItemMapped, 2, 60)
+        version = cache.version()
+        session.query(ItemMapped).get(1).Name = 'changed'
+        session.flush()
+        # A snapshot read before the change is not cached.
+        self.assertFalse(cache.put(1, 'stale', version))
+
+        # A snapshot of the committed state read while the change is pending is removed on commit.
+        self.assertTrue(cache.put(1, 'stale', cache.version()))
+        session.commit()
+        self.assertIsNone(cache.get(1))
+        self.assertTrue(cache.put(1, 'changed', cache.version()))
+        self.assertEqual(cache.get(1), 'changed')
+
+        # The versions of the evicted changes are still considered.
+        version = cache.version()
+        for id in (2, 3, 4): cache.invalidate(id)
+        self.assertFalse(cache.put(5, 5, version))
+        session.close()
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
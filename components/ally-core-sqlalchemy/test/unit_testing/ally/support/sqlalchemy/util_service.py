@@ -0,0 +1,171 @@
+'''
+Created on Dec 12, 2012
+
+@package: ally core sql alchemy
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the sql alchemy service utilities.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model, query
+from ally.api.criteria import AsLikeOrdered, AsRangeOrdered
+from ally.exception import InputError
+from ally.support.sqlalchemy import util_service
+from ally.support.sqlalchemy.mapper import validate, DeclarativeMetaModel
+from ally.support.sqlalchemy.util_service import buildAllWithCount, isCountOver, \
+    buildAllWithCursor, orderingFor, buildQuery, buildLoading, detachLoading
+from sqlalchemy.engine import create_engine
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm.session import sessionmaker
+from sqlalchemy.schema import MetaData, Column
+from sqlalchemy.types import String, Integer
+import sqlite3
+import unittest
+
+# --------------------------------------------------------------------
+
+meta = MetaData()
+
+# --------------------------------------------------------------------
+
+Base = declarative_base(metadata=meta, metaclass=DeclarativeMetaModel)
+
+@model(id='Id')
+class Item:
+    '''
+    Provides the item model.
+    '''
+    Id = int
+    Name = str
+    Note = str
+
+@query(Item)
+class QItem:
+    '''
+    Provides the item query.
+    '''
+    id = AsRangeOrdered
+    name = AsLikeOrdered
+    note = AsLikeOrdered
+
+@validate
+class ItemMapped(Base, Item):
+    '''
+    Provides the mapping for Item entity.
+    '''
+    __tablename__ = 'item'
+
+    Id = Column('id', Integer, primary_key=True)
+    Name = Column('name', String(20), nullable=False)
+    Note = Column('note', String(20))
+
+# --------------------------------------------------------------------
+
+class TestUtilService(unittest.TestCase):
+
+    def setUp(self):
+        engine = create_engine('sqlite:///:memory:')
+        meta.create_all(engine)
+        self.session = sessionmaker(bind=engine)()
+        for k in range(10): self.session.add(ItemMapped(Name='item %s' % (k % 4)))
+        self.session.flush()
+
+    def tearDown(self):
+        self.session.close()
+
+    def assertAllWithCount(self):
+        sql = self.session.query(ItemMapped).filter(ItemMapped.Id > 2).order_by(ItemMapped.Id)
+
+        items, total = buildAllWithCount(sql, 2, 3)
+        self.assertEqual([item.Id for item in items], [5, 6, 7])
+        self.assertEqual(total, 8)
+
+        items, total = buildAllWithCount(sql)
+        self.assertEqual(len(items), 8)
+        self.assertEqual(total, 8)
+
+        self.assertEqual(buildAllWithCount(sql, 20, 3), ([], 8))
+        self.assertEqual(buildAllWithCount(sql, 2, 0), ([], 8))
+        self.assertEqual(buildAllWithCount(sql.filter(ItemMapped.Id > 20)), ([], 0))
+
+    def testAllWithCount(self):
+        self.assertEqual(isCountOver(self.session.query(ItemMapped)), sqlite3.sqlite_version_info >= (3, 25))
+        self.assertAllWithCount()
+
+    def testAllWithCountFallback(self):
+        versions = util_service.COUNT_OVER_VERSIONS
+        util_service.COUNT_OVER_VERSIONS = {}
+        try:
+            self.assertFalse(isCountOver(self.session.query(ItemMapped)))
+            self.assertAllWithCount()
+        finally: util_service.COUNT_OVER_VERSIONS = versions
+
+    def testBuildQuery(self):
+        q = QItem()
+        q.name.orderAsc()
+        q.name.priority = 2
+        q.id.orderDesc()
+        q.id.priority = 1
+        items = buildQuery(self.session.query(ItemMapped), q, ItemMapped).all()
+        self.assertEqual([item.Id for item in items], list(range(10, 0, -1)))
+
+        q.name.like = 'item 1%'
+        items = buildQuery(self.session.query(ItemMapped), q, ItemMapped).all()
+        self.assertEqual([item.Id for item in items], [10, 6, 2])
+
+    def testLoading(self):
+        self.session.expunge_all()
+        items = buildLoading(self.session.query(ItemMapped), ItemMapped, {'Id'}).all()
+        self.assertEqual(len(items), 10)
+        self.assertTrue(all(ItemMapped.Id in item and ItemMapped.Name not in item for item in items))
+
+        detachLoading(self.session, ItemMapped, items)
+        self.assertFalse(any(item in self.session for item in items))
+        items = self.session.query(ItemMapped).all()
+        self.assertTrue(all(ItemMapped.Name in item for item in items))
+
+    def testAllWithCursor(self):
+        q = QItem()
+        q.name.orderDesc()
+        ordering = orderingFor(q, ItemMapped)
+        self.assertEqual([(name, asc) for name, _column, asc in ordering], [('Name', False), ('Id', True)])
+
+        sql, ids, offsets, cursor = self.session.query(ItemMapped).filter(ItemMapped.Id > 1), [], [], None
+        while True:
+            items, total, offset, cursor = buildAllWithCursor(sql, ordering, 3, cursor)
+            self.assertEqual(total, 9)
+            ids.extend(item.Id for item in items)
+            offsets.append(offset)
+            if cursor is None: break
+        self.assertEqual(ids, [4, 8, 3, 7, 2, 6, 10, 5, 9])
+        self.assertEqual(offsets, [0, 3, 6])
+
+        self.assertRaises(InputError, buildAllWithCursor, sql, ordering, 3, 'invalid')
+        _items, _total, _offset, cursor = buildAllWithCursor(sql, ordering, 3)
+        self.assertRaises(InputError, buildAllWithCursor, sql, orderingFor(None, ItemMapped), 3, cursor)
+
+    def testAllWithCursorNullable(self):
+        q = QItem()
+        q.note.orderAsc()
+        ordering = orderingFor(q, ItemMapped)
+        sql = self.session.query(ItemMapped)
+
+        items, total, offset, cursor = buildAllWithCursor(sql, ordering, 3)
+        self.assertEqual((len(items), total, offset, cursor), (3, 10, 0, None))
+        _items, _total, _offset, cursor = buildAllWithCursor(sql, orderingFor(None, ItemMapped), 3)
+        self.assertIsNotNone(cursor)
+        self.assertRaises(InputError, buildAllWithCursor, sql, ordering, 3, cursor)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__':
+    unittest.main()
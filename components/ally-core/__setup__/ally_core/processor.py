@@ -46,7 +46,13 @@ def explain_detailed_error():
 
 @ioc.config
 def allow_chuncked_response():
-    '''Flag indicating that a chuncked transfer is allowed, more or less if this is false a length is a must'''
+    '''
+    Flag indicating that a chuncked transfer is allowed, more or less if this is false a length is a must. If True the
+    encoded responses are streamed while rendering, the server needs to frame them using the HTTP/1.1 chunked transfer
+    encoding, this is why only the servers that know how to do this will enable it when not configured.
+    An error that occurs while rendering a streamed response drops the connection since the status is already sent.
+    In debug mode (not optimized) the responses are still fully rendered before sending in order to detect errors
+    '''
     return False
 
 @ioc.config
@@ -12,7 +12,7 @@ Provides the call assemblers used in constructing the resources node.
 from ally.api.config import GET, DELETE, INSERT, UPDATE
 from ally.api.operator.container import Model
 from ally.api.operator.type import TypeService, TypeModel, TypeModelProperty
-from ally.api.type import Iter, typeFor, Input
+from ally.api.type import Iter, typeFor, Input, List
 from ally.container.ioc import injected
 from ally.core.impl.invoker import InvokerRestructuring
 from ally.core.impl.node import NodePath, NodeProperty, NodeRoot
@@ -475,9 +475,9 @@ class AssembleInsert(AssembleOneByOne):
     '''
     Resolving the INSERT method invokers.
     Method signature needs to be flagged with INSERT and look like:
-    TheEntity|TheEnity.Property (usually the unique id property)
+    TheEntity|TheEnity.Property (usually the unique id property)|Iter(TheEnity.Property) (for bulk inserts)
     %
-    ([...AnyEntity.Property], [TheEntity])
+    ([...AnyEntity.Property], [TheEntity|List(TheEntity)])
     !!!Attention the order of the mandatory arguments is crucial since based on that the call is placed in the REST
     Node tree.
     '''
@@ -492,6 +492,7 @@ class AssembleInsert(AssembleOneByOne):
         if invoker.method != INSERT: return False
 
         typ = invoker.output
+        if isinstance(typ, Iter): typ = typ.itemType
         if isinstance(typ, (TypeModel, TypeModelProperty)):
             model = typ.container
         else:
@@ -526,7 +527,7 @@ class AssembleUpdate(AssembleOneByOne):
     Method signature needs to be flagged with UPDATE and look like:
     boolean
     %
-    ([...AnyEntity.Property], [TheEntity])
+    ([...AnyEntity.Property], [TheEntity|List(TheEntity)])
     !!!Attention the order of the mandatory arguments is crucial since based on that the call is placed in the REST
     Node tree.
     '''
@@ -542,6 +543,9 @@ class AssembleUpdate(AssembleOneByOne):
 
         types = [inp if isinstance(inp.type, TypeModelProperty) else inp.type
                  for inp in invoker.inputs[:invoker.mandatory] if isinstance(inp.type, (TypeModelProperty, TypeModel))]
+        # The bulk updates are placed on the node of the listed model.
+        types.extend(inp.type.itemType for inp in invoker.inputs[:invoker.mandatory]
+                     if isinstance(inp.type, List) and isinstance(inp.type.itemType, TypeModel))
 
         models = [typ.container for typ in types if isinstance(typ, TypeModel)]
         if len(models) > 1:
@@ -68,10 +68,14 @@ class CreateDecoderHandler(HandlerProcessorProceed):
     Implementation for a handler that creates the decoders for the request content.
     '''
 
+    nameList = '%sList'
+    # The name used for the list of models.
+
     def __init__(self):
         '''
         Construct the decoder.
         '''
+        assert isinstance(self.nameList, str), 'Invalid name list %s' % self.nameList
         super().__init__()
 
         self._cache = WeakKeyDictionary()
@@ -92,7 +96,8 @@ class CreateDecoderHandler(HandlerProcessorProceed):
         for inp in request.invoker.inputs:
             assert isinstance(inp, Input)
 
-            if isinstance(inp.type, TypeModel):
+            if isinstance(inp.type, TypeModel) or (isinstance(inp.type, List) and
+                                                   isinstance(inp.type.itemType, TypeModel)):
                 request.decoder = self.decoderFor(inp.name, inp.type)
                 if request.decoder is not None:
                     request.decoderData = dict(target=request.arguments, converterId=request.converterId,
@@ -122,6 +127,9 @@ class CreateDecoderHandler(HandlerProcessorProceed):
             if isinstance(ofType, TypeModel):
                 assert isinstance(ofType, TypeModel)
                 decoder = self.decoderModel(ofType, obtainOnDict(argumentKey, ofType.clazz))
+            elif isinstance(ofType, List) and isinstance(ofType.itemType, TypeModel):
+                assert isinstance(ofType, List)
+                decoder = self.decoderModelList(ofType.itemType, obtainOnDict(argumentKey, list))
             else:
                 assert log.debug('Cannot decode object type \'%s\'', ofType) or True
                 return None
@@ -155,6 +163,22 @@ class CreateDecoderHandler(HandlerProcessorProceed):
 
         return exploit
 
+    def decoderModelList(self, ofType, obtain):
+        '''
+        Create a decode exploit for a list of models.
+        
+        @param ofType: TypeModel
+            The type model of the list items to decode.
+        @param obtain: callable(object) -> list
+            The obtain function to get the list of models from the target object.
+        @return: callable(**data)
+            The exploit that provides the models list decoding.
+        '''
+        assert isinstance(ofType, TypeModel), 'Invalid type model %s' % ofType
+
+        return DecodeList(self.nameList % ofType.container.name, ofType.container.name, ofType.clazz, obtain,
+                          self.decoderModel(ofType))
+
     def decoderPrimitive(self, propertyName, typeValue):
         '''
         Create a decode exploit for a primitive property also decodes primitive value list.
@@ -327,6 +351,55 @@ class DecodeObject:
         except InputError: raise
         except: handleExploitError(decodeProp)
 
+class DecodeList:
+    '''
+    Exploit for models list decoding, the path can start with the list name, followed by the model name and the index
+    of the model in the list, an index that is not provided is considered 0.
+    '''
+    __slots__ = ('name', 'nameItem', 'clazz', 'obtain', 'decoder')
+
+    def __init__(self, name, nameItem, clazz, obtain, decoder):
+        '''
+        Create a decode exploit for a list of models.
+        
+        @param name: string
+            The name of the list.
+        @param nameItem: string
+            The name of the list items.
+        @param clazz: class
+            The model class of the list items.
+        @param obtain: callable(object) -> list
+            The obtain function to get the list of models from the target object.
+        @param decoder: callable(**data)
+            The decoder for the list items, the items are provided as the target.
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert isinstance(nameItem, str), 'Invalid item name %s' % nameItem
+        assert callable(clazz), 'Invalid class %s' % clazz
+        assert callable(obtain), 'Invalid obtain %s' % obtain
+        assert callable(decoder), 'Invalid decoder %s' % decoder
+
+        self.name = name
+        self.nameItem = nameItem
+        self.clazz = clazz
+        self.obtain = obtain
+        self.decoder = decoder
+
+    def __call__(self, path, target, normalizer, **data):
+        assert isinstance(path, deque), 'Invalid path %s' % path
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+
+        if path and path[0] == normalizer.normalize(self.name): path.popleft()
+        if len(path) > 1 and path[0] == normalizer.normalize(self.nameItem): path.popleft()
+        if path and isinstance(path[0], int): index = path.popleft()
+        else: index = 0
+        if not path or index < 0: return False
+
+        items = self.obtain(target)
+        assert isinstance(items, list), 'Invalid items %s' % items
+        while len(items) <= index: items.append(self.clazz())
+        return self.decoder(path=path, target=items[index], normalizer=normalizer, **data)
+
 class DecodePrimitive:
     '''
     Exploit for primitive decoding.
@@ -296,7 +296,7 @@ class EncodeObject:
     '''
     Exploit for object encoding.
     '''
-    __slots__ = ('name', 'getter', 'properties')
+    __slots__ = ('name', 'getter', 'properties', 'compiled')
 
     def __init__(self, name, getter=None):
         '''
@@ -313,12 +313,16 @@ class EncodeObject:
         self.name = name
         self.getter = getter
         self.properties = OrderedDict()
+        self.compiled = {}
 
     def __call__(self, value, render, normalizer, name=None, **data):
         assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
         assert isinstance(render, IRender), 'Invalid render %s' % render
         assert name is None or isinstance(name, str), 'Invalid name %s' % name
 
+        encode = self.compile(name, normalizer)
+        if encode is not None: return encode(value, render, data.get('converter'), data.get('converterId'))
+
         if self.getter: value = self.getter(value)
         if value is None: return
 
@@ -329,6 +333,45 @@ class EncodeObject:
             except: handleExploitError(encodeProp)
         render.objectEnd()
 
+    def compile(self, name, normalizer):
+        '''
+        Compiles the object exploit into a function specialized for the provided name and normalizer, the compiled
+        functions are cached.
+        
+        @param name: string|None
+            The name to encode the object with, if None the object name is used.
+        @param normalizer: Normalizer
+            The normalizer to bake the names with.
+        @return: callable(value, render, converter, converterId)|None
+            The compiled encode function, None if any of the properties exploits cannot be compiled.
+        '''
+        key = (name, normalizer)
+        try: return self.compiled[key]
+        except KeyError: pass
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+
+        encoders = []
+        for nameProp, encodeProp in self.properties.items():
+            encode = compileFor(encodeProp, nameProp, normalizer)
+            if encode is None: break
+            encoders.append((encode, encodeProp))
+        else:
+            getter, nameObject = self.getter, normalizer.normalize(name or self.name)
+            def encode(value, render, converter, converterId):
+                if getter: value = getter(value)
+                if value is None: return
+
+                render.objectStart(nameObject)
+                for encodeProp, exploit in encoders:
+                    try: encodeProp(value, render, converter, converterId)
+                    except: handleExploitError(exploit)
+                render.objectEnd()
+
+            self.compiled[key] = encode
+            return encode
+
+        self.compiled[key] = None
+
 class EncodeCollection:
     '''
     Exploit for collection encoding.
@@ -374,10 +417,16 @@ class EncodeCollection:
                 if propValue is not None: attrs[normalizer.normalize(prop)] = converter.asString(propValue, propType)
         else: attrs = None
 
-        data.update(normalizer=normalizer, converter=converter, render=render, resolve=resolve)
-
         render.collectionStart(normalizer.normalize(name or self.name), attrs)
-        resolve.queueBatch(self.exploitItem, (dict(data, value=item) for item in value))
+
+        encode = compileFor(self.exploitItem, None, normalizer)
+        if encode is not None:
+            converterId = data.get('converterId')
+            def encodeItem(value, **data): encode(value, render, converter, converterId)
+            resolve.queueBatch(encodeItem, ({'value': item} for item in value))
+        else:
+            data.update(normalizer=normalizer, converter=converter, render=render, resolve=resolve)
+            resolve.queueBatch(self.exploitItem, (dict(data, value=item) for item in value))
         resolve.queue(self.finalize, render=render)
 
     def finalize(self, render, **data):
@@ -416,6 +465,27 @@ class EncodePrimitive:
         if value is None: return
         render.value(normalizer.normalize(name), converter.asString(value, self.typeValue))
 
+    def compile(self, name, normalizer):
+        '''
+        Compiles the primitive exploit into a function specialized for the provided name and normalizer.
+        
+        @param name: string
+            The name to encode the primitive with.
+        @param normalizer: Normalizer
+            The normalizer to bake the name with.
+        @return: callable(value, render, converter, converterId)
+            The compiled encode function.
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+
+        getter, typeValue, nameValue = self.getter, self.typeValue, normalizer.normalize(name)
+        def encode(value, render, converter, converterId):
+            if getter: value = getter(value)
+            if value is None: return
+            render.value(nameValue, converter.asString(value, typeValue))
+        return encode
+
 class EncodePrimitiveCollection(EncodePrimitive):
     '''
     Exploit for primitive encoding with a specified name.
@@ -452,6 +522,25 @@ class EncodePrimitiveCollection(EncodePrimitive):
             super().__call__(self.nameValue, item, render, normalizer, converter)
         render.collectionEnd()
 
+    def compile(self, name, normalizer):
+        '''
+        @see: EncodePrimitive.compile
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+        assert isinstance(normalizer, Normalizer), 'Invalid normalizer %s' % normalizer
+
+        getter, typeValue, nameValue = self.getterCollection, self.typeValue, normalizer.normalize(self.nameValue)
+        def encode(value, render, converter, converterId):
+            if getter: value = getter(value)
+            if value is None: return
+            assert isinstance(value, Iterable), 'Invalid value %s' % value
+
+            render.collectionStart(name)
+            for item in value:
+                if item is not None: render.value(nameValue, converter.asString(item, typeValue))
+            render.collectionEnd()
+        return encode
+
 class EncodeId(EncodePrimitive):
     '''
     Exploit for id encoding.
@@ -466,3 +555,35 @@ class EncodeId(EncodePrimitive):
         if self.getter: value = self.getter(value)
         if value is None: return
         render.value(name, converterId.asString(value, self.typeValue))
+
+    def compile(self, name, normalizer):
+        '''
+        @see: EncodePrimitive.compile
+        '''
+        assert isinstance(name, str), 'Invalid name %s' % name
+
+        getter, typeValue = self.getter, self.typeValue
+        def encode(value, render, converter, converterId):
+            if getter: value = getter(value)
+            if value is None: return
+            render.value(name, converterId.asString(value, typeValue))
+        return encode
+
+# --------------------------------------------------------------------
+
+def compileFor(exploit, name, normalizer):
+    '''
+    Compiles the provided encode exploit if the exploit supports compiling.
+    
+    @param exploit: callable(**data)
+        The exploit to compile.
+    @param name: string|None
+        The name to compile the exploit for.
+    @param normalizer: Normalizer
+        The normalizer to compile the exploit for.
+    @return: callable(value, render, converter, converterId)|None
+        The compiled encode function, None if the exploit cannot be compiled.
+    '''
+    compile = getattr(exploit, 'compile', None)
+    if compile is None: return None
+    return compile(name, normalizer)
@@ -17,9 +17,10 @@ from ally.core.spec.codes import DELETED_SUCCESS, CANNOT_DELETE, UPDATE_SUCCESS,
     METHOD_NOT_AVAILABLE, INCOMPLETE_ARGUMENTS, INPUT_ERROR
 from ally.core.spec.resources import Path, Invoker
 from ally.core.spec.transform.render import Object, List, Value
-from ally.design.context import Context, defines, requires
+from ally.design.context import Context, defines, requires, optional
 from ally.design.processor import HandlerProcessorProceed
 from ally.exception import DevelError, InputError, Ref
+from ally.support.core.util_hint import beginPropertiesHint, endPropertiesHint
 from collections import deque
 import logging
 
@@ -38,6 +39,12 @@ class Request(Context):
     path = requires(Path)
     invoker = requires(Invoker)
     arguments = requires(dict)
+    # ---------------------------------------------------------------- Optional
+    propertiesHint = optional(tuple, doc='''
+    @rtype: tuple(Model, frozenset(string))
+    The model returned by the invoker and the names of the model properties that are going to be rendered, provided as
+    a hint to the invoked service.
+    ''')
 
 class Response(Context):
     '''
@@ -64,6 +71,9 @@ class InvokingHandler(HandlerProcessorProceed):
     a success code.
     '''
 
+    nameList = '%sList'
+    # The name to use for rendering the errors of the listed models.
+
     def __init__(self):
         '''
         Construct the handler.
@@ -109,7 +119,11 @@ class InvokingHandler(HandlerProcessorProceed):
                 log.info('No value for mandatory input %s for invoker %s', inp, request.invoker)
                 return
         try:
-            value = request.invoker.invoke(*arguments)
+            if Request.propertiesHint in request:
+                beginPropertiesHint(*request.propertiesHint)
+                try: value = request.invoker.invoke(*arguments)
+                finally: endPropertiesHint()
+            else: value = request.invoker.invoke(*arguments)
             assert log.debug('Successful on calling invoker \'%s\' with values %s', request.invoker,
                              tuple(arguments)) or True
 
@@ -137,30 +151,41 @@ class InvokingHandler(HandlerProcessorProceed):
         messages, names, models, properties = deque(), deque(), {}, {}
         for msg in e.message:
             assert isinstance(msg, Ref)
+            # The messages for the entities of bulk operations are grouped by the entity index.
+            key = (msg.model, msg.index)
             if not msg.model:
                 messages.append(Value('message', msg.message))
             elif not msg.property:
-                messagesModel = models.get(msg.model)
-                if not messagesModel: messagesModel = models[msg.model] = deque()
+                messagesModel = models.get(key)
+                if not messagesModel: messagesModel = models[key] = deque()
                 messagesModel.append(Value('message', msg.message))
-                if msg.model not in names: names.append(msg.model)
+                if key not in names: names.append(key)
             else:
-                propertiesModel = properties.get(msg.model)
-                if not propertiesModel: propertiesModel = properties[msg.model] = deque()
+                propertiesModel = properties.get(key)
+                if not propertiesModel: propertiesModel = properties[key] = deque()
                 propertiesModel.append(Value(msg.property, msg.message))
-                if msg.model not in names: names.append(msg.model)
+                if key not in names: names.append(key)
 
-        errors = deque()
+        errors, indexed = deque(), {}
         if messages: errors.append(List('error', *messages))
-        for name in names:
-            messagesModel, propertiesModel = models.get(name), properties.get(name)
+        for key in names:
+            messagesModel, propertiesModel = models.get(key), properties.get(key)
 
             props = deque()
             if messagesModel: props.append(List('error', *messagesModel))
             if propertiesModel: props.extend(propertiesModel)
 
-            errors.append(Object(name, *props))
-
+            name, index = key
+            if index is None: errors.append(Object(name, *props))
+            else:
+                # The errors of the listed models are grouped in a list, placed where the first error of the model is.
+                items = indexed.get(name)
+                if items is None:
+                    items = indexed[name] = deque()
+                    errors.append(name)
+                items.append(Object(name, *props, attributes={'index': str(index)}))
+
+        errors = [List(self.nameList % error, *indexed[error]) if isinstance(error, str) else error for error in errors]
         return Object('model', *errors)
 
     # ----------------------------------------------------------------
@@ -65,7 +65,7 @@ class Parse(ContentHandler):
     '''
     Content handler used for parsing the xml content.
     '''
-    __slots__ = ('parser', 'decoder', 'data', 'path', 'content', 'error')
+    __slots__ = ('parser', 'decoder', 'data', 'path', 'indexes', 'counts', 'content', 'contains', 'error')
 
     def __init__(self, parser, decoder, data):
         '''
@@ -86,6 +86,8 @@ class Parse(ContentHandler):
         self.decoder = decoder
         self.data = data
         self.path = deque()
+        self.indexes = deque()
+        self.counts = deque(({},))
         self.content = deque()
         self.contains = deque((False,))
         self.error = None
@@ -96,7 +98,11 @@ class Parse(ContentHandler):
         '''
         if attributes: raise ParseError('No attributes accepted for \'%s\' at line %s and column %s' %
                                     ('/'.join(self.path), self.parser.getLineNumber(), self.parser.getColumnNumber()))
+        index = self.counts[-1].get(name, 0)
+        self.counts[-1][name] = index + 1
+        self.counts.append({})
         self.path.append(name)
+        self.indexes.append(index)
         self.content.appendleft(deque())
         self.contains[0] = True
         self.contains.appendleft(False)
@@ -113,10 +119,10 @@ class Parse(ContentHandler):
         '''
         if not self.path: raise ParseError('Unexpected end element \'%s\' at line %s and column %s' %
                                            (name, self.parser.getLineNumber(), self.parser.getColumnNumber()))
-        path = deque(self.path)
         if name != self.path[-1]: raise ParseError('Expected end element \'%s\' at line %s and column %s, got \'%s\'' %
                                            (self.path[-1], self.parser.getLineNumber(), self.parser.getColumnNumber(), name))
 
+        self.counts.pop()
         contains = self.contains.popleft()
         if contains:
             content = ''.join(self.content.popleft()).strip()
@@ -124,8 +130,15 @@ class Parse(ContentHandler):
                 raise ParseError('Invalid value \'%s\' for element \'%s\' at line %s and column %s' %
                                  (content, name, self.parser.getLineNumber(), self.parser.getColumnNumber()))
         else:
+            # The repeated container elements are provided in the path with the index of their occurrence.
+            path = deque()
+            for k, (pathName, index) in enumerate(zip(self.path, self.indexes), 1):
+                path.append(pathName)
+                if index and k < len(self.path): path.append(index)
+
             content = '\n'.join(self.content.popleft())
-            if self.decoder(path=path, value=content, **self.data): self.path.pop()
-            else:
+            if not self.decoder(path=path, value=content, **self.data):
                 raise ParseError('Invalid path \'%s\' at line %s and column %s' %
                                  ('/'.join(self.path), self.parser.getLineNumber(), self.parser.getColumnNumber()))
+        self.path.pop()
+        self.indexes.pop()
@@ -47,21 +47,33 @@ class RenderJSONHandler(RenderBaseHandler):
 class RenderJSON(IRender):
     '''
     Renderer for JSON.
+    The JSON tokens are collected as string fragments that are written joined to the output stream in batches, the value
+    strings are escaped with the C accelerated JSON encoder function and the escaped names are cached.
     '''
-    __slots__ = ('out', 'isObject', 'isFirst')
+    __slots__ = ('out', 'isObject', 'isFirst', 'fragments', 'batchSize')
 
-    def __init__(self, out):
+    names = {}
+    # The cache of the escaped names fragments, contains also the name separator.
+    namesLimit = 10000
+    # The maximum number of cached names, the cache is cleared after the limit is reached.
+
+    def __init__(self, out, batchSize=512):
         '''
         Construct the text object renderer.
         
         @param out: file writer
             The writer to place the JSON.
+        @param batchSize: integer
+            The number of fragments to collect before writing them in the output.
         '''
         assert out, 'Invalid JSON output stream %s' % out
+        assert isinstance(batchSize, int), 'Invalid batch size %s' % batchSize
 
         self.out = out
         self.isObject = deque()
         self.isFirst = True
+        self.fragments = []
+        self.batchSize = batchSize
 
     def value(self, name, value):
         '''
@@ -70,15 +82,12 @@ class RenderJSON(IRender):
         assert self.isObject, 'No container for value'
         assert isinstance(name, str), 'Invalid name %s' % name
         assert isinstance(value, str), 'Invalid value %s' % value
-        out = self.out
+        fragments = self.fragments
 
         if self.isFirst: self.isFirst = False
-        else: out.write(',')
-        if self.isObject[0]:
-            out.write(encode_basestring(name))
-            out.write(':')
-            out.write(encode_basestring(value))
-        else: out.write(encode_basestring(value))
+        else: fragments.append(',')
+        if self.isObject[0]: fragments.append(self.nameFor(name))
+        fragments.append(encode_basestring(value))
 
     def objectStart(self, name, attributes=None):
         '''
@@ -95,19 +104,19 @@ class RenderJSON(IRender):
         isObject = self.isObject.popleft()
         assert isObject, 'No object to end'
 
-        self.out.write('}')
+        self.fragments.append('}')
+        self.flush()
 
     def collectionStart(self, name, attributes=None):
         '''
         @see: IRender.collectionStart
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
-        out = self.out
 
         self.openObject(name, attributes)
-        if not self.isFirst: out.write(',')
-        out.write(encode_basestring(name))
-        out.write(':[')
+        if not self.isFirst: self.fragments.append(',')
+        self.fragments.append(self.nameFor(name))
+        self.fragments.append('[')
         self.isFirst = True
         self.isObject.appendleft(False)
 
@@ -119,7 +128,8 @@ class RenderJSON(IRender):
         isObject = self.isObject.popleft()
         assert not isObject, 'No collection to end'
 
-        self.out.write(']}')
+        self.fragments.append(']}')
+        self.flush()
 
     # ----------------------------------------------------------------
 
@@ -129,15 +139,13 @@ class RenderJSON(IRender):
         '''
         assert isinstance(name, str), 'Invalid name %s' % name
         assert attributes is None or isinstance(attributes, dict), 'Invalid attributes %s' % attributes
-        out = self.out
+        fragments = self.fragments
 
-        if not self.isFirst: out.write(',')
+        if not self.isFirst: fragments.append(',')
 
-        if self.isObject and self.isObject[0]:
-            out.write(encode_basestring(name))
-            out.write(':')
+        if self.isObject and self.isObject[0]: fragments.append(self.nameFor(name))
 
-        out.write('{')
+        fragments.append('{')
         self.isFirst = True
         if attributes:
             for attrName, attrValue in attributes.items():
@@ -145,7 +153,25 @@ class RenderJSON(IRender):
                 assert isinstance(attrValue, str), 'Invalid attribute value %s' % attrValue
 
                 if self.isFirst: self.isFirst = False
-                else: out.write(',')
-                out.write(encode_basestring(attrName))
-                out.write(':')
-                out.write(encode_basestring(attrValue))
+                else: fragments.append(',')
+                fragments.append(self.nameFor(attrName))
+                fragments.append(encode_basestring(attrValue))
+
+    def nameFor(self, name):
+        '''
+        Provides the escaped name fragment, including the name separator.
+        '''
+        fragment = self.names.get(name)
+        if fragment is None:
+            if len(self.names) >= self.namesLimit: self.names.clear()
+            fragment = self.names[name] = encode_basestring(name) + ':'
+        return fragment
+
+    def flush(self):
+        '''
+        Writes the collected fragments in the output if the batch size is reached or if there is no more opened
+        container.
+        '''
+        if self.fragments and (not self.isObject or len(self.fragments) >= self.batchSize):
+            self.out.write(''.join(self.fragments))
+            del self.fragments[:]
@@ -15,6 +15,7 @@ from ally.core.spec.transform.exploit import Resolve
 from ally.core.spec.transform.render import IRender
 from ally.design.context import defines, Context, requires, optional
 from ally.design.processor import HandlerProcessorProceed
+from ally.support.util_io import IOutputStream
 from collections import Callable, Iterable
 from io import BytesIO
 import logging
@@ -79,31 +80,68 @@ class RenderEncoderHandler(HandlerProcessorProceed):
         if Response.encoder not in response: return  # Skip in case there is no encoder to render
         assert callable(response.renderFactory), 'Invalid response renderer factory %s' % response.renderFactory
 
-        output = BytesIO()
-        render = response.renderFactory(output)
-        assert isinstance(render, IRender), 'Invalid render %s' % render
-
-        resolve = Resolve(response.encoder).request(value=response.obj, render=render, **response.encoderData or {})
-
         if not self.allowChunked and ResponseContent.length not in responseCnt:
-    
+            output = BytesIO()
+            render = response.renderFactory(output)
+            assert isinstance(render, IRender), 'Invalid render %s' % render
+
+            resolve = Resolve(response.encoder).request(value=response.obj, render=render, **response.encoderData or {})
             while resolve.has(): resolve.do()
             content = output.getvalue()
             responseCnt.length = len(content)
             responseCnt.source = (content,)
             output.close()
         else:
+            output = OutputChunks()
+            render = response.renderFactory(output)
+            assert isinstance(render, IRender), 'Invalid render %s' % render
+
+            resolve = Resolve(response.encoder).request(value=response.obj, render=render, **response.encoderData or {})
             responseCnt.source = self.renderAsGenerator(resolve, output, self.bufferSize)
 
     def renderAsGenerator(self, resolve, output, bufferSize):
         '''
         Create a generator for rendering the encoder.
         '''
+        assert isinstance(output, OutputChunks), 'Invalid output %s' % output
         while resolve.has():
-            if output.tell() >= bufferSize:
-                yield output.getvalue()
-                output.seek(0)
-                output.truncate()
+            if output.size >= bufferSize: yield output.pop()
             resolve.do()
-        yield output.getvalue()
-        output.close()
+        if output.size: yield output.pop()
+
+# --------------------------------------------------------------------
+
+class OutputChunks(IOutputStream):
+    '''
+    Output stream that keeps the written bytes as a list of chunks, the chunks are joined only when they are poped, this
+    way the rendered content is not copied around in a buffer.
+    '''
+    __slots__ = ('chunks', 'size')
+
+    def __init__(self):
+        '''
+        Construct the chunks output.
+        '''
+        self.chunks = []
+        self.size = 0
+
+    def write(self, bytes):
+        '''
+        @see: IOutputStream.write
+        '''
+        if bytes:
+            self.chunks.append(bytes)
+            self.size += len(bytes)
+
+    def pop(self):
+        '''
+        Pops all the written bytes.
+        
+        @return: bytes
+            The bytes written since the last pop.
+        '''
+        if len(self.chunks) == 1: content = self.chunks[0]
+        else: content = b''.join(self.chunks)
+        del self.chunks[:]
+        self.size = 0
+        return content
@@ -14,11 +14,13 @@ from ally.api.operator.type import TypeService, TypeModel, TypeModelProperty
 from ally.api.type import Input, typeFor
 from ally.container.ioc import injected
 from ally.core.impl.invoker import InvokerCall
-from ally.core.impl.node import NodePath, NodeProperty
+from ally.core.impl.node import NodePath, NodeProperty, MatchProperty
 from ally.core.spec.resources import Node, Path, ConverterPath, IAssembler, \
-    IResourcesRegister, IResourcesLocator, PathExtended, InvokerInfo, Invoker
+    IResourcesRegister, IResourcesLocator, PathExtended, InvokerInfo, Invoker, \
+    INodeChildListener, INodeInvokerListener, Match
 from ally.support.core.util_resources import pushMatch
-from collections import deque, Iterable
+from collections import deque, Iterable, OrderedDict
+from threading import Lock
 import logging
 
 # --------------------------------------------------------------------
@@ -28,19 +30,28 @@ log = logging.getLogger(__name__)
 # --------------------------------------------------------------------
 
 @injected
-class ResourcesManager(IResourcesRegister, IResourcesLocator):
+class ResourcesManager(IResourcesRegister, IResourcesLocator, INodeChildListener, INodeInvokerListener):
     '''
     @see: IResourcesRegister, IResourcesLocator implementations.
+    The path finding is made based on an index of the node children's that is kept for each node (by node id since the
+    nodes are not hashable and are never removed from the tree) and converter path, the index is discarded whenever a
+    child is added to the node.
+    The resolved paths are also kept as templates in a LRU cache keyed by the path elements, the elements that are not
+    the name of a path node are not part of the key so all the paths of the same shape share the same template. The
+    cache is cleared whenever the node structure changes.
     '''
 
     root = Node
     # The root node for the resource manager.
     assemblers = list
     # The list of assemblers to be used by this resources manager in order to register nodes.
+    cacheSize = 500
+    # The maximum number of path templates to be kept in the cache, 0 to disable the cache.
 
     def __init__(self):
         assert isinstance(self.root, Node), 'Invalid root node %s' % self.root
         assert isinstance(self.assemblers, list), 'Invalid assemblers list %s' % self.assemblers
+        assert isinstance(self.cacheSize, int), 'Invalid cache size %s' % self.cacheSize
 
         self._hintsCall, self._hintsModel = {}, {}
         for asm in self.assemblers:
@@ -50,6 +61,12 @@ class ResourcesManager(IResourcesRegister, IResourcesLocator):
             known = asm.knownModelHints()
             if known: self._hintsModel.update(known)
 
+        self._indexes = {}
+        self._names = {}
+        self._cache = OrderedDict()
+        self._lock = Lock()
+        self.root.addStructureListener(self)
+
     def register(self, implementation):
         '''
         @see: IResourcesRegister.register
@@ -110,20 +127,62 @@ class ResourcesManager(IResourcesRegister, IResourcesLocator):
 
         if len(paths) == 0: return Path(self, [], self.root)
 
+        if self.cacheSize > 0:
+            key = self._keyFor(converterPath, paths)
+            with self._lock:
+                template = self._cache.get(key)
+                if template is not None: self._cache.move_to_end(key)
+            if template is not None:
+                node, entries = template
+                matches = self._matchesFor(converterPath, paths, entries)
+                if matches is not None:
+                    paths.clear()
+                    return Path(self, matches, node)
+        else: key = None
+
+        indexes = self._indexes.get(converterPath)
+        if indexes is None: indexes = self._indexes[converterPath] = {}
+
         node = self.root
-        matches = []
+        matches, entries = [], []
         found = pushMatch(matches, node.tryMatch(converterPath, paths))
+        if found: entries.extend(matches)
         while found and len(paths) > 0:
             found = False
-            for child in node.children:
+            index = indexes.get(id(node))
+            if index is None: index = indexes[id(node)] = self._indexFor(converterPath, node)
+            byName, others = index
+
+            child = byName.get(paths[0])
+            if child is not None:
+                assert isinstance(child, NodePath)
+                del paths[0]
+                matches.append(child.newMatch())
+                if entries is not None: entries.append(matches[-1])
+                node = child
+                found = True
+                continue
+
+            for k, child in enumerate(others):
                 assert isinstance(child, Node)
+                count = len(paths)
                 match = child.tryMatch(converterPath, paths)
                 if pushMatch(matches, match):
+                    if entries is not None:
+                        if isinstance(match, MatchProperty) and count - len(paths) == 1 and \
+                        all(isinstance(other, NodeProperty) for other in others[:k + 1]):
+                            entries.append(others[:k + 1])
+                        else: entries = None
                     node = child
                     found = True
                     break
 
-        if len(paths) == 0: return Path(self, matches, node)
+        if len(paths) == 0:
+            if key is not None and entries is not None:
+                with self._lock:
+                    self._cache[key] = (node, entries)
+                    if len(self._cache) > self.cacheSize: self._cache.popitem(last=False)
+            return Path(self, matches, node)
 
         return Path(self, matches)
 
@@ -164,8 +223,102 @@ class ResourcesManager(IResourcesRegister, IResourcesLocator):
                 paths.extend(self.findGetAllAccessible(extended))
         return paths
 
+    def onChildAdded(self, node, child):
+        '''
+        @see: INodeChildListener.onChildAdded
+        '''
+        for indexes in self._indexes.values(): indexes.pop(id(node), None)
+        self._names.clear()
+        with self._lock: self._cache.clear()
+
+    def onInvokerChange(self, node, old, new):
+        '''
+        @see: INodeInvokerListener.onInvokerChange
+        '''
+        with self._lock: self._cache.clear()
+
     # ----------------------------------------------------------------
 
+    def _indexFor(self, converterPath, node):
+        '''
+        Provides the children index for the node.
+        
+        @param converterPath: ConverterPath
+            The converter path used in normalizing the path nodes names.
+        @param node: Node
+            The node to index the children for.
+        @return: tuple(dictionary{string, NodePath}, list[Node])
+            The path nodes indexed by the normalized name and the ordered list of the other children nodes that need
+            to be matched.
+        '''
+        assert isinstance(converterPath, ConverterPath), 'Invalid converter path %s' % converterPath
+        assert isinstance(node, Node), 'Invalid node %s' % node
+
+        byName, others = {}, []
+        for child in node.children:
+            if isinstance(child, NodePath):
+                assert isinstance(child, NodePath)
+                byName.setdefault(converterPath.normalize(child.name), child)
+            else: others.append(child)
+        return byName, others
+
+    def _keyFor(self, converterPath, paths):
+        '''
+        Provides the cache key for the path elements, only the elements that are the name of a path node are part of
+        the key.
+        
+        @param converterPath: ConverterPath
+            The converter path used in normalizing the path nodes names.
+        @param paths: deque[string]
+            The path elements to provide the key for.
+        @return: tuple
+            The key for the path elements.
+        '''
+        names = self._names.get(converterPath)
+        if names is None:
+            names, nodes = set(), deque((self.root,))
+            while nodes:
+                node = nodes.popleft()
+                if isinstance(node, NodePath): names.add(converterPath.normalize(node.name))
+                nodes.extend(node.children)
+            self._names[converterPath] = names
+        return (converterPath,) + tuple(path if path in names else None for path in paths)
+
+    def _matchesFor(self, converterPath, paths, entries):
+        '''
+        Provides the matches for the path elements based on the cached template entries.
+        
+        @param converterPath: ConverterPath
+            The converter path used in converting the path elements.
+        @param paths: deque[string]
+            The path elements to provide the matches for.
+        @param entries: list[Match|list[NodeProperty]]
+            The template entries, either a match that can be shared or the property nodes that need to be tried in
+            order, where only the last one is expected to be a match.
+        @return: list[Match]|None
+            The matches for the path elements or None if the paths do not match the template.
+        '''
+        matches, k = [], 0
+        for entry in entries:
+            if isinstance(entry, Match):
+                matches.append(entry)
+                if entry.node is not self.root: k += 1
+                continue
+
+            for node in entry[:-1]:
+                assert isinstance(node, NodeProperty)
+                try: converterPath.asValue(paths[k], node.type)
+                except ValueError: continue
+                return None  # A node that has priority matches the path element so the template is not valid.
+
+            node = entry[-1]
+            assert isinstance(node, NodeProperty)
+            try: matches.append(MatchProperty(node, converterPath.asValue(paths[k], node.type)))
+            except ValueError: return None
+            k += 1
+
+        return matches
+
     def _findGetModel(self, modelType, fromPath, node, index, inPath, matchNodes, exclude=None):
         '''
         Provides the recursive find of a get model based on the path.
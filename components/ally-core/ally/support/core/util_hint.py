@@ -0,0 +1,62 @@
+'''
+Created on Jan 14, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the hints that the request processing makes available to the invoked services on the current thread.
+'''
+
+from ally.api.operator.container import Model
+from collections import deque
+from threading import current_thread
+
+# --------------------------------------------------------------------
+
+def beginPropertiesHint(model, properties):
+    '''
+    Begins the properties hint for the current thread, the hint informs the services that only the provided properties
+    of the model are going to be used from the returned model objects. The hint needs to be ended with
+    @see: endPropertiesHint.
+
+    @param model: Model|None
+        The model of the hinted properties, None if there is no hint.
+    @param properties: frozenset(string)|None
+        The names of the model properties that are going to be used, None if there is no hint.
+    '''
+    assert model is None or isinstance(model, Model), 'Invalid model %s' % model
+    assert properties is None or isinstance(properties, frozenset), 'Invalid properties %s' % properties
+    try: hints = current_thread()._ally_hint_properties
+    except AttributeError: hints = current_thread()._ally_hint_properties = deque()
+    assert isinstance(hints, deque)
+    hints.append((model, properties))
+
+def endPropertiesHint():
+    '''
+    Ends the current properties hint for the current thread.
+    '''
+    thread = current_thread()
+    hints = thread._ally_hint_properties
+    assert isinstance(hints, deque)
+    hints.pop()
+    if not hints: del thread._ally_hint_properties
+
+def propertiesHintFor(model):
+    '''
+    Provides the properties hint for the provided model on the current thread, the hint is provided only once so that
+    only the first model objects obtained for the hint are partially loaded, any further call provides None.
+
+    @param model: Model
+        The model to provide the hinted properties for.
+    @return: frozenset(string)|None
+        The names of the model properties that are going to be used, None if all the properties might be used.
+    '''
+    assert isinstance(model, Model), 'Invalid model %s' % model
+    try: hints = current_thread()._ally_hint_properties
+    except AttributeError: return None
+    modelHint, properties = hints[-1]
+    if modelHint is model:
+        hints[-1] = (None, None)
+        return properties
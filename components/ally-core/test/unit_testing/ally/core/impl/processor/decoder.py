@@ -90,6 +90,28 @@ class TestModel(unittest.TestCase):
         self.assertRaises(InputError, resolve, path=deque(('ModelKey', 'Name')), value='The name',
                           target=args, **context)
 
+    def testDecodeList(self):
+        transformer = CreateDecoderHandler()
+        ioc.initialize(transformer)
+
+        resolve = transformer.decoderFor('models', List(typeFor(ModelId)))
+        context = dict(converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+
+        args = {}
+        self.assertTrue(resolve(path=deque(('ModelIdList', 0, 'Name')), value='First', target=args, **context))
+        self.assertTrue(resolve(path=deque(('ModelIdList', 'ModelId', 2, 'Id')), value='3', target=args, **context))
+        self.assertTrue(resolve(path=deque(('ModelId', 'Flags')), value=['1', '2'], target=args, **context))
+        self.assertTrue(resolve(path=deque((1, 'Id')), value='2', target=args, **context))
+
+        models = args['models']
+        self.assertEqual(len(models), 3)
+        self.assertTrue(all(isinstance(m, ModelId) for m in models))
+        self.assertEqual([m.Id for m in models], [None, 2, 3])
+        self.assertEqual(models[0].Name, 'First')
+        self.assertEqual(models[0].Flags, ['1', '2'])
+
+        self.assertFalse(resolve(path=deque(('ModelIdList', 1)), value='2', target=args, **context))
+
 # --------------------------------------------------------------------
 
 if __name__ == '__main__': unittest.main()
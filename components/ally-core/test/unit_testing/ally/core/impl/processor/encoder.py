@@ -17,11 +17,13 @@ if True:
 # --------------------------------------------------------------------
 
 from ally.api.config import model
+from ally.api.extension import IterPart
 from ally.api.type import typeFor, List
 from ally.container import ioc
-from ally.core.impl.processor.encoder import CreateEncoderHandler
+from ally.core.impl.processor.encoder import CreateEncoderHandler, EncodeObject, \
+    EncodeId, EncodePrimitive, EncodePrimitiveCollection
 from ally.core.spec.transform.exploit import Resolve
-from ally.core.spec.transform.render import RenderToObject
+from ally.core.spec.transform.render import RenderToObject, IRender
 from ally.core.spec.resources import ConverterPath
 import unittest
 
@@ -39,6 +41,26 @@ class ModelId:
     Flags = List(str)
     ModelKey = ModelKey
 
+class NormalizerLower(ConverterPath):
+    __slots__ = ()
+
+    def normalize(self, name): return name.lower()
+
+class RenderRecord(IRender):
+    __slots__ = ('calls',)
+
+    def __init__(self): self.calls = []
+
+    def value(self, name, value): self.calls.append(('value', name, value))
+
+    def objectStart(self, name, attributes=None): self.calls.append(('objectStart', name, attributes))
+
+    def objectEnd(self): self.calls.append(('objectEnd',))
+
+    def collectionStart(self, name, attributes=None): self.calls.append(('collectionStart', name, attributes))
+
+    def collectionEnd(self): self.calls.append(('collectionEnd',))
+
 # --------------------------------------------------------------------
 
 class TestModel(unittest.TestCase):
@@ -106,6 +128,59 @@ class TestModel(unittest.TestCase):
         resolve.do()
         self.assertFalse(resolve.has())
 
+    def testPartCursor(self):
+        transformer = CreateEncoderHandler()
+        ioc.initialize(transformer)
+
+        resolve = Resolve(transformer.encoderFor(typeFor(List(ModelId))))
+        context = dict(converter=ConverterPath(), converterId=ConverterPath(), normalizer=ConverterPath())
+
+        model = ModelId()
+        model.Id = 12
+
+        render = RenderRecord()
+        resolve.request(value=IterPart([model], 5, 0, 1, 'next'), render=render, **context).doAll()
+        self.assertEqual(render.calls[0], ('collectionStart', 'ModelIdList',
+                                           {'total': '5', 'offset': '0', 'limit': '1', 'cursor': 'next'}))
+
+        render = RenderRecord()
+        resolve.request(value=IterPart([model], 1, 0, 1), render=render, **context).doAll()
+        self.assertEqual(render.calls[0], ('collectionStart', 'ModelIdList', {'total': '1', 'offset': '0', 'limit': '1'}))
+
+    def testCompiled(self):
+        normalizer, converter = NormalizerLower(), ConverterPath()
+        exploit = EncodeObject('Item')
+        exploit.properties['Id'] = EncodeId(typeFor(int), lambda item: item['Id'])
+        exploit.properties['Name'] = EncodePrimitive(typeFor(str), lambda item: item.get('Name'))
+        exploit.properties['Flags'] = EncodePrimitiveCollection('Flag', typeFor(str), lambda item: item.get('Flags'))
+
+        uncompiled = EncodeObject('Item')
+        uncompiled.properties = exploit.properties
+        # A not compilable entry makes the object use the property exploits as they are.
+        uncompiled.compiled[('Items', normalizer)] = None
+
+        for item in ({'Id': 1}, {'Id': 2, 'Name': 'Name', 'Flags': ['a', None, 'b']}):
+            render, renderUncompiled = RenderRecord(), RenderRecord()
+            exploit(value=item, render=render, normalizer=normalizer, name='Items', converter=converter,
+                    converterId=converter)
+            uncompiled(value=item, render=renderUncompiled, normalizer=normalizer, name='Items', converter=converter,
+                       converterId=converter)
+            self.assertEqual(render.calls, renderUncompiled.calls)
+            self.assertIsNotNone(exploit.compiled[('Items', normalizer)])
+
+            for name, encodeProp in exploit.properties.items():
+                render, renderUncompiled = RenderRecord(), RenderRecord()
+                encodeProp.compile(name, normalizer)(item, render, converter, converter)
+                encodeProp(name=name, value=item, render=renderUncompiled, normalizer=normalizer, converter=converter,
+                           converterId=converter)
+                self.assertEqual(render.calls, renderUncompiled.calls)
+
+        render = RenderRecord()
+        exploit(value={'Id': 2, 'Flags': ['a']}, render=render, normalizer=normalizer, converter=converter,
+                converterId=converter)
+        self.assertEqual(render.calls, [('objectStart', 'item', None), ('value', 'Id', '2'),
+                                        ('collectionStart', 'Flags', None), ('value', 'flag', 'a'),
+                                        ('collectionEnd',), ('objectEnd',)])
 
 # --------------------------------------------------------------------
 
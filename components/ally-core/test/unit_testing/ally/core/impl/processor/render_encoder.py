@@ -0,0 +1,78 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Render encoder testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.impl.processor.render_encoder import OutputChunks, \
+    RenderEncoderHandler
+import unittest
+
+# --------------------------------------------------------------------
+
+class ResolveWrite:
+    '''
+    Resolve that writes a chunk on the output for each step.
+    '''
+
+    def __init__(self, output, chunks):
+        self.output = output
+        self.chunks = list(chunks)
+
+    def has(self): return bool(self.chunks)
+
+    def do(self): self.output.write(self.chunks.pop(0))
+
+# --------------------------------------------------------------------
+
+class TestRenderEncoder(unittest.TestCase):
+
+    def testOutputChunks(self):
+        output = OutputChunks()
+        self.assertEqual(output.size, 0)
+        self.assertEqual(output.pop(), b'')
+
+        output.write(b'abc')
+        output.write(b'')
+        self.assertEqual(output.size, 3)
+        self.assertEqual(output.chunks, [b'abc'])
+        self.assertEqual(output.pop(), b'abc')
+        self.assertEqual(output.size, 0)
+
+        output.write(b'ab')
+        output.write(b'cd')
+        output.write(b'e')
+        self.assertEqual(output.size, 5)
+        self.assertEqual(output.pop(), b'abcde')
+        self.assertEqual(output.chunks, [])
+        self.assertEqual(output.pop(), b'')
+
+    def testRenderAsGenerator(self):
+        handler = RenderEncoderHandler()
+        ioc.initialize(handler)
+
+        output = OutputChunks()
+        resolve = ResolveWrite(output, (b'ab', b'cd', b'efg', b'h', b'ij'))
+        chunks = list(handler.renderAsGenerator(resolve, output, 4))
+        self.assertEqual(chunks, [b'abcd', b'efgh', b'ij'])
+
+        output = OutputChunks()
+        chunks = list(handler.renderAsGenerator(ResolveWrite(output, ()), output, 4))
+        self.assertEqual(chunks, [])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
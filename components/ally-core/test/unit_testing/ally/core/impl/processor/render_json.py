@@ -0,0 +1,121 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+JSON render testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.impl.processor.render.json import RenderJSON
+from codecs import getwriter
+from io import BytesIO
+import unittest
+
+# --------------------------------------------------------------------
+
+class WriterRecord:
+    '''
+    Writer that records the written strings.
+    '''
+
+    def __init__(self): self.writes = []
+
+    def write(self, string): self.writes.append(string)
+
+def renderSample(render):
+    '''
+    Renders a sample with nested objects, collections, attributes and names and values that need escaping.
+    '''
+    render.objectStart('Root', {'href': 'http://x/ü', 'na"me': 'v\\al'})
+    render.value('Id', '1')
+    render.value('Näme', 'Grüße "quoted"\n\t')
+    render.collectionStart('Items', {'total': '2'})
+    render.objectStart('Item')
+    render.value('Id', '1')
+    render.objectEnd()
+    render.objectStart('Item', {'a': 'b'})
+    render.value('Id', '2')
+    render.collectionStart('Tags')
+    render.value('Tag', 'x')
+    render.value('Tag', 'ÿ€')
+    render.collectionEnd()
+    render.objectEnd()
+    render.collectionEnd()
+    render.objectStart('Child')
+    render.value('Name', 'child')
+    render.objectEnd()
+    render.objectStart('Last')
+    render.collectionStart('Empty')
+    render.collectionEnd()
+    render.objectEnd()
+    render.objectEnd()
+
+# --------------------------------------------------------------------
+
+class TestRenderJSON(unittest.TestCase):
+
+    def testRender(self):
+        # The expected content is the one rendered by the renderer that was writing each token in the stream.
+        output = BytesIO()
+        renderSample(RenderJSON(getwriter('utf-8')(output, 'backslashreplace')))
+        self.assertEqual(output.getvalue(),
+                         b'{"href":"http://x/\xc3\xbc","na\\"me":"v\\\\al","Id":"1","N\xc3\xa4me":"Gr\xc3\xbc\xc3\x9fe '
+                         b'\\"quoted\\"\\n\\t","Items":{"total":"2","Items":[{"Id":"1"},{"a":"b","Id":"2","Tags":'
+                         b'{"Tags":["x","\xc3\xbf\xe2\x82\xac"]}}]},"Child":{"Name":"child"},"Last":{"Empty":'
+                         b'{"Empty":[]}}}')
+
+        output = BytesIO()
+        renderSample(RenderJSON(getwriter('ascii')(output, 'backslashreplace')))
+        self.assertEqual(output.getvalue(),
+                         b'{"href":"http://x/\\xfc","na\\"me":"v\\\\al","Id":"1","N\\xe4me":"Gr\\xfc\\xdfe '
+                         b'\\"quoted\\"\\n\\t","Items":{"total":"2","Items":[{"Id":"1"},{"a":"b","Id":"2","Tags":'
+                         b'{"Tags":["x","\\xff\\u20ac"]}}]},"Child":{"Name":"child"},"Last":{"Empty":{"Empty":[]}}}')
+
+    def testBatch(self):
+        expected = WriterRecord()
+        renderSample(RenderJSON(expected, 1000))
+        self.assertEqual(len(expected.writes), 1)
+
+        for batchSize in (1, 5, 10, 20):
+            writer = WriterRecord()
+            renderSample(RenderJSON(writer, batchSize))
+            self.assertEqual(''.join(writer.writes), expected.writes[0])
+            self.assertTrue(len(writer.writes) > 1)
+
+        writer = WriterRecord()
+        render = RenderJSON(writer, 10)
+        render.objectStart('Root')
+        render.collectionStart('Items')
+        render.objectStart('Item')
+        render.value('Id', '1')
+        render.objectEnd()
+        # The fragments '{', '"Items":', '{', '"Items":', '[', '{', '"Id":', '"1"', '}' are below the batch size.
+        self.assertEqual(writer.writes, [])
+        self.assertEqual(len(render.fragments), 9)
+
+        render.objectStart('Item')
+        render.value('Id', '2')
+        self.assertEqual(writer.writes, [])
+        render.objectEnd()
+        self.assertEqual(writer.writes, ['{"Items":{"Items":[{"Id":"1"},{"Id":"2"}'])
+        self.assertEqual(render.fragments, [])
+
+        render.collectionEnd()
+        self.assertEqual(len(writer.writes), 1)
+        render.objectEnd()
+        # The last container is closed so the fragments are written regardless of the batch size.
+        self.assertEqual(writer.writes[1:], [']}}'])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
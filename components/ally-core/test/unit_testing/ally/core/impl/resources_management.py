@@ -0,0 +1,117 @@
+'''
+Created on Jan 22, 2013
+
+@package: ally core
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Resources manager path finding testing.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.api.config import model
+from ally.api.type import Input, typeFor
+from ally.container import ioc
+from ally.core.impl.node import NodeRoot, NodePath, NodeProperty
+from ally.core.impl.resources_management import ResourcesManager
+from ally.core.spec.resources import ConverterPath, Path
+from ally.support.core.util_resources import pushMatch
+from collections import deque
+import unittest
+
+# --------------------------------------------------------------------
+
+@model(id='Id')
+class Item:
+    Id = int
+    Name = str
+
+# --------------------------------------------------------------------
+
+def findPathWalk(root, converterPath, paths):
+    '''
+    Finds the path by trying to match every child, as the resources manager did before indexing the children.
+    '''
+    paths, node, matches = deque(paths), root, []
+    found = pushMatch(matches, node.tryMatch(converterPath, paths))
+    while found and paths:
+        found = False
+        for child in node.children:
+            if pushMatch(matches, child.tryMatch(converterPath, paths)):
+                node, found = child, True
+                break
+    return node if not paths else None, matches
+
+def describe(path):
+    '''
+    Provides a comparable description for the path.
+    '''
+    assert isinstance(path, Path)
+    return path.node, [(match.node, getattr(match, 'value', None)) for match in path.matches]
+
+# --------------------------------------------------------------------
+
+class TestResourcesManager(unittest.TestCase):
+
+    paths = (['Item'], ['Item', '1'], ['item', '1'], ['Item', 'name'], ['Item', '1', 'Sub'], ['Item', 'name', 'Sub'],
+             ['Item', '1', 'Other'], ['Other'], ['Item', '1', '2'])
+
+    def createManager(self, cacheSize):
+        root = NodeRoot()
+        items = NodePath(root, True, 'Item')
+        byId = NodeProperty(items, Input('id', typeFor(Item.Id)))
+        byName = NodeProperty(items, Input('name', typeFor(Item.Name)))
+        NodePath(byId, False, 'Sub')
+        NodePath(byName, False, 'Sub')
+
+        manager = ResourcesManager()
+        manager.root, manager.assemblers, manager.cacheSize = root, [], cacheSize
+        ioc.initialize(manager)
+        return manager
+
+    def assertPaths(self, manager, converterPath):
+        assert isinstance(manager, ResourcesManager)
+        for paths in self.paths:
+            node, matches = findPathWalk(manager.root, converterPath, paths)
+            expected = node, [(match.node, getattr(match, 'value', None)) for match in matches]
+            self.assertEqual(describe(manager.findPath(converterPath, paths)), expected, 'For paths %s' % paths)
+
+    def testFindPath(self):
+        converterPath = ConverterPath()
+        manager = self.createManager(0)
+        self.assertPaths(manager, converterPath)
+        self.assertEqual(manager.findPath(converterPath, ['Item', '1']).matches[-1].value, 1)
+        self.assertEqual(manager.findPath(converterPath, ['Item', 'name']).matches[-1].value, 'name')
+
+        # Adding a child needs to be reflected in the path finding.
+        NodePath(manager.root, True, 'Other')
+        self.assertPaths(manager, converterPath)
+        self.assertIsNotNone(manager.findPath(converterPath, ['Other']).node)
+
+    def testFindPathCache(self):
+        converterPath = ConverterPath()
+        manager = self.createManager(10)
+        # The paths are checked twice, the second time the resolved templates are used.
+        for _k in range(2): self.assertPaths(manager, converterPath)
+        self.assertTrue(manager._cache)
+
+        # The integer property has priority even if the cached template was resolved for the string property.
+        manager.findPath(converterPath, ['Item', 'name'])
+        path = manager.findPath(converterPath, ['Item', '2'])
+        self.assertEqual(path.matches[-1].value, 2)
+        self.assertEqual(path.matches[-1].node.type, typeFor(int))
+
+        NodePath(manager.root, True, 'Other')
+        self.assertFalse(manager._cache)
+        for _k in range(2): self.assertPaths(manager, converterPath)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
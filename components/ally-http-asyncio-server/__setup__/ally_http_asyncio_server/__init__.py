@@ -0,0 +1,19 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Contains setup and configuration files for the HTTP REST server.
+'''
+
+from .. import ally_api
+
+# --------------------------------------------------------------------
+
+NAME = 'ally HTTP asyncio server'
+GROUP = ally_api.GROUP
+VERSION = '1.0'
+DESCRIPTION = 'Provides the HTTP asyncio server'
@@ -0,0 +1,30 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the setup for the asyncio processor.
+'''
+
+from ..ally_core.processor import assemblyResources, parser, \
+    allow_chuncked_response
+from ..ally_core_http import server_type
+from ..ally_core_http.processor import updateAssemblyResourcesForHTTP
+from ..ally_http_asyncore_server.processor import asyncoreContent
+from ally.container import ioc, support
+
+# --------------------------------------------------------------------
+
+@ioc.before(allow_chuncked_response)
+def allow_chuncked_response_asyncio():
+    # The asyncio server frames the streamed responses using the chunked transfer encoding.
+    if server_type() == 'asyncio': support.force(allow_chuncked_response, True)
+
+@ioc.after(updateAssemblyResourcesForHTTP)
+def updateAssemblyResourcesForHTTPAsyncio():
+    if server_type() == 'asyncio':
+        # The asyncio server uses the same incremental content reader protocol as the asyncore server.
+        assemblyResources().add(asyncoreContent(), before=parser())
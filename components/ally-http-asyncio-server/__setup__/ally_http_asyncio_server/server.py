@@ -0,0 +1,33 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Runs the asyncio web server.
+'''
+
+from ..ally_core_http import server_type, server_version, server_host, \
+    server_port
+from ..ally_core_http.processor import pathAssemblies
+from ..ally_http_asyncore_server.server import server_keep_alive_timeout
+from ally.container import ioc
+from threading import Thread
+
+# --------------------------------------------------------------------
+
+ioc.doc(server_type, '''
+    "asyncio" - server made based on the python asyncio streams, runs on a single CPU and uses the best event loop
+                available on the platform (epoll on Linux), requires python 3.5 or later.
+''')
+
+# --------------------------------------------------------------------
+
+@ioc.start
+def runServer():
+    if server_type() == 'asyncio':
+        from ally.core.http.server import server_asyncio
+        args = pathAssemblies(), server_version(), server_host(), server_port(), server_keep_alive_timeout()
+        Thread(name='HTTP server thread', target=server_asyncio.run, args=args).start()
@@ -0,0 +1,395 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the web server based on the python asyncio streams, requires python 3.5 or later.
+'''
+
+from ally.api.config import GET, INSERT, UPDATE, DELETE
+from ally.core.http.spec.server import METHOD_OPTIONS, RequestHTTP, ResponseHTTP, \
+    RequestContentHTTP, ResponseContentHTTP
+from ally.core.spec.codes import Code
+from ally.design.context import optional
+from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
+    CREATE_REPORT, Chain
+from ally.support.http.util_http import chunkedGenerator, \
+    HEADER_TRANSFER_ENCODING, TRANSFER_CHUNKED
+from ally.support.util_io import IOutputStream, readGenerator
+from collections.abc import Callable
+from email.utils import formatdate
+from http.client import parse_headers
+from http.server import BaseHTTPRequestHandler
+from io import BytesIO
+from urllib.parse import urlparse, parse_qsl
+import asyncio
+import logging
+import re
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class RequestContentHTTPAsyncio(RequestContentHTTP):
+    '''
+    The request content context.
+    '''
+    # ---------------------------------------------------------------- Optional
+    contentReader = optional(Callable, doc='''
+    @rtype: Callable
+    The content reader callable used for pushing data from the asyncio stream read. Once the reader is finalized it
+    will return a chain that is used for further request processing.
+    ''')
+
+# --------------------------------------------------------------------
+
+class RequestHandler:
+    '''
+    The request handler for a connection, it reads the requests from the stream, processes them and writes back the
+    responses on the same connection as long as the connection can be kept alive.
+    '''
+
+    serverVersion = 'AllyREST/0.1'
+    # The server version name
+    bufferSize = 10 * 1024
+    # The buffer size used for reading and writing.
+    requestTerminator = b'\r\n\r\n'
+    # Terminator that signals the http request is complete
+    protocolVersion = 'HTTP/1.1'
+    # The HTTP protocol version used in responses.
+    headerContentLength = 'content-length'
+    # The lower case name of the header that provides the content length.
+    headerConnection = 'connection'
+    # The lower case name of the header that provides the connection option.
+
+    methods = {
+               'DELETE' : DELETE,
+               'GET' : GET,
+               'POST' : INSERT,
+               'PUT' : UPDATE,
+               'OPTIONS' : METHOD_OPTIONS
+               }
+    methodUnknown = -1
+    # The available method for processing.
+    responses = BaseHTTPRequestHandler.responses
+    # Table mapping response codes to messages.
+
+    def __init__(self, server, reader, writer):
+        '''
+        Construct the request handler.
+
+        @param server: AsyncioServer
+            The server that created the request handler.
+        @param reader: asyncio.StreamReader
+            The connection stream reader.
+        @param writer: asyncio.StreamWriter
+            The connection stream writer.
+        '''
+        assert isinstance(server, AsyncioServer), 'Invalid server %s' % server
+        assert isinstance(reader, asyncio.StreamReader), 'Invalid reader %s' % reader
+        assert isinstance(writer, asyncio.StreamWriter), 'Invalid writer %s' % writer
+
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+
+    async def handle(self):
+        '''
+        Handles the requests on the connection until the connection is closed.
+        '''
+        try:
+            while True:
+                timeout = self.server.keepAliveTimeout if self.server.keepAliveTimeout > 0 else None
+                try: data = await asyncio.wait_for(self.reader.readuntil(self.requestTerminator), timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError): break
+                except asyncio.LimitOverrunError:
+                    await self._respondError(400, 'Request to long')
+                    break
+
+                if not await self._process(data): break
+        except ConnectionError:
+            assert log.debug('Connection \'%s\' closed', self.writer.get_extra_info('peername')) or True
+        except:
+            log.exception('A problem occurred while handling the connection \'%s\'',
+                          self.writer.get_extra_info('peername'))
+        finally: self.writer.close()
+
+    # ----------------------------------------------------------------
+
+    async def _process(self, data):
+        '''
+        Process the request provided as the header data.
+
+        @param data: bytes
+            The request line and headers data.
+        @return: boolean
+            True if the connection can be used for further requests, False otherwise.
+        '''
+        requestLine, _sep, headers = data.partition(b'\r\n')
+        try: command, path, version = str(requestLine, 'iso-8859-1').split()
+        except ValueError:
+            await self._respondError(400, 'Bad request syntax')
+            return False
+        headers = parse_headers(BytesIO(headers))
+
+        url = urlparse(path)
+        path = url.path.lstrip('/')
+        for regex, processing in self.server.pathProcessing:
+            match = regex.match(path)
+            if match:
+                uriRoot = path[:match.end()]
+                if not uriRoot.endswith('/'): uriRoot += '/'
+
+                assert isinstance(processing, Processing), 'Invalid processing %s' % processing
+                req, reqCnt = processing.contexts['request'](), processing.contexts['requestCnt']()
+                rsp, rspCnt = processing.contexts['response'](), processing.contexts['responseCnt']()
+
+                assert isinstance(req, RequestHTTP), 'Invalid request %s' % req
+                assert isinstance(reqCnt, RequestContentHTTPAsyncio), 'Invalid request content %s' % reqCnt
+                assert isinstance(rsp, ResponseHTTP), 'Invalid response %s' % rsp
+                assert isinstance(rspCnt, ResponseContentHTTP), 'Invalid response content %s' % rspCnt
+
+                req.scheme, req.uriRoot, req.uri = 'http', uriRoot, path[match.end():]
+                req.parameters = parse_qsl(url.query, True, False)
+                break
+        else:
+            await self._respondError(404)
+            return False
+
+        req.method = self.methods.get(command, self.methodUnknown)
+        req.headers = dict(headers)
+
+        connection = headers.get(self.headerConnection, '').lower()
+        if version == 'HTTP/1.1': keepAlive = connection != 'close'
+        else: keepAlive = connection == 'keep-alive'
+        if self.server.keepAliveTimeout <= 0: keepAlive = False
+
+        length = headers.get(self.headerContentLength)
+        if length is not None:
+            try: length = int(length)
+            except ValueError: length, keepAlive = None, False
+        elif req.method in (INSERT, UPDATE): keepAlive = False
+
+        chain = Chain(processing)
+        chain.process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt)
+        while chain.do():
+            if reqCnt.contentReader is not None:
+                length = await self._read(reqCnt.contentReader, length)
+                break
+        # If there is request content that has not been consumed we cannot continue on this connection.
+        if length: keepAlive = False
+
+        assert isinstance(rsp.code, Code), 'Invalid response code %s' % rsp.code
+        headers = [('Server', self.serverVersion), ('Date', formatdate(usegmt=True))]
+        if ResponseHTTP.headers in rsp: headers.extend(rsp.headers.items())
+        chunked = False
+        hasLength = any(name.lower() == self.headerContentLength for name, _value in headers)
+        if rspCnt.source is not None and not hasLength:
+            # The content is streamed, for HTTP/1.1 we can use chunked transfer, otherwise the content ends on close.
+            if version == 'HTTP/1.1':
+                headers.append((HEADER_TRANSFER_ENCODING, TRANSFER_CHUNKED))
+                chunked = True
+            else: keepAlive = False
+        elif rspCnt.source is None and not hasLength and rsp.code.code >= 200 and rsp.code.code not in (204, 304):
+            # The response has no body, the length is required in order for the client to know where it ends.
+            headers.append(('Content-Length', '0'))
+        headers.append(('Connection', 'keep-alive' if keepAlive else 'close'))
+
+        if ResponseHTTP.text in rsp: self._writeHead(rsp.code.code, rsp.text, headers)
+        else: self._writeHead(rsp.code.code, None, headers)
+
+        if rspCnt.source is not None:
+            if ResponseContentHTTP.sourceFile in rspCnt and rspCnt.sourceFile and not rspCnt.sourceFile[0].closed \
+            and not chunked and hasattr(self.server.loop, 'sendfile'):
+                file, offset, count = rspCnt.sourceFile
+                await self.writer.drain()
+                # The event loop sends the file with os.sendfile where available and falls back to reading otherwise.
+                with file:
+                    try: sent = await self.server.loop.sendfile(self.writer.transport, file, offset, count)
+                    except ConnectionError: raise
+                    except (OSError, ValueError):
+                        # The value error is raised if the file has been closed.
+                        log.exception('Exception occurred while sending the file for \'%s\'',
+                                      self.writer.get_extra_info('peername'))
+                        return False
+                if sent < count:
+                    # The declared content length cannot be honored anymore so the connection needs to be dropped.
+                    log.error('The file ended with %s bytes not sent to \'%s\'', count - sent,
+                              self.writer.get_extra_info('peername'))
+                    return False
+                return keepAlive
+
+            if isinstance(rspCnt.source, IOutputStream): source = readGenerator(rspCnt.source, self.bufferSize)
+            else: source = rspCnt.source
+            if chunked: source = chunkedGenerator(source)
+
+            try:
+                for bytes in source:
+                    self.writer.write(bytes)
+                    await self.writer.drain()
+            except ConnectionError: raise
+            except:
+                # The status and headers are already sent so the only option left is to drop the connection.
+                log.exception('Exception occurred while providing the content for \'%s\'',
+                              self.writer.get_extra_info('peername'))
+                return False
+        else: await self.writer.drain()
+
+        return keepAlive
+
+    async def _read(self, contentReader, length):
+        '''
+        Reads the request content and pushes it into the content reader, the chain returned by the content reader is
+        executed to completion.
+
+        @param contentReader: callable(bytes)
+            The content reader to push the data to.
+        @param length: integer|None
+            The request content length, None if unknown in which case the content is read until the end of stream.
+        @return: integer|None
+            The number of bytes from the request content that have not been consumed.
+        '''
+        assert callable(contentReader), 'Invalid content reader %s' % contentReader
+        while True:
+            if length is None: data = await self.reader.read(self.bufferSize)
+            elif length > 0:
+                data = await self.reader.read(min(length, self.bufferSize))
+                if not data: raise ConnectionError('Connection closed before reading the request content')
+                length -= len(data)
+            else: data = b''
+
+            chain = contentReader(data)
+            if chain is None and length == 0: chain = contentReader(b'')
+            if chain is not None:
+                assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+                chain.doAll()
+                return length
+            if not data: raise ConnectionError('Content reader not finalized at the end of stream')
+
+    def _writeHead(self, code, text, headers):
+        '''
+        Writes the status line and the headers.
+        '''
+        if text is None:
+            text = self.responses.get(code)
+            text = text[0] if text else ''
+        head = ['%s %d %s' % (self.protocolVersion, code, text)]
+        head.extend('%s: %s' % header for header in headers)
+        head.append('\r\n')
+        self.writer.write('\r\n'.join(head).encode('latin-1', 'strict'))
+
+    async def _respondError(self, code, text=None):
+        '''
+        Writes a response without content for the provided code and closes the connection.
+        '''
+        self._writeHead(code, text, [('Server', self.serverVersion), ('Date', formatdate(usegmt=True)),
+                                     ('Content-Length', '0'), ('Connection', 'close')])
+        await self.writer.drain()
+
+# --------------------------------------------------------------------
+
+class AsyncioServer:
+    '''
+    The asyncio server handling the connections, on Linux the event loop is based on epoll.
+    '''
+    backlog = 1024
+    # The listen backlog.
+    maximumRequestSize = 100 * 1024
+    # The maximum request line and headers size, 100 kilobytes
+
+    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory, keepAliveTimeout=15):
+        '''
+        Construct the server.
+
+        @param serverAddress: tuple(string, integer)
+            The server address host and port.
+        @param pathProcessing: list[tuple(regex, Processing)]
+            A list that contains tuples having on the first position a regex for matching a path, and the second value
+            the processing for handling the path.
+        @param requestHandlerFactory: callable(AsyncioServer, StreamReader, StreamWriter)
+            The factory that provides request handlers, takes as arguments the server, stream reader and stream writer.
+        @param keepAliveTimeout: integer|float
+            The number of seconds an idle persistent connection is kept open, if 0 the connections are closed
+            after each request.
+        '''
+        assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
+        assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
+        assert callable(requestHandlerFactory), 'Invalid request handler factory %s' % requestHandlerFactory
+        assert isinstance(keepAliveTimeout, (int, float)), 'Invalid keep alive timeout %s' % keepAliveTimeout
+
+        self.serverAddress = serverAddress
+        self.pathProcessing = pathProcessing
+        self.requestHandlerFactory = requestHandlerFactory
+        self.keepAliveTimeout = keepAliveTimeout
+
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        host, port = serverAddress
+        self._server = self.loop.run_until_complete(asyncio.start_server(self._handle, host or None, port,
+                                                    backlog=self.backlog, limit=self.maximumRequestSize))
+
+    def serve_forever(self):
+        '''
+        Loops and servers the connections.
+        '''
+        self.loop.run_forever()
+
+    def close(self):
+        '''
+        Closes the server.
+        '''
+        self._server.close()
+        self.loop.run_until_complete(self._server.wait_closed())
+        self.loop.close()
+
+    # ----------------------------------------------------------------
+
+    def _handle(self, reader, writer):
+        '''
+        Handles a new connection.
+        '''
+        return self.requestHandlerFactory(self, reader, writer).handle()
+
+# --------------------------------------------------------------------
+
+def run(pathAssemblies, server_version, host='', port=80, keepAliveTimeout=15):
+    '''
+    Run the asyncio server.
+
+    @param pathAssemblies: list[(regex, Assembly)]
+        A list that contains tuples having on the first position a string pattern for matching a path, and as a value
+        the assembly to be used for creating the context for handling the request for the path.
+    @param keepAliveTimeout: integer|float
+        The number of seconds an idle persistent connection is kept open, if 0 the connections are closed after
+        each request.
+    '''
+    assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
+    RequestHandler.serverVersion = server_version
+    pathProcessing = []
+    for pattern, assembly in pathAssemblies:
+        assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
+        assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
+
+        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT,
+                                             request=RequestHTTP, requestCnt=RequestContentHTTPAsyncio,
+                                             response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+        log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
+        pathProcessing.append((re.compile(pattern), processing))
+
+    try:
+        server = AsyncioServer((host, port), pathProcessing, RequestHandler, keepAliveTimeout)
+        print('=' * 50, 'Started Asyncio REST API server...')
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('=' * 50, '^C received, shutting down server')
+        server.close()
+    except:
+        log.exception('=' * 50 + ' The server has stooped')
+        try: server.close()
+        except: pass
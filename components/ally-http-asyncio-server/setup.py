@@ -0,0 +1,35 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Setup package.
+'''
+
+# --------------------------------------------------------------------
+
+from setuptools import setup, find_packages
+
+# --------------------------------------------------------------------
+
+setup(
+    name='ally_http_asyncio_server',
+    version='1.0',
+    packages=find_packages(),
+    install_requires=['ally_http_asyncore_server >= 1.0'],
+    platforms=['all'],
+    test_suite='test',
+    zip_safe=True,
+
+    # metadata for upload to PyPI
+    author='Gabriel Nistor',
+    author_email='gabriel.nistor@sourcefabric.org',
+    description='Ally framework - Provides asyncio HTTP support for the framework',
+    long_description='It provides asyncio HTTP server support, requires python 3.5 or later',
+    license='GPL v3',
+    keywords='Ally REST framework',
+    url='http://www.sourcefabric.org/en/superdesk/', # project home page
+)
@@ -0,0 +1,204 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the asyncio server.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.http.server.server_asyncio import RequestHandler, AsyncioServer, \
+    RequestContentHTTPAsyncio
+from ally.core.http.spec.server import RequestHTTP, ResponseHTTP, \
+    ResponseContentHTTP
+from ally.core.spec.codes import Code, RESOURCE_FOUND
+from ally.design.context import Context, defines
+from ally.design.processor import HandlerProcessorProceed, Assembly, \
+    ONLY_AVAILABLE, CREATE_REPORT
+from collections.abc import Iterable
+from threading import Thread
+import asyncio
+import re
+import socket
+import time
+import unittest
+
+# --------------------------------------------------------------------
+
+class Request(Context):
+    uri = defines(str)
+
+class Response(Context):
+    code = defines(Code)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+
+class EchoHandler(HandlerProcessorProceed):
+    '''
+    Responds with the request URI as content, the 'empty' URI is responded without content, the 'chunked' URI with
+    content that has no length and the 'error' URI with content that fails while streaming.
+    '''
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        response.code = RESOURCE_FOUND
+        if request.uri == 'error':
+            def content():
+                yield b'partial'
+                raise ValueError('Cannot provide content')
+            responseCnt.source = content()
+        elif request.uri == 'chunked': responseCnt.source = iter((b'first', b'', b'second' * 10))
+        elif request.uri != 'empty':
+            content = request.uri.encode()
+            response.headers = {'Content-Length': str(len(content))}
+            responseCnt.source = (content,)
+
+def receive(connection, data):
+    '''
+    Receives data from the connection and appends it to the provided data.
+    '''
+    received = connection.recv(1024)
+    if not received: raise IOError('Connection closed')
+    return data + received
+
+def readResponse(connection, carry=b''):
+    '''
+    Reads one response from the connection, returns the headers, the content and the data read after the response.
+    '''
+    data = carry
+    while b'\r\n\r\n' not in data: data = receive(connection, data)
+    head, data = data.split(b'\r\n\r\n', 1)
+    headers = dict(line.split(': ', 1) for line in head.decode().split('\r\n') if ': ' in line)
+
+    if headers.get('Transfer-Encoding') == 'chunked':
+        content = b''
+        while True:
+            while b'\r\n' not in data: data = receive(connection, data)
+            size, data = data.split(b'\r\n', 1)
+            size = int(size, 16)
+            while len(data) < size + 2: data = receive(connection, data)
+            content += data[:size]
+            data = data[size + 2:]
+            if not size: return headers, content, data
+
+    length = int(headers['Content-Length'])
+    while len(data) < length: data = receive(connection, data)
+    return headers, data[:length], data[length:]
+
+# --------------------------------------------------------------------
+
+class TestAsyncioServer(unittest.TestCase):
+
+    def setUp(self):
+        assembly = Assembly()
+        assembly.add(EchoHandler())
+        processing = assembly.create(ONLY_AVAILABLE, CREATE_REPORT, request=RequestHTTP,
+                                     requestCnt=RequestContentHTTPAsyncio, response=ResponseHTTP,
+                                     responseCnt=ResponseContentHTTP)[0]
+        self.server = AsyncioServer(('127.0.0.1', 0), [(re.compile(''), processing)], RequestHandler)
+        self.thread = Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.connection = socket.create_connection(self.server._server.sockets[0].getsockname(), 5)
+
+    def tearDown(self):
+        self.connection.close()
+        async def finalize():
+            # The connection handlers end once they read the closed connection.
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            if tasks: await asyncio.wait(tasks, timeout=5)
+        asyncio.run_coroutine_threadsafe(finalize(), self.server.loop).result()
+        self.server.loop.call_soon_threadsafe(self.server.loop.stop)
+        self.thread.join()
+        self.server.close()
+
+    def testKeepAlive(self):
+        for uri in ('first', 'empty', 'chunked', 'second'):
+            self.connection.sendall(b'GET /' + uri.encode() + b' HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            headers, content, carry = readResponse(self.connection)
+            self.assertEqual(headers['Connection'], 'keep-alive')
+            if uri == 'empty': self.assertEqual(content, b'')
+            elif uri == 'chunked': self.assertEqual(content, b'first' + b'second' * 10)
+            else: self.assertEqual(content, uri.encode())
+            self.assertEqual(carry, b'')
+
+    def testPipelining(self):
+        self.connection.sendall(b'GET /first HTTP/1.1\r\n\r\nGET /chunked HTTP/1.1\r\n\r\nGET /empty HTTP/1.1\r\n\r\n'
+                                b'GET /second HTTP/1.1\r\nConnection: close\r\n\r\n')
+        carry, contents = b'', []
+        for _k in range(4):
+            headers, content, carry = readResponse(self.connection, carry)
+            contents.append(content)
+        self.assertEqual(contents, [b'first', b'first' + b'second' * 10, b'', b'second'])
+        self.assertEqual(headers['Connection'], 'close')
+        self.assertEqual(self.connection.recv(1024), b'')
+
+    def testChunked(self):
+        self.connection.sendall(b'GET /chunked HTTP/1.1\r\n\r\n')
+        data = b''
+        while not data.endswith(b'0\r\n\r\n'): data = receive(self.connection, data)
+        head, content = data.split(b'\r\n\r\n', 1)
+        self.assertIn(b'\r\nTransfer-Encoding: chunked', head)
+        self.assertNotIn(b'Content-Length', head)
+        # The empty chunk is not sent since it would end the content.
+        self.assertEqual(content, b'5\r\nfirst\r\n3C\r\n' + b'second' * 10 + b'\r\n0\r\n\r\n')
+
+        # The HTTP/1.0 clients have no chunked transfer so the content ends when the connection is closed.
+        self.connection.sendall(b'GET /chunked HTTP/1.0\r\nConnection: keep-alive\r\n\r\n')
+        data = b''
+        while True:
+            received = self.connection.recv(1024)
+            if not received: break
+            data += received
+        head, content = data.split(b'\r\n\r\n', 1)
+        self.assertIn(b'\r\nConnection: close', head)
+        self.assertNotIn(b'Transfer-Encoding', head)
+        self.assertEqual(content, b'first' + b'second' * 10)
+
+    def testEmpty(self):
+        self.connection.sendall(b'GET /empty HTTP/1.1\r\n\r\n')
+        data = b''
+        while b'\r\n\r\n' not in data: data = receive(self.connection, data)
+        head, content = data.split(b'\r\n\r\n', 1)
+        self.assertIn(b'\r\nContent-Length: 0\r\n', head)
+        self.assertNotIn(b'Transfer-Encoding', head)
+        self.assertEqual(content, b'')
+
+    def testContentError(self):
+        self.connection.sendall(b'GET /error HTTP/1.1\r\n\r\nGET /first HTTP/1.1\r\n\r\n')
+        data = b''
+        while True:
+            received = self.connection.recv(1024)
+            if not received: break
+            data += received
+        # The chunked content is not terminated and the pipelined request is not handled.
+        self.assertIn(b'7\r\npartial\r\n', data)
+        self.assertNotIn(b'0\r\n\r\n', data)
+        self.assertNotIn(b'first', data)
+
+    def testIdleTimeout(self):
+        # The timeout is used by the connection for the next request.
+        self.server.keepAliveTimeout = 0.5
+        self.connection.sendall(b'GET /first HTTP/1.1\r\n\r\n')
+        headers, content, _carry = readResponse(self.connection)
+        self.assertEqual(headers['Connection'], 'keep-alive')
+        self.assertEqual(content, b'first')
+
+        start = time.time()
+        # The idle connection is closed by the server.
+        self.assertEqual(self.connection.recv(1024), b'')
+        self.assertTrue(time.time() - start < 5)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,19 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Contains plugin configurations for the HTTP asyncore server.
+'''
+
+from __setup__ import ally_api
+
+# --------------------------------------------------------------------
+
+NAME = 'ally HTTP asyncore server'
+GROUP = ally_api.GROUP
+VERSION = '1.0'
+DESCRIPTION = 'Provides the HTTP asyncore server'
@@ -0,0 +1,35 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Configuration to add multiprocessing abilities to the database when the asyncore server runs with worker processes.
+'''
+
+from __setup__.ally_core_http import server_type
+from ally.container import ioc
+from ally.container.ioc import SetupError
+import logging
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+try: import application
+except ImportError: raise SetupError('Cannot access the application module')
+ioc.activate(application.assembly)
+prefork = server_type() == 'asyncore_prefork'
+ioc.deactivate()
+
+if prefork:
+    try:
+        from sql_alchemy.multiprocess_config import enableMultiProcessPool
+    except ImportError:
+        # Probably there is no sql alchemy available.
+        log.warning('Cannot enable multiple processors support for database connection pools', exc_info=True)
+    else: enableMultiProcessPool()
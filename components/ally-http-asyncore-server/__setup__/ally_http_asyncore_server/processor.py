@@ -9,10 +9,11 @@ Created on Nov 24, 2011
 Provides the setup for the asyncore processor.
 '''
 
-from ..ally_core.processor import assemblyResources, parser
+from ..ally_core.processor import assemblyResources, parser, \
+    allow_chuncked_response
 from ..ally_core_http import server_type
 from ..ally_core_http.processor import updateAssemblyResourcesForHTTP
-from ally.container import ioc
+from ally.container import ioc, support
 from ally.core.http.impl.processor.asyncore_content import \
     AsyncoreContentHandler
 from ally.design.processor import Handler
@@ -42,7 +43,12 @@ def asyncoreContent() -> Handler:
 
 # --------------------------------------------------------------------
 
+@ioc.before(allow_chuncked_response)
+def allow_chuncked_response_asyncore():
+    # The asyncore server frames the streamed responses using the chunked transfer encoding.
+    if server_type() in ('asyncore', 'asyncore_prefork'): support.force(allow_chuncked_response, True)
+
 @ioc.after(updateAssemblyResourcesForHTTP)
 def updateAssemblyResourcesForHTTPAsyncore():
-    if server_type() == 'asyncore':
+    if server_type() in ('asyncore', 'asyncore_prefork'):
         assemblyResources().add(asyncoreContent(), before=parser())
@@ -13,7 +13,7 @@ from ..ally_core_http import server_type, server_version, server_host, \
     server_port
 from ..ally_core_http.processor import pathAssemblies
 from ally.container import ioc
-from ally.core.http.server import server_asyncore
+from ally.core.http.server import server_asyncore, server_asyncore_prefork
 from threading import Thread
 
 # --------------------------------------------------------------------
@@ -22,13 +22,42 @@ from threading import Thread
 def server_type_asyncore():
     '''
     "asyncore" - server made based on asyncore package, fast (runs on a single CPU) and reliable.
+    "asyncore_prefork" - the asyncore server running in multiple worker processes that share the listening socket.
     '''
     return 'asyncore'
 
+@ioc.config
+def server_keep_alive_timeout() -> int:
+    '''
+    The number of seconds an idle persistent (keep-alive) connection is kept open by the asyncore server, if 0 then
+    the connections are closed after each request.
+    '''
+    return 15
+
+@ioc.config
+def server_processes():
+    '''
+    The number of worker processes used by the "asyncore_prefork" server, if the value is "auto" then the number of
+    processes will be the number of available CPUs on the machine.
+    '''
+    return 'auto'
+
+@ioc.config
+def server_reuse_port() -> bool:
+    '''
+    If true and the platform supports it the "asyncore_prefork" workers will each bind their own listening socket using
+    SO_REUSEPORT, otherwise the workers will share the listening socket created by the supervisor process.
+    '''
+    return True
+
 # --------------------------------------------------------------------
 
 @ioc.start
 def runServer():
     if server_type() == 'asyncore':
-        args = pathAssemblies(), server_version(), server_host(), server_port()
+        args = pathAssemblies(), server_version(), server_host(), server_port(), server_keep_alive_timeout()
         Thread(name='HTTP server thread', target=server_asyncore.run, args=args).start()
+    elif server_type() == 'asyncore_prefork':
+        args = pathAssemblies(), server_version(), server_host(), server_port(), server_keep_alive_timeout(), \
+        server_processes(), server_reuse_port()
+        Thread(name='HTTP server thread', target=server_asyncore_prefork.run, args=args).start()
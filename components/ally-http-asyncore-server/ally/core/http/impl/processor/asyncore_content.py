@@ -107,7 +107,9 @@ class AsyncoreContentHandler(HandlerProcessor):
         Provide the path for the request file.
         '''
         tm_year, tm_mon, tm_mday, tm_hour, tm_min, tm_sec, *_rest = time.localtime()
-        path = 'request_%s_%s-%s-%s_%s-%s-%s' % (self._count, tm_year, tm_mon, tm_mday, tm_hour, tm_min, tm_sec)
+        # The process id is included since the handler might be used by multiple worker processes.
+        path = 'request_%s_%s_%s-%s-%s_%s-%s-%s' % (os.getpid(), self._count, tm_year, tm_mon, tm_mday,
+                                                    tm_hour, tm_min, tm_sec)
         self._count += 1
         return path
 
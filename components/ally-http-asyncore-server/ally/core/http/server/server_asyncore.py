@@ -16,6 +16,8 @@ from ally.core.spec.codes import Code
 from ally.design.context import optional
 from ally.design.processor import Processing, Assembly, ONLY_AVAILABLE, \
     CREATE_REPORT, Chain
+from ally.support.http.util_http import chunkedGenerator, \
+    HEADER_TRANSFER_ENCODING, TRANSFER_CHUNKED
 from ally.support.util_io import IOutputStream, readGenerator
 from asyncore import dispatcher, loop
 from collections import Callable, deque
@@ -23,8 +25,10 @@ from http.server import BaseHTTPRequestHandler
 from io import BytesIO
 from urllib.parse import urlparse, parse_qsl
 import logging
+import os
 import re
 import socket
+import time
 
 # --------------------------------------------------------------------
 
@@ -34,6 +38,8 @@ log = logging.getLogger(__name__)
 WRITE_BYTES = 1
 WRITE_ITER = 2
 WRITE_CLOSE = 3
+WRITE_RESET = 4
+WRITE_FILE = 5
 
 # --------------------------------------------------------------------
 
@@ -63,6 +69,10 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
     # The maximum request size, 100 kilobytes
     requestTerminator = b'\r\n\r\n'
     # Terminator that signals the http request is complete 
+    protocol_version = 'HTTP/1.1'
+    # The HTTP protocol version used in responses, needs to be at least 1.1 in order to support persistent connections.
+    headerContentLength = 'content-length'
+    # The lower case name of the header that provides the content length.
 
     methods = {
                'DELETE' : DELETE,
@@ -93,18 +103,9 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         self.client_address = address
         self.connection = request
         
-        self.request_version = 'HTTP/1.1'
-        self.requestline = 0
-        
-        self._stage = 1
-        self.rfile = BytesIO()
-        self._readCarry = None
-        self._reader = None
-
-        self.wfile = BytesIO()
         self._writeq = deque()
-        
-        self._next(1)
+        self._readPending = None
+        self._reset()
         
     def handle_read(self):
         '''
@@ -115,10 +116,16 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             log.exception('Exception occurred while reading the content from \'%s\'' % self.connection)
             self.close()
             return
+        self.lastActivity = time.time()
         self.handle_data(data)
     
     def handle_error(self):
+        '''
+        @see: dispatcher.handle_error
+        '''
         log.exception('A problem occurred in the server')
+        # The state of the connection is unknown so it cannot be used anymore.
+        self.close()
     
     def end_headers(self):
         '''
@@ -139,11 +146,43 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         
     # ----------------------------------------------------------------
     
+    def isIdle(self, since):
+        '''
+        Checks if the handler is idle, waiting for a new request since before the provided time.
+        
+        @param since: float
+            The time in seconds since the epoch.
+        @return: boolean
+            True if the handler is waiting for a request and there was no activity since the provided time.
+        '''
+        return self._stage == 1 and self.lastActivity < since
+        
+    # ----------------------------------------------------------------
+    
+    def _reset(self):
+        '''
+        Resets the handler in order to process a new request on the same connection.
+        '''
+        self.request_version = 'HTTP/1.1'
+        self.requestline = 0
+        self.close_connection = 1
+        
+        self.rfile = BytesIO()
+        self._readCarry = None
+        self._reader = None
+        self._readLength = None
+
+        self.wfile = BytesIO()
+        self.lastActivity = time.time()
+        
+        self._next(1)
+    
     def _next(self, stage):
         '''
         Proceed to next stage.
         '''
         assert isinstance(stage, int), 'Invalid stage %s' % stage
+        self._stage = stage
         self.readable = getattr(self, '_%s_readable' % stage, None)
         self.handle_data = getattr(self, '_%s_handle_data' % stage, None)
         self.writable = getattr(self, '_%s_writable' % stage, None)
@@ -175,7 +214,10 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             
             self._process(self.methods.get(self.command, self.methodUnknown))
             
-            if index < len(data) and self.handle_data: self.handle_data(data[index:])
+            if index < len(data):
+                # The remaining data is either content or a pipelined request that is handled after the response.
+                if self._stage == 2: self.handle_data(data[index:])
+                elif self._stage == 3: self._readPending = data[index:]
         else:
             self._readCarry = data[-requestTerminatorLen:]
             self.rfile.write(data[:-requestTerminatorLen])
@@ -204,7 +246,14 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         Handle the data as being part of the request.
         '''
         assert self._reader is not None, 'No reader available'
+        if self._readLength is not None:
+            if len(data) > self._readLength:
+                self._readPending = data[self._readLength:]
+                data = data[:self._readLength]
+            self._readLength -= len(data)
+        
         chain = self._reader(data)
+        if chain is None and self._readLength == 0: chain = self._reader(b'')
         if chain is not None:
             assert isinstance(chain, Chain), 'Invalid chain %s' % chain
             self._reader = None
@@ -237,17 +286,33 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
         '''
         assert self._writeq, 'Nothing to write'
         
+        self.lastActivity = time.time()
         what, content = self._writeq[0]
-        assert what in (WRITE_ITER, WRITE_BYTES, WRITE_CLOSE), 'Invalid what %s' % what
-        if what == WRITE_ITER:
+        assert what in (WRITE_ITER, WRITE_BYTES, WRITE_CLOSE, WRITE_RESET, WRITE_FILE), 'Invalid what %s' % what
+        if what == WRITE_FILE:
+            self._sendFile(content)
+            return
+        elif what == WRITE_ITER:
             try: data = memoryview(next(content))
             except StopIteration:
                 del self._writeq[0]
                 return
+            except:
+                # The status and headers are already sent so the only option left is to drop the connection.
+                log.exception('Exception occurred while providing the content for \'%s\'' % self.connection)
+                self.close()
+                return
         elif what == WRITE_BYTES: data = content
         elif what == WRITE_CLOSE:
             self.close()
             return
+        elif what == WRITE_RESET:
+            del self._writeq[0]
+            self._reset()
+            if self._readPending:
+                data, self._readPending = self._readPending, None
+                self.handle_data(data)
+            return
         
         dataLen = len(data)
         try:
@@ -262,6 +327,38 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             elif what == WRITE_BYTES: self._writeq[0] = (WRITE_BYTES, data[sent:])
         else:
             if what == WRITE_BYTES: del self._writeq[0]
+
+    def _sendFile(self, content):
+        '''
+        Sends as much as the socket accepts from the file content, the content is updated with the new offset and count.
+        
+        @param content: list[file, integer, integer]
+            The file, offset and count of bytes to be sent.
+        '''
+        file, offset, count = content
+        if count <= 0:
+            file.close()
+            del self._writeq[0]
+            return
+        try: sent = os.sendfile(self.socket.fileno(), file.fileno(), offset, count)
+        except (BlockingIOError, InterruptedError): return
+        except (OSError, ValueError):
+            # The value error is raised if the file has been closed.
+            log.exception('Exception occurred while writing to the connection \'%s\'' % self.connection)
+            file.close()
+            self.close()
+            return
+        if not sent:
+            # The file ended before the expected count, the declared content length cannot be honored anymore so the
+            # only option left is to drop the connection.
+            log.error('The file ended with %s bytes not sent to the connection \'%s\'', count, self.connection)
+            file.close()
+            self.close()
+            return
+        if sent < count: content[1], content[2] = offset + sent, count - sent
+        else:
+            file.close()
+            del self._writeq[0]
         
     # ----------------------------------------------------------------
     
@@ -294,12 +391,38 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
 
         req.method = method
         req.headers = dict(self.headers)
+        
+        if self.server.keepAliveTimeout <= 0: self.close_connection = 1
+        if not self.close_connection:
+            # In order to identify the pipelined requests we need to know where the request content ends.
+            length = self.headers.get(self.headerContentLength)
+            if length is not None:
+                try: self._readLength = int(length)
+                except ValueError: self.close_connection = 1
+            elif method in (INSERT, UPDATE): self.close_connection = 1
 
         def respond():
             assert isinstance(rsp.code, Code), 'Invalid response code %s' % rsp.code
     
+            # If there is request content that has not been consumed we cannot continue on this connection.
+            keepAlive = not self.close_connection and not self._readLength
+            hasLength = chunked = False
             if ResponseHTTP.headers in rsp:
-                for name, value in rsp.headers.items(): self.send_header(name, value)
+                for name, value in rsp.headers.items():
+                    if name.lower() == self.headerContentLength: hasLength = True
+                    self.send_header(name, value)
+            if rspCnt.source is not None and not hasLength:
+                # The content is streamed, for HTTP/1.1 we can use chunked transfer, otherwise the content ends on close.
+                if self.request_version == 'HTTP/1.1':
+                    self.send_header(HEADER_TRANSFER_ENCODING, TRANSFER_CHUNKED)
+                    chunked = True
+                else: keepAlive = False
+            elif rspCnt.source is None and not hasLength and rsp.code.code >= 200 and rsp.code.code not in (204, 304):
+                # The response has no body, the length is required in order for the client to know where it ends.
+                self.send_header('Content-Length', '0')
+            
+            if keepAlive: self.send_header('Connection', 'keep-alive')
+            else: self.send_header('Connection', 'close')
     
             if ResponseHTTP.text in rsp: self.send_response(rsp.code.code, rsp.text)
             else: self.send_response(rsp.code.code)
@@ -307,11 +430,17 @@ class RequestHandler(dispatcher, BaseHTTPRequestHandler):
             self.end_headers()
     
             if rspCnt.source is not None:
-                if isinstance(rspCnt.source, IOutputStream): source = readGenerator(rspCnt.source, self.bufferSize)
-                else: source = rspCnt.source
-    
-                self._writeq.append((WRITE_ITER, iter(source)))
-            self._writeq.append((WRITE_CLOSE, None))
+                if ResponseContentHTTP.sourceFile in rspCnt and rspCnt.sourceFile and not rspCnt.sourceFile[0].closed \
+                and not chunked and hasattr(os, 'sendfile'):
+                    self._writeq.append((WRITE_FILE, list(rspCnt.sourceFile)))
+                else:
+                    if isinstance(rspCnt.source, IOutputStream): source = readGenerator(rspCnt.source, self.bufferSize)
+                    else: source = rspCnt.source
+                    if chunked: source = chunkedGenerator(source)
+        
+                    self._writeq.append((WRITE_ITER, iter(source)))
+            if keepAlive: self._writeq.append((WRITE_RESET, None))
+            else: self._writeq.append((WRITE_CLOSE, None))
             
         chain = Chain(processing)
         chain.process(request=req, requestCnt=reqCnt, response=rsp, responseCnt=rspCnt)
@@ -334,8 +463,10 @@ class AsyncServer(dispatcher):
     '''
     timeout = 10.0
     # The timeout for select loop.
+    idleCheckInterval = 1.0
+    # The minimum interval in seconds between two checks for idle persistent connections.
 
-    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory):
+    def __init__(self, serverAddress, pathProcessing, requestHandlerFactory, keepAliveTimeout=15, listener=None):
         '''
         Construct the server.
         
@@ -347,21 +478,36 @@ class AsyncServer(dispatcher):
         @param requestHandlerFactory: callable(AsyncServer, socket, tuple(string, integer))
             The factory that provides request handlers, takes as arguments the server, request socket
             and client address.
+        @param keepAliveTimeout: integer|float
+            The number of seconds an idle persistent connection is kept open, if 0 the connections are closed
+            after each request.
+        @param listener: socket|None
+            An already bound and listening socket to accept the connections from, if None a new socket is created
+            and bound to the server address.
         '''
         assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
         assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
         assert callable(requestHandlerFactory), 'Invalid request handler factory %s' % requestHandlerFactory
+        assert isinstance(keepAliveTimeout, (int, float)), 'Invalid keep alive timeout %s' % keepAliveTimeout
         
         self.map = {}
         dispatcher.__init__(self, map=self.map)
         self.serverAddress = serverAddress
         self.pathProcessing = pathProcessing
         self.requestHandlerFactory = requestHandlerFactory
+        self.keepAliveTimeout = keepAliveTimeout
+        self._idleCheck = 0
         
-        self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.set_reuse_addr()
-        self.bind(serverAddress)
-        self.listen(1024)  # lower this to 5 if your OS complains
+        if listener is None:
+            self.create_socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.set_reuse_addr()
+            self.bind(serverAddress)
+            self.listen(1024)  # lower this to 5 if your OS complains
+        else:
+            assert isinstance(listener, socket.socket), 'Invalid listener %s' % listener
+            listener.setblocking(0)
+            self.set_socket(listener)
+            self.accepting = True
 
     def handle_accept (self):
         '''
@@ -383,7 +529,28 @@ class AsyncServer(dispatcher):
         '''
         Loops and servers the connections.
         '''
-        loop(self.timeout, map=self.map)
+        if self.keepAliveTimeout <= 0:
+            loop(self.timeout, map=self.map)
+            return
+        
+        timeout = min(self.timeout, self.keepAliveTimeout)
+        while self.map:
+            loop(timeout, map=self.map, count=1)
+            self.closeIdle()
+            
+    def closeIdle(self):
+        '''
+        Closes the persistent connections that have been idle for more then the keep alive timeout.
+        '''
+        now = time.time()
+        if now < self._idleCheck: return
+        self._idleCheck = now + self.idleCheckInterval
+        
+        since = now - self.keepAliveTimeout
+        for handler in list(self.map.values()):
+            if isinstance(handler, RequestHandler) and handler.isIdle(since):
+                assert log.debug('Closing idle connection \'%s\'', handler.connection) or True
+                handler.close()
             
     def serve_limited(self, count):
         '''
@@ -394,30 +561,22 @@ class AsyncServer(dispatcher):
 
 # --------------------------------------------------------------------
 
-def run(pathAssemblies, server_version, host='', port=80):
+def run(pathAssemblies, server_version, host='', port=80, keepAliveTimeout=15):
     '''
     Run the basic server.
     
     @param pathAssemblies: list[(regex, Assembly)]
         A list that contains tuples having on the first position a string pattern for matching a path, and as a value 
         the assembly to be used for creating the context for handling the request for the path.
+    @param keepAliveTimeout: integer|float
+        The number of seconds an idle persistent connection is kept open, if 0 the connections are closed after
+        each request.
     '''
-    assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
     RequestHandler.server_version = server_version
-    pathProcessing = []
-    for pattern, assembly in pathAssemblies:
-        assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
-        assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
-
-        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT,
-                                             request=RequestHTTP, requestCnt=RequestContentHTTPAsyncore,
-                                             response=ResponseHTTP, responseCnt=ResponseContentHTTP)
-
-        log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
-        pathProcessing.append((re.compile(pattern), processing))
+    pathProcessing = createPathProcessing(pathAssemblies)
         
     try:
-        server = AsyncServer((host, port), pathProcessing, RequestHandler)
+        server = AsyncServer((host, port), pathProcessing, RequestHandler, keepAliveTimeout)
         print('=' * 50, 'Started Async REST API server...')
 #        import profile
 #        profile.runctx('server.serve_limited(1000)', globals(), locals(), 'profiler.data')
@@ -429,4 +588,30 @@ def run(pathAssemblies, server_version, host='', port=80):
         log.exception('=' * 50 + ' The server has stooped')
         try: server.close()
         except: pass
-        
+
+# --------------------------------------------------------------------
+
+def createPathProcessing(pathAssemblies):
+    '''
+    Creates the processing for the asyncore server based on the provided path assemblies.
+    
+    @param pathAssemblies: list[(regex, Assembly)]
+        A list that contains tuples having on the first position a string pattern for matching a path, and as a value 
+        the assembly to be used for creating the context for handling the request for the path.
+    @return: list[tuple(regex, Processing)]
+        A list that contains tuples having on the first position a regex for matching a path, and the second value 
+        the processing for handling the path.
+    '''
+    assert isinstance(pathAssemblies, list), 'Invalid path assemblies %s' % pathAssemblies
+    pathProcessing = []
+    for pattern, assembly in pathAssemblies:
+        assert isinstance(pattern, str), 'Invalid pattern %s' % pattern
+        assert isinstance(assembly, Assembly), 'Invalid assembly %s' % assembly
+
+        processing, report = assembly.create(ONLY_AVAILABLE, CREATE_REPORT,
+                                             request=RequestHTTP, requestCnt=RequestContentHTTPAsyncore,
+                                             response=ResponseHTTP, responseCnt=ResponseContentHTTP)
+
+        log.info('Assembly report for pattern \'%s\':\n%s', pattern, report)
+        pathProcessing.append((re.compile(pattern), processing))
+    return pathProcessing
@@ -0,0 +1,210 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the asyncore web server that runs on multiple processors, each worker process runs its own asyncore loop
+on a shared listening socket.
+'''
+
+from ally.core.http.server.server_asyncore import RequestHandler, AsyncServer, \
+    createPathProcessing
+from multiprocessing import cpu_count, Process
+import logging
+import socket
+import time
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class PreforkSupervisor:
+    '''
+    The supervisor for the asyncore worker processes, it starts the workers and restarts the ones that crash, the
+    workers that stop right after starting are restarted with an increasing delay.
+    '''
+    
+    checkInterval = 1
+    # The interval in seconds between two checks of the workers state.
+    startupPeriod = 5
+    # The number of seconds a worker needs to run in order not to be considered as failed at start.
+    restartDelay = 1
+    # The delay in seconds for restarting a worker that failed at start, doubled with each consecutive failure.
+    restartDelayMaximum = 60
+    # The maximum delay in seconds for restarting a worker.
+    
+    def __init__(self, serverAddress, pathProcessing, counts, keepAliveTimeout=15, reusePort=True):
+        '''
+        Construct the supervisor.
+        
+        @param serverAddress: tuple(string, integer)
+            The server address host and port.
+        @param pathProcessing: list[tuple(regex, Processing)] 
+            A list that contains tuples having on the first position a regex for matching a path, and the second value 
+            the processing for handling the path.
+        @param counts: integer
+            The number of worker processes.
+        @param keepAliveTimeout: integer|float
+            The number of seconds an idle persistent connection is kept open by the workers.
+        @param reusePort: boolean
+            If True and the platform supports SO_REUSEPORT then each worker will bind its own listening socket,
+            otherwise the workers will accept from a listening socket inherited from the supervisor.
+        '''
+        assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
+        assert isinstance(pathProcessing, list), 'Invalid path processing %s' % pathProcessing
+        assert isinstance(counts, int) and counts > 0, 'Invalid processes count %s' % counts
+        assert isinstance(keepAliveTimeout, (int, float)), 'Invalid keep alive timeout %s' % keepAliveTimeout
+        assert isinstance(reusePort, bool), 'Invalid reuse port flag %s' % reusePort
+        
+        self.serverAddress = serverAddress
+        self.pathProcessing = pathProcessing
+        self.keepAliveTimeout = keepAliveTimeout
+        self.reusePort = reusePort and hasattr(socket, 'SO_REUSEPORT')
+        if reusePort and not self.reusePort:
+            log.info('SO_REUSEPORT is not supported on this platform, the workers will share an inherited socket')
+        
+        if self.reusePort:
+            # We just check if the address is available, the workers will bind their own sockets.
+            createListener(serverAddress, True, listen=False).close()
+            self.listener = None
+        else: self.listener = createListener(serverAddress)
+        
+        self.processes = [None] * counts
+        self._started = [None] * counts
+        self._failures = [0] * counts
+        self._restarts = [None] * counts
+        self._running = False
+        
+    def serve_forever(self):
+        '''
+        Starts the workers and supervises them until the supervisor is closed.
+        
+        @raise Exception: If all the workers stopped right after starting.
+        '''
+        self._running = True
+        for k in range(0, len(self.processes)): self._start(k)
+        
+        while self._running:
+            time.sleep(self.checkInterval)
+            for k, process in enumerate(self.processes):
+                if not self._running: break
+                now = time.time()
+                if process is None:
+                    if now >= self._restarts[k]: self._start(k)
+                    continue
+                if process.is_alive():
+                    if now - self._started[k] >= self.startupPeriod: self._failures[k] = 0
+                    continue
+                
+                if now - self._started[k] < self.startupPeriod: self._failures[k] += 1
+                else: self._failures[k] = 0
+                self.processes[k] = None
+                if all(self.processes[i] is None and self._failures[i] for i in range(0, len(self.processes))):
+                    self.close()
+                    raise Exception('All the workers have stopped right after starting, last exit code %s' %
+                                    process.exitcode)
+                
+                if self._failures[k]:
+                    delay = min(self.restartDelay * 2 ** (self._failures[k] - 1), self.restartDelayMaximum)
+                else: delay = 0
+                log.error('The worker \'%s\' has stopped with exit code %s, restarting in %s seconds', process.name,
+                          process.exitcode, delay)
+                self._restarts[k] = now + delay
+                if not delay: self._start(k)
+                    
+    def close(self):
+        '''
+        Stops the workers and closes the listening socket.
+        '''
+        self._running = False
+        for process in self.processes:
+            if process is not None and process.is_alive(): process.terminate()
+        for process in self.processes:
+            if process is not None: process.join()
+        if self.listener is not None: self.listener.close()
+        
+    # ----------------------------------------------------------------
+    
+    def _start(self, index):
+        '''
+        Starts the worker process for the provided index.
+        '''
+        args = self.serverAddress, self.pathProcessing, self.keepAliveTimeout, self.listener
+        process = self.processes[index] = Process(name='Worker %s' % index, target=serveWorker, args=args)
+        process.daemon = True
+        process.start()
+        self._started[index] = time.time()
+
+# --------------------------------------------------------------------
+
+def createListener(serverAddress, reusePort=False, listen=True):
+    '''
+    Creates the listening socket for the provided address.
+    
+    @param serverAddress: tuple(string, integer)
+        The server address host and port.
+    @param reusePort: boolean
+        Flag indicating that the SO_REUSEPORT option should be set on the socket.
+    @param listen: boolean
+        Flag indicating that the socket should also start listening, otherwise is just bound.
+    @return: socket
+        The bound socket.
+    '''
+    assert isinstance(serverAddress, tuple), 'Invalid server address %s' % serverAddress
+    
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reusePort: listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    listener.bind(serverAddress)
+    if listen: listener.listen(1024)  # lower this to 5 if your OS complains
+    return listener
+
+def serveWorker(serverAddress, pathProcessing, keepAliveTimeout, listener=None):
+    '''
+    Runs in a worker process the asyncore loop.
+    
+    @param listener: socket|None
+        The listening socket inherited from the supervisor, if None then the worker binds its own socket using the
+        SO_REUSEPORT option.
+    '''
+    if listener is None: listener = createListener(serverAddress, True)
+    server = AsyncServer(serverAddress, pathProcessing, RequestHandler, keepAliveTimeout, listener)
+    try: server.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: server.close()
+
+# --------------------------------------------------------------------
+
+def run(pathAssemblies, server_version, host='', port=80, keepAliveTimeout=15, processes='auto', reusePort=True):
+    '''
+    Run the asyncore server on multiple processes.
+    
+    @param pathAssemblies: list[(regex, Assembly)]
+        A list that contains tuples having on the first position a string pattern for matching a path, and as a value 
+        the assembly to be used for creating the context for handling the request for the path.
+    @param processes: integer|string
+        The number of worker processes, if 'auto' then the number of available CPUs is used.
+    @param reusePort: boolean
+        If True the workers will bind their own sockets using SO_REUSEPORT, if available on the platform.
+    '''
+    RequestHandler.server_version = server_version
+    pathProcessing = createPathProcessing(pathAssemblies)
+    
+    if processes == 'auto': processes = cpu_count()
+    
+    try:
+        server = PreforkSupervisor((host, port), pathProcessing, processes, keepAliveTimeout, reusePort)
+        print('=' * 50, 'Started Async REST API server on %s processes...' % processes)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('=' * 50, '^C received, shutting down server')
+        server.close()
+    except:
+        log.exception('=' * 50 + ' The server has stooped')
+        try: server.close()
+        except: pass
@@ -17,11 +17,83 @@ if True:
 
 # --------------------------------------------------------------------
 
-from ally.core.http.server.server_asyncore import RequestHandler, AsyncServer
+from ally.core.http.server.server_asyncore import RequestHandler, AsyncServer, \
+    createPathProcessing
+from ally.core.spec.codes import Code, RESOURCE_FOUND
+from ally.design.context import Context, defines
+from ally.design.processor import HandlerProcessorProceed, Assembly
+from collections import Iterable
+from tempfile import TemporaryFile
+from threading import Thread
+import socket as sockets
 import unittest
 
 # --------------------------------------------------------------------
 
+class Request(Context):
+    uri = defines(str)
+
+class Response(Context):
+    code = defines(Code)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+    sourceFile = defines(tuple)
+
+class EchoHandler(HandlerProcessorProceed):
+    '''
+    Responds with the request URI as content, the 'empty' URI is responded without content and the 'error' URI with
+    content that fails while streaming. The URIs starting with 'file' are responded with the content in a file, the
+    'fileRange' URI with the content placed after an offset in the file, the 'fileClosed' URI with the file closed and
+    the 'fileTruncated' URI with a file that is truncated after the content length is provided.
+    '''
+
+    def process(self, request:Request, response:Response, responseCnt:ResponseContent, **keyargs):
+        response.code = RESOURCE_FOUND
+        if request.uri == 'error':
+            def content():
+                yield b'partial'
+                raise ValueError('Cannot provide content')
+            responseCnt.source = content()
+        elif request.uri != 'empty':
+            content = request.uri.encode()
+            response.headers = {'Content-Length': str(len(content))}
+            responseCnt.source = (content,)
+            if request.uri.startswith('file'):
+                # The content source is upper cased in order to know if the file is not used.
+                responseCnt.source = (content.upper(),)
+                file = TemporaryFile()
+                if request.uri == 'fileRange':
+                    file.write(b'before' + content + b'after')
+                    responseCnt.sourceFile = (file, 6, len(content))
+                else:
+                    file.write(content)
+                    responseCnt.sourceFile = (file, 0, len(content))
+                file.flush()
+                if request.uri == 'fileTruncated': file.truncate(4)
+                elif request.uri == 'fileClosed': file.close()
+
+def readResponse(connection, carry=b''):
+    '''
+    Reads one response from the connection, returns the headers, the content and the data read after the response.
+    '''
+    data = carry
+    while b'\r\n\r\n' not in data:
+        received = connection.recv(1024)
+        if not received: raise IOError('Connection closed')
+        data += received
+    head, data = data.split(b'\r\n\r\n', 1)
+    headers = dict(line.split(': ', 1) for line in head.decode().split('\r\n') if ': ' in line)
+    length = int(headers['Content-Length'])
+    while len(data) < length:
+        received = connection.recv(1024)
+        if not received: raise IOError('Connection closed')
+        data += received
+    return headers, data[:length], data[length:]
+
+# --------------------------------------------------------------------
+
 class TestAsyncoreServer(unittest.TestCase):
 
     def testRequest(self):
@@ -39,6 +111,73 @@ class TestAsyncoreServer(unittest.TestCase):
         
         for data in datas: rh._handleReadData(data)
 
+class TestAsyncoreServerConnection(unittest.TestCase):
+
+    def setUp(self):
+        assembly = Assembly()
+        assembly.add(EchoHandler())
+        self.server = AsyncServer(('127.0.0.1', 0), createPathProcessing([('', assembly)]), RequestHandler)
+        thread = Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.connection = sockets.create_connection(self.server.socket.getsockname(), 5)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.close()
+
+    def testKeepAlive(self):
+        for uri in ('first', 'empty', 'second'):
+            self.connection.sendall(b'GET /' + uri.encode() + b' HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            headers, content, carry = readResponse(self.connection)
+            self.assertEqual(headers['Connection'], 'keep-alive')
+            self.assertEqual(content, b'' if uri == 'empty' else uri.encode())
+            self.assertEqual(carry, b'')
+
+    def testPipelining(self):
+        self.connection.sendall(b'GET /first HTTP/1.1\r\n\r\nGET /empty HTTP/1.1\r\n\r\n'
+                                b'GET /second HTTP/1.1\r\nConnection: close\r\n\r\n')
+        carry, contents = b'', []
+        for _k in range(3):
+            headers, content, carry = readResponse(self.connection, carry)
+            contents.append(content)
+        self.assertEqual(contents, [b'first', b'', b'second'])
+        self.assertEqual(headers['Connection'], 'close')
+        self.assertEqual(self.connection.recv(1024), b'')
+
+    def testFile(self):
+        for uri in ('file', 'fileRange', 'fileClosed'):
+            self.connection.sendall(b'GET /' + uri.encode() + b' HTTP/1.1\r\n\r\n')
+            headers, content, carry = readResponse(self.connection)
+            self.assertEqual(headers['Connection'], 'keep-alive')
+            # The closed file is not sent, the content source is used instead.
+            if uri == 'fileClosed': self.assertEqual(content, uri.upper().encode())
+            else: self.assertEqual(content, uri.encode())
+            self.assertEqual(carry, b'')
+
+    def testFileTruncated(self):
+        self.connection.sendall(b'GET /fileTruncated HTTP/1.1\r\n\r\nGET /first HTTP/1.1\r\n\r\n')
+        data = b''
+        while True:
+            received = self.connection.recv(1024)
+            if not received: break
+            data += received
+        # The connection is dropped after the file content and the pipelined request is not handled.
+        self.assertTrue(data.endswith(b'\r\n\r\nfile'))
+        self.assertNotIn(b'first', data)
+
+    def testContentError(self):
+        self.connection.sendall(b'GET /error HTTP/1.1\r\n\r\nGET /first HTTP/1.1\r\n\r\n')
+        data = b''
+        while True:
+            received = self.connection.recv(1024)
+            if not received: break
+            data += received
+        # The chunked content is not terminated and the pipelined request is not handled.
+        self.assertIn(b'7\r\npartial\r\n', data)
+        self.assertNotIn(b'0\r\n\r\n', data)
+        self.assertNotIn(b'first', data)
+
 # --------------------------------------------------------------------
 
 if __name__ == '__main__': unittest.main()
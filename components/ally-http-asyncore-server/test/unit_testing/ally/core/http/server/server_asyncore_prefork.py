@@ -0,0 +1,114 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally core http
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the asyncore prefork server.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.core.http.server import server_asyncore_prefork
+from ally.core.http.server.server_asyncore import createPathProcessing
+from ally.core.http.server.server_asyncore_prefork import PreforkSupervisor
+from ally.core.spec.codes import Code, RESOURCE_FOUND
+from ally.design.context import Context, defines
+from ally.design.processor import HandlerProcessorProceed, Assembly
+from collections import Iterable
+from threading import Thread
+import os
+import socket
+import sys
+import unittest
+
+# --------------------------------------------------------------------
+
+class Response(Context):
+    code = defines(Code)
+    headers = defines(dict)
+
+class ResponseContent(Context):
+    source = defines(Iterable)
+
+class ProcessHandler(HandlerProcessorProceed):
+    '''
+    Responds with the process id of the worker that handled the request.
+    '''
+
+    def process(self, response:Response, responseCnt:ResponseContent, **keyargs):
+        content = str(os.getpid()).encode()
+        response.code = RESOURCE_FOUND
+        response.headers = {'Content-Length': str(len(content))}
+        responseCnt.source = (content,)
+
+def request(address):
+    '''
+    Makes a request on a new connection and provides the response content.
+    '''
+    connection = socket.create_connection(address, 5)
+    try:
+        connection.sendall(b'GET /pid HTTP/1.1\r\nConnection: close\r\n\r\n')
+        data = b''
+        while True:
+            received = connection.recv(1024)
+            if not received: break
+            data += received
+    finally: connection.close()
+    return data.split(b'\r\n\r\n', 1)[1]
+
+def serveFailed(*args):
+    '''
+    Worker that stops right after starting.
+    '''
+    sys.exit(3)
+
+# --------------------------------------------------------------------
+
+class TestPreforkSupervisor(unittest.TestCase):
+
+    def setUp(self):
+        assembly = Assembly()
+        assembly.add(ProcessHandler())
+        self.supervisor = PreforkSupervisor(('127.0.0.1', 0), createPathProcessing([('', assembly)]), 2,
+                                            reusePort=False)
+        self.supervisor.checkInterval = 0.1
+
+    def tearDown(self):
+        self.supervisor.close()
+
+    def testInheritedListener(self):
+        thread = Thread(target=self.supervisor.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+        address = self.supervisor.listener.getsockname()
+        pids = set(int(request(address)) for _k in range(6))
+        workers = set(process.pid for process in self.supervisor.processes)
+        self.assertEqual(len(workers), 2)
+        self.assertTrue(pids and pids <= workers)
+        self.assertTrue(all(process.is_alive() for process in self.supervisor.processes))
+
+        self.supervisor.close()
+        thread.join(5)
+        self.assertFalse(thread.is_alive())
+        self.assertFalse(any(process.is_alive() for process in self.supervisor.processes))
+
+    def testWorkersFailed(self):
+        serveWorker = server_asyncore_prefork.serveWorker
+        server_asyncore_prefork.serveWorker = serveFailed
+        try: self.assertRaises(Exception, self.supervisor.serve_forever)
+        finally: server_asyncore_prefork.serveWorker = serveWorker
+        self.assertEqual(self.supervisor.processes, [None, None])
+        self.assertTrue(all(self.supervisor._failures))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -155,14 +155,59 @@ class ContextualProceed(Processor):
         assert 'self' == fnArgs.args[0], \
         'The processor needs to be tagged in a class definition (needs self as the first argument)'
 
-        def call(chain, **keyargs):
-            assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
-            function(**keyargs)
-            chain.proceed()
-        assert isfunction(function) or ismethod(function), 'Invalid function %s' % function
         cd = function.__code__
-        super().__init__(Contextual.contextsFrom(fnArgs.args[1:], fnArgs.annotations), call, function.__name__,
-                         cd.co_filename, cd.co_firstlineno)
+        super().__init__(Contextual.contextsFrom(fnArgs.args[1:], fnArgs.annotations), CallProceed(function),
+                         function.__name__, cd.co_filename, cd.co_firstlineno)
+
+class CallProceed:
+    '''
+    The chain call for a processor function that always proceeds, this calls can be compiled in segments that
+    are executed by a single chain call.
+    '''
+    __slots__ = ('function',)
+
+    def __init__(self, function):
+        '''
+        Construct the proceed call.
+        
+        @param function: callable
+            The function to be called with the chain key arguments.
+        '''
+        assert callable(function), 'Invalid function %s' % function
+        self.function = function
+
+    def __call__(self, chain, **keyargs):
+        assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
+        self.function(**keyargs)
+        chain.proceed()
+
+    def __str__(self): return '<%s %s>' % (self.__class__.__name__, self.function)
+
+class CallProceedSegment:
+    '''
+    The chain call for a segment of consecutive processor functions that always proceed, the functions are executed
+    in a flat loop without going through the chain for each of them.
+    '''
+    __slots__ = ('functions',)
+
+    def __init__(self, functions):
+        '''
+        Construct the proceed segment call.
+        
+        @param functions: tuple(callable)
+            The functions to be called in order with the chain key arguments.
+        '''
+        assert isinstance(functions, tuple), 'Invalid functions %s' % functions
+        if __debug__:
+            for function in functions: assert callable(function), 'Invalid function %s' % function
+        self.functions = functions
+
+    def __call__(self, chain, **keyargs):
+        assert isinstance(chain, Chain), 'Invalid processors chain %s' % chain
+        for function in self.functions: function(**keyargs)
+        chain.proceed()
+
+    def __str__(self): return '<%s %s>' % (self.__class__.__name__, ', '.join(str(fnc) for fnc in self.functions))
 
 # --------------------------------------------------------------------
 
@@ -189,6 +234,23 @@ class Processing:
 
         self.contexts = contexts
         self.calls = deque()
+
+    def compile(self):
+        '''
+        Compiles the consecutive proceed calls of this processing into segments that are executed by a single chain
+        call, the calls that require the chain (that might branch, call back or stop the processing) are kept as they are.
+        '''
+        calls, segment = deque(), []
+        for call in self.calls:
+            if isinstance(call, CallProceed):
+                segment.append(call.function)
+                continue
+            if segment:
+                calls.append(compileSegment(segment))
+                segment = []
+            calls.append(call)
+        if segment: calls.append(compileSegment(segment))
+        self.calls = calls
         
 class Chain:
     '''
@@ -428,16 +490,39 @@ ONLY_AVAILABLE = 1 << 3
 # Assembly create flag that dictates that only the available processors should be used.
 CREATE_REPORT = 1 << 4
 # Assembly create flag that dictates that a report should be created, this will modify the return value for the create.
+NO_COMPILE = 1 << 5
+# Assembly create flag that dictates that the proceed processors should not be compiled in segments, useful for debugging.
 
 class AssemblyError(Exception):
     '''
     Raised when there is a assembly problem.
     '''
 
+class IProcessorProfiler(metaclass=abc.ABCMeta):
+    '''
+    Specification for a profiler of the processors executed by chains.
+    '''
+
+    @abc.abstractmethod
+    def profile(self, processor, call):
+        '''
+        Provides the call that profiles the provided processor call.
+        
+        @param processor: Processor
+            The processor of the call, the name, fileName and lineNumber are used for identifying the processor.
+        @param call: callable
+            The call to profile, either the processor chain call or the function of a proceed processor.
+        @return: callable
+            The call to use instead of the provided call, it needs to have the same signature.
+        '''
+
 class Assembly:
     '''
     The assembly provides a container for the processors.
     '''
+    
+    profiler = None
+    # The profiler (IProcessorProfiler) used for the processing created by the assemblies, if None no profiling is made.
 
     def __init__(self):
         '''
@@ -548,7 +633,16 @@ class Assembly:
         processing = Processing(assContext.create())
         for processor in processors:
             assert isinstance(processor, Processor), 'Invalid processor %s' % processor
+            index = len(processing.calls)
             processor.register(processing)
+            if self.profiler is not None:
+                assert isinstance(self.profiler, IProcessorProfiler), 'Invalid profiler %s' % self.profiler
+                for k in range(index, len(processing.calls)):
+                    call = processing.calls[k]
+                    if isinstance(call, CallProceed): call = CallProceed(self.profiler.profile(processor, call.function))
+                    else: call = self.profiler.profile(processor, call)
+                    processing.calls[k] = call
+        if not flag & NO_COMPILE: processing.compile()
 
         if flag & CREATE_REPORT:
             report = []
@@ -984,6 +1078,19 @@ class AssemblyAttribute:
 
 # --------------------------------------------------------------------
 
+def compileSegment(functions):
+    '''
+    Provides the chain call for the provided proceed functions.
+    
+    @param functions: list[callable]
+        The functions of the proceed processors.
+    @return: callable
+        The chain call.
+    '''
+    assert isinstance(functions, list) and functions, 'Invalid functions %s' % functions
+    if len(functions) == 1: return CallProceed(functions[0])
+    return CallProceedSegment(tuple(functions))
+
 def location(processor):
     '''
     Provides a processor location message used for exceptions.
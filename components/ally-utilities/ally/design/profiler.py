@@ -0,0 +1,123 @@
+'''
+Created on Oct 18, 2012
+
+@package: utilities
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the profiler that records the processors execution times.
+'''
+
+from ally.design.processor import IProcessorProfiler, Processor
+from bisect import bisect_left
+from threading import Lock
+import time
+
+# --------------------------------------------------------------------
+
+class ProcessorProfiler(IProcessorProfiler):
+    '''
+    Implementation for @see: IProcessorProfiler that records the execution time and call counts for each processor,
+    the processors are identified by name, file name and line number.
+    '''
+
+    clock = getattr(time, 'perf_counter', time.time)
+    # The clock used for measuring the execution time, the performance counter is not available before Python 3.3.
+
+    buckets = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+    # The histogram buckets upper limits in seconds, the last bucket contains all the times above the last limit.
+
+    def __init__(self):
+        '''
+        Construct the processor profiler.
+        '''
+        assert isinstance(self.buckets, tuple), 'Invalid buckets %s' % self.buckets
+        assert callable(self.clock), 'Invalid clock %s' % self.clock
+        self._records = {}
+        self._lock = Lock()
+
+    def profile(self, processor, call):
+        '''
+        @see: IProcessorProfiler.profile
+        '''
+        assert isinstance(processor, Processor), 'Invalid processor %s' % processor
+        assert callable(call), 'Invalid call %s' % call
+
+        key = (processor.name, processor.fileName, processor.lineNumber)
+        with self._lock:
+            record = self._records.get(key)
+            if record is None: record = self._records[key] = ProfileRecord(len(self.buckets) + 1)
+
+        buckets, lock, clock = self.buckets, self._lock, self.clock
+        def profiled(*args, **keyargs):
+            start = clock()
+            try: return call(*args, **keyargs)
+            finally:
+                elapsed = clock() - start
+                with lock: record.add(elapsed, bisect_left(buckets, elapsed))
+        return profiled
+
+    def records(self):
+        '''
+        Provides a snapshot of the profiling records.
+
+        @return: dictionary{tuple(string, string, integer), ProfileRecord}
+            The records indexed by a tuple containing the processor name, file name and line number.
+        '''
+        with self._lock: return {key: record.copy() for key, record in self._records.items()}
+
+    def reset(self):
+        '''
+        Resets all the profiling records.
+        '''
+        with self._lock:
+            for record in self._records.values(): record.clear()
+
+class ProfileRecord:
+    '''
+    Contains the aggregated profiling data for a processor.
+    '''
+    __slots__ = ('count', 'total', 'minimum', 'maximum', 'histogram')
+
+    def __init__(self, size):
+        '''
+        Construct the record.
+
+        @param size: integer
+            The number of histogram buckets.
+        '''
+        assert isinstance(size, int), 'Invalid size %s' % size
+        self.histogram = [0] * size
+        self.clear()
+
+    def add(self, elapsed, bucket):
+        '''
+        Adds a new execution time to the record.
+
+        @param elapsed: float
+            The execution time in seconds.
+        @param bucket: integer
+            The index of the histogram bucket for the time.
+        '''
+        self.count += 1
+        self.total += elapsed
+        if self.minimum is None or elapsed < self.minimum: self.minimum = elapsed
+        if self.maximum is None or elapsed > self.maximum: self.maximum = elapsed
+        self.histogram[bucket] += 1
+
+    def clear(self):
+        '''
+        Clears the record data.
+        '''
+        self.count, self.total, self.minimum, self.maximum = 0, 0.0, None, None
+        for k in range(0, len(self.histogram)): self.histogram[k] = 0
+
+    def copy(self):
+        '''
+        Provides a copy of the record.
+        '''
+        record = ProfileRecord(len(self.histogram))
+        record.count, record.total, record.minimum, record.maximum = self.count, self.total, self.minimum, self.maximum
+        record.histogram[:] = self.histogram
+        return record
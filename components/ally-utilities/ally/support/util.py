@@ -110,6 +110,6 @@ def lastCheck(iterator):
             yield False, item
             item = itemNext
         except StopIteration:
-            if stop: raise
+            if stop: return
             stop = True
             yield True, item
@@ -0,0 +1,76 @@
+'''
+Created on Jan 22, 2013
+
+@package: ally utilities
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the processing compilation.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.context import Context, defines
+from ally.design.processor import HandlerProcessorProceed, HandlerProcessor, \
+    Assembly, Chain, NO_COMPILE, CallProceed, CallProceedSegment
+import unittest
+
+# --------------------------------------------------------------------
+
+class Trace(Context):
+    calls = defines(list)
+    stop = defines(bool)
+
+class Record(HandlerProcessorProceed):
+
+    def __init__(self, name):
+        self.name = name
+        super().__init__()
+
+    def process(self, trace:Trace, **keyargs):
+        trace.calls.append(self.name)
+
+class Stop(HandlerProcessor):
+
+    def process(self, chain, trace:Trace, **keyargs):
+        assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+        trace.calls.append('stop')
+        if not trace.stop: chain.proceed()
+
+# --------------------------------------------------------------------
+
+class TestProcessing(unittest.TestCase):
+
+    def createAssembly(self):
+        assembly = Assembly()
+        assembly.add(Record('a'), Record('b'), Stop(), Record('c'), Record('d'), Record('e'))
+        return assembly
+
+    def execute(self, processing, stop):
+        trace = processing.contexts['trace']()
+        trace.calls, trace.stop = [], stop
+        chain = Chain(processing).process(trace=trace).doAll()
+        return trace.calls, chain.isConsumed()
+
+    def testCompile(self):
+        processing = self.createAssembly().create(trace=Trace)
+        self.assertEqual([type(call) for call in processing.calls], [CallProceedSegment, type(processing.calls[1]),
+                                                                    CallProceedSegment])
+        uncompiled = self.createAssembly().create(NO_COMPILE, trace=Trace)
+        self.assertEqual(len(uncompiled.calls), 6)
+        self.assertTrue(isinstance(uncompiled.calls[0], CallProceed))
+
+        for stop in (False, True):
+            self.assertEqual(self.execute(processing, stop), self.execute(uncompiled, stop))
+        self.assertEqual(self.execute(processing, False), (['a', 'b', 'stop', 'c', 'd', 'e'], True))
+        self.assertEqual(self.execute(processing, True), (['a', 'b', 'stop'], False))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,108 @@
+'''
+Created on Oct 18, 2012
+
+@package: ally utilities
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides testing for the processors profiler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.design.context import Context, defines
+from ally.design.processor import HandlerProcessorProceed, HandlerProcessor, \
+    Assembly, Chain
+from ally.design.profiler import ProcessorProfiler
+import unittest
+
+# --------------------------------------------------------------------
+
+class Clock:
+    '''
+    Clock that advances only when the processors are executed.
+    '''
+
+    def __init__(self): self.now = 0.0
+
+    def __call__(self): return self.now
+
+class Trace(Context):
+    clock = defines(Clock)
+    calls = defines(list)
+
+class Delay(HandlerProcessorProceed):
+
+    def __init__(self, delay):
+        self.delay = delay
+        super().__init__()
+
+    def process(self, trace:Trace, **keyargs):
+        trace.calls.append(self.delay)
+        trace.clock.now += self.delay
+
+class Proceed(HandlerProcessor):
+
+    def process(self, chain, trace:Trace, **keyargs):
+        assert isinstance(chain, Chain), 'Invalid chain %s' % chain
+        trace.calls.append('proceed')
+        trace.clock.now += 0.002
+        chain.proceed()
+
+# --------------------------------------------------------------------
+
+class TestProcessorProfiler(unittest.TestCase):
+
+    def testProfile(self):
+        clock = Clock()
+        profiler = ProcessorProfiler()
+        profiler.clock = clock
+
+        assembly = Assembly()
+        assembly.profiler = profiler
+        delay, proceed = Delay(0.00005), Proceed()
+        assembly.add(delay, proceed, Delay(0.2), Delay(3))
+        processing = assembly.create(trace=Trace)
+
+        for _k in range(2):
+            trace = processing.contexts['trace']()
+            trace.clock, trace.calls = clock, []
+            Chain(processing).process(trace=trace).doAll()
+            self.assertEqual(trace.calls, [0.00005, 'proceed', 0.2, 3])
+
+        records = profiler.records()
+        # The delay handlers share the processor function so they are recorded together.
+        self.assertEqual(len(records), 2)
+        recordDelay = records[(delay.processor.name, delay.processor.fileName, delay.processor.lineNumber)]
+        recordProceed = records[(proceed.processor.name, proceed.processor.fileName, proceed.processor.lineNumber)]
+
+        self.assertEqual(recordDelay.count, 6)
+        self.assertAlmostEqual(recordDelay.total, 6.4001)
+        self.assertAlmostEqual(recordDelay.minimum, 0.00005)
+        self.assertAlmostEqual(recordDelay.maximum, 3)
+        self.assertEqual(recordDelay.histogram, [2, 0, 0, 0, 0, 0, 0, 2, 0, 2])
+
+        self.assertEqual(recordProceed.count, 2)
+        self.assertAlmostEqual(recordProceed.total, 0.004)
+        self.assertEqual(recordProceed.histogram, [0, 0, 0, 2, 0, 0, 0, 0, 0, 0])
+
+        # The records are provided as snapshots.
+        recordDelay.clear()
+        self.assertEqual(profiler.records()[(delay.processor.name, delay.processor.fileName,
+                                             delay.processor.lineNumber)].count, 6)
+        profiler.reset()
+        self.assertTrue(all(record.count == 0 and not any(record.histogram) for record in profiler.records().values()))
+
+    def testClock(self):
+        self.assertTrue(callable(ProcessorProfiler.clock))
+        self.assertIsInstance(ProcessorProfiler.clock(), float)
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
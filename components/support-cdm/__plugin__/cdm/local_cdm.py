@@ -32,6 +32,11 @@ def use_linked_cdm():
     ''' Set to true when the files should not be copied into cdm'''
     return True
 
+@ioc.config
+def compress_content():
+    ''' Set to true in order to store a gzip compressed copy of the published content that is compressible'''
+    return False
+
 # --------------------------------------------------------------------
 # Creating the content delivery managers
 
@@ -46,5 +51,6 @@ def delivery() -> IDelivery:
 def contentDeliveryManager() -> ICDM:
     cdm = LocalFileSystemLinkCDM() if use_linked_cdm() else LocalFileSystemCDM()
     cdm.delivery = delivery()
+    cdm.compress = compress_content()
     return cdm
 
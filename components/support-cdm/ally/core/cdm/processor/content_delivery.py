@@ -11,6 +11,9 @@ Provides the content delivery handler.
 
 from ally.api.config import GET
 from ally.container.ioc import injected
+from ally.core.http.spec.codes import NOT_MODIFIED, PARTIAL_CONTENT, \
+    RANGE_NOT_SATISFIABLE
+from ally.core.http.spec.server import IDecoderHeader, IEncoderHeader
 from ally.core.spec.codes import METHOD_NOT_AVAILABLE, RESOURCE_FOUND, \
     RESOURCE_NOT_FOUND, Code
 from ally.design.context import Context, requires, defines
@@ -18,14 +21,19 @@ from ally.design.processor import Chain, Processor, Assembly, NO_VALIDATION, \
     Processing, Handler
 from ally.support.util_io import IOutputStream
 from ally.zip.util_zip import normOSPath, normZipPath
+from cdm.impl.link_index import linkIndexFor
+from cdm.impl.zip_pool import ZipFilePool
+from collections import Iterable
+from email.utils import formatdate, parsedate_tz, mktime_tz
 from functools import partial
+from io import BufferedReader
 from mimetypes import guess_type
-from os.path import isdir, isfile, join, dirname, normpath, sep
+from os.path import isdir, isfile, join, normpath, sep
 from urllib.parse import unquote
-from zipfile import ZipFile
-import json
+from uuid import uuid4
 import logging
 import os
+import time
 
 # --------------------------------------------------------------------
 
@@ -41,11 +49,14 @@ class Request(Context):
     scheme = requires(str)
     uri = requires(str)
     method = requires(int)
+    decoderHeader = requires(IDecoderHeader)
 
 class Response(Context):
     '''
     The response context.
     '''
+    # ---------------------------------------------------------------- Required
+    encoderHeader = requires(IEncoderHeader)
     # ---------------------------------------------------------------- Defined
     code = defines(Code, doc='''
     @rtype: Code
@@ -69,10 +80,14 @@ class ResponseContent(Context):
     The response context.
     '''
     # ---------------------------------------------------------------- Defined
-    source = defines(IOutputStream, doc='''
-    @rtype: IOutputStream
+    source = defines(IOutputStream, Iterable, doc='''
+    @rtype: IOutputStream|Iterable
     The generator that provides the response content in bytes.
     ''')
+    sourceFile = defines(tuple, doc='''
+    @rtype: tuple(file, integer, integer)
+    The file object, offset and number of bytes of the content if the content is delivered from a file.
+    ''')
     type = defines(str, doc='''
     @rtype: string
     The type for the streamed content.
@@ -90,18 +105,73 @@ class ContentDeliveryHandler(Handler):
     # The directory where the file repository is
     defaultContentType = 'application/octet-stream'
     # The default mime type to set on the content response if None could be guessed
-    _linkExt = '.link'
-    # Extension to mark the link files in the repository.
     _zipHeader = 'ZIP'
     # Marker used in the link file to indicate that a link is inside a zip file.
     _fsHeader = 'FS'
     # Marker used in the link file to indicate that a link is file system
     errorAssembly = Assembly
     # The error processors, this are used when the content is not available.
+    nameETag = 'ETag'
+    # The header name where the entity tag of the content is provided.
+    nameLastModified = 'Last-Modified'
+    # The header name where the last modified date of the content is provided.
+    nameIfNoneMatch = 'If-None-Match'
+    # The header name where the client provides the entity tags that it has.
+    nameIfModifiedSince = 'If-Modified-Since'
+    # The header name where the client provides the date of the content that it has.
+    nameIfRange = 'If-Range'
+    # The header name where the client provides the entity tag or date that the range request is conditioned by.
+    nameRange = 'Range'
+    # The header name where the client provides the requested byte ranges.
+    nameAcceptRanges = 'Accept-Ranges'
+    # The header name where the accepted range unit is provided.
+    nameContentRange = 'Content-Range'
+    # The header name where the delivered range is provided.
+    nameAcceptEncoding = 'Accept-Encoding'
+    # The header name where the client provides the content encodings that it accepts.
+    nameContentEncoding = 'Content-Encoding'
+    # The header name where the encoding of the delivered content is provided.
+    nameVary = 'Vary'
+    # The header name where the request headers that the delivered content depends on are provided.
+    encodingCompressed = 'gzip'
+    # The content encoding of the compressed siblings.
+    extensionCompressed = '.gz'
+    # The extension of the compressed siblings stored by the content delivery manager.
+    rangeUnit = 'bytes'
+    # The range unit supported by the delivery.
+    typeMultipleRanges = 'multipart/byteranges; boundary=%s'
+    # The content type used for delivering multiple ranges.
+    maximumRanges = 20
+    # The maximum number of ranges delivered, if more ranges are requested the entire content is delivered.
+    bufferSize = 1024 * 64
+    # The buffer size used in reading the delivered ranges.
+    zipPoolSize = 20
+    # The maximum number of ZIP files kept opened for delivering the ZIP links content.
 
     def __init__(self):
         assert isinstance(self.repositoryPath, str), 'Invalid repository path value %s' % self.repositoryPath
         assert isinstance(self.defaultContentType, str), 'Invalid default content type %s' % self.defaultContentType
+        assert isinstance(self.nameETag, str), 'Invalid entity tag name %s' % self.nameETag
+        assert isinstance(self.nameLastModified, str), 'Invalid last modified name %s' % self.nameLastModified
+        assert isinstance(self.nameIfNoneMatch, str), 'Invalid if none match name %s' % self.nameIfNoneMatch
+        assert isinstance(self.nameIfModifiedSince, str), \
+        'Invalid if modified since name %s' % self.nameIfModifiedSince
+        assert isinstance(self.nameIfRange, str), 'Invalid if range name %s' % self.nameIfRange
+        assert isinstance(self.nameRange, str), 'Invalid range name %s' % self.nameRange
+        assert isinstance(self.nameAcceptRanges, str), 'Invalid accept ranges name %s' % self.nameAcceptRanges
+        assert isinstance(self.nameContentRange, str), 'Invalid content range name %s' % self.nameContentRange
+        assert isinstance(self.nameAcceptEncoding, str), 'Invalid accept encoding name %s' % self.nameAcceptEncoding
+        assert isinstance(self.nameContentEncoding, str), \
+        'Invalid content encoding name %s' % self.nameContentEncoding
+        assert isinstance(self.nameVary, str), 'Invalid vary name %s' % self.nameVary
+        assert isinstance(self.encodingCompressed, str), 'Invalid compressed encoding %s' % self.encodingCompressed
+        assert isinstance(self.extensionCompressed, str), 'Invalid compressed extension %s' % self.extensionCompressed
+        assert isinstance(self.rangeUnit, str), 'Invalid range unit %s' % self.rangeUnit
+        assert isinstance(self.typeMultipleRanges, str), 'Invalid multiple ranges type %s' % self.typeMultipleRanges
+        assert isinstance(self.maximumRanges, int) and self.maximumRanges > 0, \
+        'Invalid maximum ranges %s' % self.maximumRanges
+        assert isinstance(self.bufferSize, int), 'Invalid buffer size %s' % self.bufferSize
+        assert isinstance(self.zipPoolSize, int), 'Invalid ZIP pool size %s' % self.zipPoolSize
         self.repositoryPath = normpath(self.repositoryPath)
         if not os.path.exists(self.repositoryPath): os.makedirs(self.repositoryPath)
         assert isdir(self.repositoryPath) and os.access(self.repositoryPath, os.R_OK), \
@@ -115,6 +185,8 @@ class ContentDeliveryHandler(Handler):
                                    'process', self.process.__code__.co_filename, self.process.__code__.co_firstlineno))
 
         self._linkTypes = {self._fsHeader:self._processLink, self._zipHeader:self._processZiplink}
+        self._linkIndex = linkIndexFor(self.repositoryPath)
+        self._zipPool = ZipFilePool(self.zipPoolSize)
 
     def process(self, errorProcessing, chain, request, response, responseCnt, **keyargs):
         '''
@@ -138,49 +210,276 @@ class ContentDeliveryHandler(Handler):
             if not entryPath.startswith(self.repositoryPath):
                 response.code, response.text = RESOURCE_NOT_FOUND, 'Out of repository path'
             else:
-                # Initialize the read file handler with None value
-                # This will be set upon successful file open
-                rf = None
+                # Initialize the content entry with None value
+                # This will be set upon successful content locating
+                entry, encoding = None, None
                 if isfile(entryPath):
-                    rf, size = open(entryPath, 'rb'), os.path.getsize(entryPath)
+                    entry = self._processFile(entryPath)
+                    compressed = self._processCompressed(request, response, entryPath, entry)
+                    if compressed is not None: entry, encoding = compressed, self.encodingCompressed
                 else:
-                    linkPath = entryPath
-                    while len(linkPath) > len(self.repositoryPath):
-                        if isfile(linkPath + self._linkExt):
-                            with open(linkPath + self._linkExt) as f: links = json.load(f)
-                            subPath = normOSPath(entryPath[len(linkPath):]).lstrip(sep)
+                    found = self._linkIndex.findLinks(entryPath)
+                    if found is not None:
+                        linkPath, links = found
+                        # make sure the subpath is normalized and uses the OS separator
+                        subPath = normOSPath(entryPath[len(linkPath):]).lstrip(sep)
+                        if not self._linkIndex.isDeleted(join(linkPath, subPath)):
                             for linkType, *data in links:
                                 if linkType in self._linkTypes:
-                                    # make sure the subpath is normalized and uses the OS separator
-                                    if not self._isPathDeleted(join(linkPath, subPath)):
-                                        entry = self._linkTypes[linkType](subPath, *data)
-                                        if entry is not None:
-                                            rf, size = entry
-                                            break
-                            break
-                        subLinkPath = dirname(linkPath)
-                        if subLinkPath == linkPath:
-                            break
-                        linkPath = subLinkPath
-        
-                if rf is None:
+                                    entry = self._linkTypes[linkType](subPath, *data)
+                                    if entry is not None: break
+
+                if entry is None:
                     response.code, response.text = METHOD_NOT_AVAILABLE, 'Invalid content resource'
-                else:
-                    response.code, response.text = RESOURCE_FOUND, 'Resource found'
-                    responseCnt.source = rf
-                    responseCnt.length = size
-                    responseCnt.type, _encoding = guess_type(entryPath)
-                    if not responseCnt.type: responseCnt.type = self.defaultContentType
-                    return
+                elif self._deliver(request, response, responseCnt, entryPath, *entry, encoding=encoding): return
         
         chain.branch(errorProcessing)
 
     # ----------------------------------------------------------------
 
+    def _deliver(self, request, response, responseCnt, entryPath, opener, size, tag, modified, encoding=None):
+        '''
+        Delivers the located content, the content is not delivered if the client already has it and only the requested
+        ranges are delivered.
+        
+        @param encoding: string|None
+            The content encoding of the delivered content, None if the content is delivered as it is.
+        @return: boolean
+            True if the content is delivered, False if an error needs to be delivered.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        assert isinstance(responseCnt, ResponseContent), 'Invalid response content %s' % responseCnt
+        assert callable(opener), 'Invalid opener %s' % opener
+        assert isinstance(size, int), 'Invalid size %s' % size
+        decoder, encoder = request.decoderHeader, response.encoderHeader
+        assert isinstance(decoder, IDecoderHeader), 'Invalid header decoder %s' % decoder
+        assert isinstance(encoder, IEncoderHeader), 'Invalid header encoder %s' % encoder
+
+        encoder.encode(self.nameETag, tag)
+        encoder.encode(self.nameLastModified, formatdate(modified, usegmt=True))
+        encoder.encode(self.nameAcceptRanges, self.rangeUnit)
+
+        if self._isNotModified(decoder, tag, modified):
+            response.code, response.text = NOT_MODIFIED, 'Not modified'
+            return True
+
+        ranges, value = None, decoder.retrieve(self.nameRange)
+        if value and self._isRangeValid(decoder, tag, modified): ranges = self._parseRanges(value, size)
+
+        contentType, _encoding = guess_type(entryPath)
+        if not contentType: contentType = self.defaultContentType
+
+        if ranges is not None and not ranges:
+            encoder.encode(self.nameContentRange, '%s */%s' % (self.rangeUnit, size))
+            response.code, response.text = RANGE_NOT_SATISFIABLE, 'Range not satisfiable'
+            return False
+        if encoding: encoder.encode(self.nameContentEncoding, encoding)
+
+        if ranges is None:
+            response.code, response.text = RESOURCE_FOUND, 'Resource found'
+            content = opener()
+            if isinstance(content, BufferedReader):
+                # The server sends the file directly, the source opens its own file only if is used instead.
+                responseCnt.sourceFile = (content, 0, size)
+                responseCnt.source = self._readRange(content, 0, size - 1, opener)
+            else: responseCnt.source = content
+            responseCnt.length = size
+            responseCnt.type = contentType
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            encoder.encode(self.nameContentRange, '%s %s-%s/%s' % (self.rangeUnit, start, end, size))
+            response.code, response.text = PARTIAL_CONTENT, 'Partial content'
+            content = opener()
+            if isinstance(content, BufferedReader):
+                responseCnt.sourceFile = (content, start, end - start + 1)
+                responseCnt.source = self._readRange(content, start, end, opener)
+            else: responseCnt.source = self._readRange(content, start, end)
+            responseCnt.length = end - start + 1
+            responseCnt.type = contentType
+        else:
+            boundary = uuid4().hex
+            parts, length = [], 0
+            for start, end in ranges:
+                header = ('\r\n--%s\r\nContent-Type: %s\r\n%s: %s %s-%s/%s\r\n\r\n' %
+                          (boundary, contentType, self.nameContentRange, self.rangeUnit, start, end, size)).encode('ascii')
+                parts.append((header, start, end))
+                length += len(header) + end - start + 1
+            closing = ('\r\n--%s--\r\n' % boundary).encode('ascii')
+
+            response.code, response.text = PARTIAL_CONTENT, 'Partial content'
+            responseCnt.source = self._readRanges(opener, parts, closing)
+            responseCnt.length = length + len(closing)
+            responseCnt.type = self.typeMultipleRanges % boundary
+        return True
+
+    def _processCompressed(self, request, response, entryPath, entry):
+        '''
+        Provides the content entry for the compressed sibling of the repository file, if there is an up to date sibling
+        and the client accepts the compressed encoding.
+        
+        @return: tuple|None
+            The content entry of the compressed sibling, None if the file needs to be delivered as it is.
+        '''
+        assert isinstance(request, Request), 'Invalid request %s' % request
+        assert isinstance(response, Response), 'Invalid response %s' % response
+        compressedPath = entryPath + self.extensionCompressed
+        if not isfile(compressedPath): return
+
+        response.encoderHeader.encode(self.nameVary, self.nameAcceptEncoding)
+        if not self._isEncodingAccepted(request.decoderHeader, self.encodingCompressed): return
+        opener, size, tag, modified = self._processFile(compressedPath)
+        # The sibling is not used if the file was published again after the sibling was stored.
+        if modified < entry[3]: return
+        return opener, size, '%s-%s"' % (tag[:-1], self.encodingCompressed), entry[3]
+
+    def _isEncodingAccepted(self, decoder, encoding):
+        '''
+        Checks if the client accepts the content encoding, based on the accept encoding header.
+        '''
+        assert isinstance(decoder, IDecoderHeader), 'Invalid header decoder %s' % decoder
+
+        accepted = False
+        for name, attributes in decoder.decode(self.nameAcceptEncoding) or ():
+            try: quality = float(attributes.get('q') or 1)
+            except ValueError: quality = 0
+            name = name.lower()
+            if name == encoding or name == 'x-' + encoding: return quality > 0
+            if name == '*': accepted = quality > 0
+        return accepted
+
+    def _isNotModified(self, decoder, tag, modified):
+        '''
+        Checks if the client already has the content, based on the conditional request headers.
+        '''
+        assert isinstance(decoder, IDecoderHeader), 'Invalid header decoder %s' % decoder
+
+        value = decoder.retrieve(self.nameIfNoneMatch)
+        if value:
+            tags = set(tagClient.strip() for tagClient in value.split(','))
+            return '*' in tags or tag in tags or 'W/' + tag in tags
+
+        since = self._parseDate(decoder.retrieve(self.nameIfModifiedSince))
+        return since is not None and int(modified) <= since
+
+    def _isRangeValid(self, decoder, tag, modified):
+        '''
+        Checks if the range request applies to the content, based on the range condition header.
+        '''
+        assert isinstance(decoder, IDecoderHeader), 'Invalid header decoder %s' % decoder
+
+        value = decoder.retrieve(self.nameIfRange)
+        if not value: return True
+        value = value.strip()
+        if value.startswith('"'): return value == tag
+        return self._parseDate(value) == int(modified)
+
+    def _parseRanges(self, value, size):
+        '''
+        Parses the range header value.
+        
+        @return: list[tuple(integer, integer)]|None
+            The sorted and merged inclusive ranges to be delivered, empty if none of the ranges can be satisfied or None
+            if the range header needs to be ignored, also ignored if there are more ranges then the maximum allowed.
+        '''
+        assert isinstance(value, str), 'Invalid value %s' % value
+        unit, _sep, specs = value.partition('=')
+        if unit.strip().lower() != self.rangeUnit: return
+
+        ranges = []
+        for spec in specs.split(','):
+            first, sep, last = spec.strip().partition('-')
+            if not sep: return
+            try:
+                if first:
+                    start, end = int(first), int(last) if last else size - 1
+                    if last and end < start: return
+                else:
+                    start, end = size - int(last), size - 1
+                    if start == size: continue
+            except ValueError: return
+            if start >= size: continue
+            ranges.append((max(start, 0), min(end, size - 1)))
+
+        ranges.sort()
+        merged = []
+        for start, end in ranges:
+            if merged and start <= merged[-1][1] + 1: merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+            else: merged.append((start, end))
+        if len(merged) > self.maximumRanges: return
+        return merged
+
+    def _parseDate(self, value):
+        '''
+        Parses the HTTP date header value.
+        
+        @return: integer|None
+            The time stamp of the date or None if the value is not a valid date.
+        '''
+        if not value: return
+        date = parsedate_tz(value)
+        if date: return mktime_tz(date)
+
+    def _readRange(self, content, start, end, opener=None):
+        '''
+        Provides a generator that reads the range from the content, the content is closed at the end.
+        
+        @param opener: callable|None
+            If provided the content is the file given to the server, once the reading starts the server is not using
+            the file anymore so the file is closed and the range is read from a content opened again.
+        '''
+        if opener is not None:
+            content.close()
+            content = opener()
+        with content:
+            for bytes in self._readPart(content, 0, start, end): yield bytes
+
+    def _readRanges(self, opener, parts, closing):
+        '''
+        Provides a generator that reads the ranges from the content as multiple parts, the ranges are sorted so they
+        are read forward from a single opened content.
+        '''
+        with opener() as content:
+            position = 0
+            for header, start, end in parts:
+                yield header
+                for bytes in self._readPart(content, position, start, end): yield bytes
+                position = end + 1
+        yield closing
+
+    def _readPart(self, content, position, start, end):
+        '''
+        Provides a generator that reads the range from the content that is at the provided position, the content is
+        seeked to the start of the range if possible otherwise the bytes before the range are skipped.
+        '''
+        if content.seekable(): content.seek(start)
+        else:
+            skip = start - position
+            while skip > 0:
+                skipped = content.read(min(skip, self.bufferSize))
+                if not skipped: return
+                skip -= len(skipped)
+
+        count = end - start + 1
+        while count > 0:
+            bytes = content.read(min(count, self.bufferSize))
+            if not bytes: break
+            count -= len(bytes)
+            yield bytes
+
+    # ----------------------------------------------------------------
+
+    def _processFile(self, filePath):
+        '''
+        Provides the content entry for a file from the repository.
+        '''
+        stat = os.stat(filePath)
+        tag = '"%x-%x"' % (int(stat.st_mtime), stat.st_size)
+        return partial(open, filePath, 'rb'), stat.st_size, tag, stat.st_mtime
+
     def _processLink(self, subPath, linkedFilePath):
         '''
-        Reads a link description file and returns a file handler to
-        the linked file.
+        Reads a link description file and returns the content entry for the linked file.
         '''
         # make sure the file path uses the OS separator
         linkedFilePath = normOSPath(linkedFilePath)
@@ -190,33 +489,19 @@ class ContentDeliveryHandler(Handler):
             resPath = linkedFilePath
         else:
             return None
-        if isfile(resPath):
-            return open(resPath, 'rb'), os.path.getsize(resPath)
+        if isfile(resPath): return self._processFile(resPath)
 
     def _processZiplink(self, subPath, zipFilePath, inFilePath):
         '''
-        Reads a link description file and returns a file handler to
-        the linked file inside the ZIP archive.
+        Reads a link description file and returns the content entry for the linked file inside the ZIP archive.
         '''
         # make sure the ZIP file path uses the OS separator
         zipFilePath = normOSPath(zipFilePath)
         # convert the internal ZIP path to OS format in order to use standard path functions
         inFilePath = normOSPath(inFilePath)
-        zipFile = ZipFile(zipFilePath)
+        zipFile = self._zipPool.open(zipFilePath)
         # resource internal ZIP path should be in ZIP format
-        resPath = normZipPath(join(inFilePath, subPath))
-        if resPath in zipFile.NameToInfo:
-            return zipFile.open(resPath, 'r'), zipFile.getinfo(resPath).file_size
-
-    def _isPathDeleted(self, path):
-        '''
-        Returns true if the given path was deleted or was part of a directory
-        that was deleted.
-        '''
-        path = normpath(path)
-        while len(path) > len(self.repositoryPath):
-            if isfile(path + '.deleted'): return True
-            subPath = dirname(path)
-            if subPath == path: break
-            path = subPath
-        return False
+        info = zipFile.NameToInfo.get(normZipPath(join(inFilePath, subPath)))
+        if info is not None:
+            tag, modified = '"%x-%x"' % (info.CRC, info.file_size), time.mktime(info.date_time + (0, 0, -1))
+            return partial(zipFile.open, info, 'r'), info.file_size, tag, modified
@@ -0,0 +1,251 @@
+'''
+Created on Jan 18, 2013
+
+@package: support cdm
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the in memory index of the link files and delete marks from the local file system repository.
+'''
+
+from collections import OrderedDict
+from os.path import dirname, basename, join, normpath
+from threading import Lock
+import json
+import logging
+import os
+import time
+
+# --------------------------------------------------------------------
+
+log = logging.getLogger(__name__)
+
+# --------------------------------------------------------------------
+
+class LinkIndex:
+    '''
+    Provides the index of the link files and delete marks for a repository. The index keeps for each repository
+    directory the links and the delete marks that it contains, a directory is loaded again if the modification time or
+    inode of the directory changed or if the inode, size or modification time of one of its link files changed. Since
+    the modification times have a limited granularity a directory that was modified close to the time it was loaded
+    is loaded again until the modification is old enough to be trusted.
+    '''
+
+    def __init__(self, repositoryPath, linkExt='.link', deletedExt='.deleted', revalidate=1, size=10000, granularity=2):
+        '''
+        Construct the link index.
+
+        @param repositoryPath: string
+            The repository path to index.
+        @param linkExt: string
+            The extension of the link files.
+        @param deletedExt: string
+            The extension of the delete mark files.
+        @param revalidate: integer|float
+            The number of seconds after which the modification time of an indexed directory is checked again.
+        @param size: integer
+            The maximum number of directories to be indexed.
+        @param granularity: integer|float
+            The number of seconds of the file system modification time granularity, a directory modified within this
+            time before it was loaded is loaded again on the next check.
+        '''
+        assert isinstance(repositoryPath, str), 'Invalid repository path %s' % repositoryPath
+        assert isinstance(linkExt, str), 'Invalid link extension %s' % linkExt
+        assert isinstance(deletedExt, str), 'Invalid deleted extension %s' % deletedExt
+        assert isinstance(revalidate, (int, float)), 'Invalid revalidate %s' % revalidate
+        assert isinstance(size, int) and size > 0, 'Invalid size %s' % size
+        assert isinstance(granularity, (int, float)), 'Invalid granularity %s' % granularity
+
+        self.repositoryPath = repositoryPath
+        self.linkExt = linkExt
+        self.deletedExt = deletedExt
+        self.revalidate = revalidate
+        self.size = size
+        self.granularity = granularity
+
+        self._directories = OrderedDict()
+        self._lock = Lock()
+
+    def findLinks(self, path):
+        '''
+        Finds the closest link file for the path, the path itself or one of its parents.
+
+        @param path: string
+            The full path to find the links for.
+        @return: tuple(string, list[list])|None
+            The path that has the link file and the links from the file, None if there is no link file for the path.
+        '''
+        assert isinstance(path, str), 'Invalid path %s' % path
+        linkPath = path.rstrip(os.sep)
+        while len(linkPath) > len(self.repositoryPath):
+            links = self._directoryFor(dirname(linkPath)).links.get(basename(linkPath))
+            if links is not None: return linkPath, links
+            subLinkPath = dirname(linkPath)
+            if subLinkPath == linkPath: break
+            linkPath = subLinkPath
+
+    def isDeleted(self, path):
+        '''
+        Checks if the path was deleted or is part of a deleted directory.
+
+        @param path: string
+            The full path to check.
+        @return: boolean
+            True if the path is marked as deleted, False otherwise.
+        '''
+        assert isinstance(path, str), 'Invalid path %s' % path
+        path = normpath(path)
+        while len(path) > len(self.repositoryPath):
+            if basename(path) in self._directoryFor(dirname(path)).deleted: return True
+            subPath = dirname(path)
+            if subPath == path: break
+            path = subPath
+        return False
+
+    def invalidate(self, path):
+        '''
+        Invalidates the index for the changed path, the directory containing the path and all the directories
+        under the path are loaded again on the next lookup.
+
+        @param path: string
+            The full path of the changed file or directory.
+        '''
+        assert isinstance(path, str), 'Invalid path %s' % path
+        path = normpath(path)
+        with self._lock:
+            self._directories.pop(dirname(path), None)
+            prefix = join(path, '')
+            for dirPath in [dirPath for dirPath in self._directories
+                            if dirPath == path or dirPath.startswith(prefix)]:
+                del self._directories[dirPath]
+
+    def writeLinks(self, linkPath, links):
+        '''
+        Writes the link file by replacing it, this way the link file is never read partially written.
+
+        @param linkPath: string
+            The full path that has the link file, without the link extension.
+        @param links: list[list]
+            The links to write.
+        '''
+        assert isinstance(linkPath, str), 'Invalid link path %s' % linkPath
+        assert isinstance(links, list), 'Invalid links %s' % links
+        linkFile = linkPath + self.linkExt
+        tmpFile = linkFile + '.tmp'
+        with open(tmpFile, 'w') as f: json.dump(links, f)
+        # Windows does not allow renaming over an existing file.
+        if os.name == 'nt' and os.path.isfile(linkFile): os.remove(linkFile)
+        os.rename(tmpFile, linkFile)
+        self.invalidate(linkFile)
+
+    # ----------------------------------------------------------------
+
+    def _directoryFor(self, dirPath):
+        '''
+        Provides the indexed directory for the directory path, the directory is loaded if is not indexed or if it was
+        modified.
+        '''
+        now = time.time()
+        with self._lock:
+            directory = self._directories.get(dirPath)
+            if directory is not None:
+                assert isinstance(directory, Directory)
+                self._directories.move_to_end(dirPath)
+                if now < directory.checked + self.revalidate: return directory
+
+        try: stat = os.stat(dirPath)
+        except OSError: stat = None
+        if directory is None or not self._isValid(directory, dirPath, stat): directory = self._load(dirPath, stat)
+        directory.checked = now
+
+        with self._lock:
+            self._directories[dirPath] = directory
+            self._directories.move_to_end(dirPath)
+            while len(self._directories) > self.size: self._directories.popitem(last=False)
+        return directory
+
+    def _isValid(self, directory, dirPath, stat):
+        '''
+        Checks if the indexed directory still reflects the directory on the file system.
+        '''
+        assert isinstance(directory, Directory), 'Invalid directory %s' % directory
+        if stat is None: return directory.modified is None
+        if directory.modified != (stat.st_mtime, stat.st_ino): return False
+        # A change made in the same time stamp as the loading is not reflected in the modification time.
+        if stat.st_mtime + self.granularity > directory.loaded: return False
+        for name, signature in directory.files.items():
+            try: fileStat = os.stat(join(dirPath, name))
+            except OSError: return False
+            if signature != (fileStat.st_ino, fileStat.st_size, fileStat.st_mtime): return False
+        return True
+
+    def _load(self, dirPath, stat):
+        '''
+        Loads the links and delete marks for the directory path.
+        '''
+        if stat is None: return Directory(None, time.time())
+        directory = Directory((stat.st_mtime, stat.st_ino), time.time())
+
+        try: names = os.listdir(dirPath)
+        except OSError: return directory
+        for name in names:
+            if name.endswith(self.linkExt):
+                try:
+                    with open(join(dirPath, name)) as f:
+                        fileStat = os.fstat(f.fileno())
+                        links = json.load(f)
+                except (OSError, ValueError):
+                    log.warning('Cannot read the link file \'%s\'', join(dirPath, name), exc_info=True)
+                    continue
+                directory.links[name[:-len(self.linkExt)]] = links
+                directory.files[name] = (fileStat.st_ino, fileStat.st_size, fileStat.st_mtime)
+            elif name.endswith(self.deletedExt): directory.deleted.add(name[:-len(self.deletedExt)])
+        assert log.debug('Indexed directory \'%s\' with %s links and %s delete marks', dirPath,
+                         len(directory.links), len(directory.deleted)) or True
+        return directory
+
+class Directory:
+    '''
+    The indexed directory.
+    '''
+    __slots__ = ('modified', 'loaded', 'checked', 'links', 'deleted', 'files')
+
+    def __init__(self, modified, loaded):
+        '''
+        Construct the indexed directory.
+
+        @param modified: tuple(float, integer)|None
+            The modification time and inode of the directory, None if the directory does not exist.
+        @param loaded: float
+            The time when the directory started to be loaded.
+        '''
+        self.modified = modified
+        self.loaded = loaded
+        self.checked = 0
+        self.links = {}
+        self.deleted = set()
+        self.files = {}
+
+# --------------------------------------------------------------------
+
+_indexes = {}
+# The link indexes indexed by the repository path.
+_indexesLock = Lock()
+# The lock used for creating the link indexes.
+
+def linkIndexFor(repositoryPath):
+    '''
+    Provides the link index for the repository path, the index is created if there is not one already.
+
+    @param repositoryPath: string
+        The repository path to provide the index for.
+    @return: LinkIndex
+        The link index for the repository.
+    '''
+    assert isinstance(repositoryPath, str), 'Invalid repository path %s' % repositoryPath
+    repositoryPath = normpath(repositoryPath)
+    with _indexesLock:
+        index = _indexes.get(repositoryPath)
+        if index is None: index = _indexes[repositoryPath] = LinkIndex(repositoryPath)
+    return index
@@ -11,9 +11,13 @@ Contains the Content Delivery Manager implementation for local file system
 
 from ally.container.ioc import injected
 from ally.zip.util_zip import ZIPSEP, normOSPath, normZipPath, getZipFilePath, validateInZipPath
+from cdm.impl.link_index import linkIndexFor, LinkIndex
 from cdm.spec import ICDM, UnsupportedProtocol, PathNotFound
 from datetime import datetime
-from os.path import isdir, isfile, join, dirname, normpath, relpath, abspath
+from gzip import GzipFile
+from mimetypes import guess_type
+from os.path import isdir, isfile, join, dirname, normpath, relpath, abspath, \
+    basename
 from shutil import copyfile, copyfileobj, move, rmtree
 from tempfile import TemporaryDirectory
 from zipfile import ZipFile
@@ -101,9 +105,25 @@ class LocalFileSystemCDM(ICDM):
 
     delivery = IDelivery
     # The delivery protocol
+    compress = False
+    # Flag indicating that a compressed sibling is stored for the published content of a compressible type.
+    compressTypes = ['text/', 'application/javascript', 'application/x-javascript', 'application/json',
+                     'application/xml', 'image/svg+xml']
+    # The compressible content types, the types ending with '/' are used as prefixes.
+    compressExtension = '.gz'
+    # The extension of the compressed siblings, the content delivery needs to use the same extension.
+    compressMinimum = 256
+    # The minimum size in bytes of the content to be compressed.
+    compressLevel = 9
+    # The gzip compression level.
 
     def __init__(self):
         assert isinstance(self.delivery, IDelivery), 'Invalid delivery protocol %s' % self.delivery
+        assert isinstance(self.compress, bool), 'Invalid compress flag %s' % self.compress
+        assert isinstance(self.compressTypes, list), 'Invalid compress types %s' % self.compressTypes
+        assert isinstance(self.compressExtension, str), 'Invalid compress extension %s' % self.compressExtension
+        assert isinstance(self.compressMinimum, int), 'Invalid compress minimum %s' % self.compressMinimum
+        assert isinstance(self.compressLevel, int), 'Invalid compress level %s' % self.compressLevel
 
     def publishFromFile(self, path, filePath):
         '''
@@ -124,14 +144,18 @@ class LocalFileSystemCDM(ICDM):
             fileInfo = zipFile.getinfo(inFilePath)
             if fileInfo.filename.endswith(ZIPSEP):
                 raise IOError('Trying to publish a file from a ZIP directory path: %s' % fileInfo.filename)
-            if not self._isSyncFile(zipFilePath, dstFilePath):
-                copyfileobj(zipFile.open(inFilePath), open(dstFilePath, 'w+b'))
+            rewritten = not self._isSyncFile(zipFilePath, dstFilePath)
+            if rewritten:
+                with open(dstFilePath, 'w+b') as dstFile: copyfileobj(zipFile.open(inFilePath), dstFile)
                 assert log.debug('Success publishing ZIP file %s (%s) to path %s', inFilePath, zipFilePath, path) or True
+            self._storeCompressed(dstFilePath, rewritten)
             return
         assert os.access(filePath, os.R_OK), 'Unable to read the file path %s' % filePath
-        if not self._isSyncFile(filePath, dstFilePath):
+        rewritten = not self._isSyncFile(filePath, dstFilePath)
+        if rewritten:
             copyfile(filePath, dstFilePath)
             assert log.debug('Success publishing file %s to path %s', filePath, path) or True
+        self._storeCompressed(dstFilePath, rewritten)
 
     def publishFromDir(self, path, dirPath):
         '''
@@ -170,6 +194,7 @@ class LocalFileSystemCDM(ICDM):
         with open(dstFilePath, 'w+b') as dstFile:
             copyfileobj(content, dstFile)
             assert log.debug('Success publishing content to path %s', path) or True
+        self._storeCompressed(dstFilePath)
 
 
     def republish(self, oldPath, newPath):
@@ -186,6 +211,11 @@ class LocalFileSystemCDM(ICDM):
         if not isdir(dstDir):
             os.makedirs(dstDir)
         move(oldFullPath, newFullPath)
+        if isfile(oldFullPath + self.compressExtension):
+            move(oldFullPath + self.compressExtension, newFullPath + self.compressExtension)
+        index = self._linkIndex()
+        index.invalidate(oldFullPath)
+        index.invalidate(newFullPath)
 
     def remove(self, path):
         '''
@@ -196,8 +226,10 @@ class LocalFileSystemCDM(ICDM):
             rmtree(itemPath)
         elif isfile(itemPath):
             os.remove(itemPath)
+            self._removeCompressed(itemPath)
         else:
             raise PathNotFound(path)
+        self._linkIndex().invalidate(itemPath)
         assert log.debug('Success removing path %s', path) or True
 
     def getSupportedProtocols(self):
@@ -247,6 +279,7 @@ class LocalFileSystemCDM(ICDM):
         with open(dstFilePath, 'w+b') as dstFile:
             copyfileobj(fileObj, dstFile)
             assert log.debug('Success publishing stream to path %s', path) or True
+        self._storeCompressed(dstFilePath)
 
     def _getItemPath(self, path):
         return join(self.delivery.getRepositoryPath(), normOSPath(path.lstrip(os.sep), True))
@@ -258,6 +291,17 @@ class LocalFileSystemCDM(ICDM):
             raise PathNotFound(path)
         return (path, fullPath)
 
+    def _linkIndex(self):
+        '''
+        Provides the index of the links and delete marks for the repository.
+
+        @return: LinkIndex
+            The link index shared with the content delivery.
+        '''
+        index = linkIndexFor(self.delivery.getRepositoryPath())
+        assert isinstance(index, LinkIndex)
+        return index
+
     def _isSyncFile(self, srcFilePath, dstFilePath):
         '''
         Return true if the destination file exists and was newer than
@@ -294,6 +338,64 @@ class LocalFileSystemCDM(ICDM):
         os.makedirs(path)
         for entry in os.listdir(tmpDirPath):
             move(join(tmpDirPath, entry), path)
+        for root, _dirs, files in os.walk(path):
+            for file in files: self._storeCompressed(join(root, file))
+
+    def _isCompressible(self, filePath):
+        '''
+        Checks if the content of the file is of a compressible type, based on the guessed type of the file.
+
+        @param filePath: string
+            The path of the file to check.
+        @return: boolean
+            True if the file content should be compressed, False otherwise.
+        '''
+        contentType, encoding = guess_type(filePath)
+        if not contentType or encoding: return False
+        for compressType in self.compressTypes:
+            if compressType.endswith('/'):
+                if contentType.startswith(compressType): return True
+            elif contentType == compressType: return True
+        return False
+
+    def _storeCompressed(self, filePath, rewritten=True):
+        '''
+        Stores the gzip compressed sibling of the published file, if compression is enabled and the file is
+        compressible.
+
+        @param filePath: string
+            The path of the published file.
+        @param rewritten: boolean
+            True if the published file has been written, in which case the sibling is always stored again, False if
+            the file was already in sync and then an existing sibling is kept as it is.
+        '''
+        compressedPath = filePath + self.compressExtension
+        if not self.compress or not self._isCompressible(filePath) or \
+        os.stat(filePath).st_size < self.compressMinimum:
+            self._removeCompressed(filePath)
+            return
+        # The modification times cannot be used to detect a stale sibling since the file can be written again in the
+        # same time stamp as the sibling.
+        if not rewritten and isfile(compressedPath): return
+
+        tmpPath = compressedPath + '.tmp'
+        with open(filePath, 'rb') as srcFile, open(tmpPath, 'wb') as dstFile:
+            with GzipFile(basename(filePath), 'wb', self.compressLevel, dstFile) as gzipFile:
+                copyfileobj(srcFile, gzipFile)
+        # Windows does not allow renaming over an existing file.
+        if os.name == 'nt' and isfile(compressedPath): os.remove(compressedPath)
+        os.rename(tmpPath, compressedPath)
+        assert log.debug('Stored the compressed content for %s', filePath) or True
+
+    def _removeCompressed(self, filePath):
+        '''
+        Removes the compressed sibling of the file, if there is one.
+
+        @param filePath: string
+            The path of the file to remove the compressed sibling for.
+        '''
+        compressedPath = filePath + self.compressExtension
+        if isfile(compressedPath): os.remove(compressedPath)
 
 
 @injected
@@ -340,34 +442,25 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
         '''
         path, entryPath = self._validatePath(path)
         if isfile(entryPath.rstrip(os.sep)):
-            return os.remove(entryPath)
-
-        linkPath = entryPath
-        repPathLen = len(self.delivery.getRepositoryPath())
-        while len(linkPath.lstrip(os.sep)) > repPathLen:
-            linkFile = linkPath + self._linkExt
-            if isfile(linkFile):
-                subPath = entryPath[len(linkPath):].lstrip(os.sep)
-                with open(linkFile) as f:
-                    links = json.load(f)
-                    count = 0
-                    for link in links:
-                        if link[0] == self._fsHeader and self._isValidFSLink(link, subPath):
-                            self._removeFSLink(link, path, entryPath, subPath); count += 1
-                            break
-                        elif link[0] == self._zipHeader and self._isValidZIPLink(link, subPath):
-                            self._removeZiplink(link, path, entryPath, subPath); count += 1
-                            break
-                    if count == 0:
-                        raise PathNotFound(path)
+            os.remove(entryPath)
+            return self._removeCompressed(entryPath.rstrip(os.sep))
+
+        index = self._linkIndex()
+        found = index.findLinks(entryPath)
+        if found is None: raise PathNotFound(path)
+        linkPath, links = found
+        subPath = entryPath[len(linkPath):].lstrip(os.sep)
+        for link in links:
+            if link[0] == self._fsHeader and self._isValidFSLink(link, subPath):
+                self._removeFSLink(link, path, entryPath, subPath)
                 break
-            nextLinkPath = dirname(linkPath)
-            if nextLinkPath == linkPath: break
-            linkPath = nextLinkPath
-        else:
-            raise PathNotFound(path)
+            elif link[0] == self._zipHeader and self._isValidZIPLink(link, subPath):
+                self._removeZiplink(link, path, entryPath, subPath)
+                break
+        else: raise PathNotFound(path)
         if len(subPath.strip(os.sep)) == 0 and isdir(linkPath):
             rmtree(linkPath)
+            index.invalidate(linkPath)
 
     def getURI(self, path, protocol='http'):
         '''
@@ -391,26 +484,17 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
         if isdir(entryPath) or isfile(entryPath):
             return datetime.fromtimestamp(os.stat(entryPath).st_mtime)
 
-        linkPath = entryPath
-        repPathLen = len(self.delivery.getRepositoryPath())
-        while len(linkPath.lstrip(os.sep)) > repPathLen:
-            linkFile = linkPath + self._linkExt
-            if isfile(linkFile):
-                subPath = entryPath[len(linkPath):].lstrip(os.sep)
-                with open(linkFile) as f:
-                    links = json.load(f)
-                    for link in links:
-                        if link[0] == self._fsHeader and self._isValidFSLink(link, subPath):
-                            fullPath = join(link[1], subPath) if subPath else link[1]
-                            return datetime.fromtimestamp(os.stat(fullPath).st_mtime)
-                        elif link[0] == self._zipHeader and self._isValidZIPLink(link, subPath):
-                            return datetime.fromtimestamp(os.stat(link[1]).st_mtime)
-                    raise PathNotFound(path)
-            nextLinkPath = dirname(linkPath)
-            if nextLinkPath == linkPath: break
-            linkPath = nextLinkPath
-        else:
-            raise PathNotFound(path)
+        found = self._linkIndex().findLinks(entryPath)
+        if found is None: raise PathNotFound(path)
+        linkPath, links = found
+        subPath = entryPath[len(linkPath):].lstrip(os.sep)
+        for link in links:
+            if link[0] == self._fsHeader and self._isValidFSLink(link, subPath):
+                fullPath = join(link[1], subPath) if subPath else link[1]
+                return datetime.fromtimestamp(os.stat(fullPath).st_mtime)
+            elif link[0] == self._zipHeader and self._isValidZIPLink(link, subPath):
+                return datetime.fromtimestamp(os.stat(link[1]).st_mtime)
+        raise PathNotFound(path)
 
     def _createDelMark(self, path):
         '''
@@ -425,6 +509,7 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
         with open(path.rstrip(os.sep) + self._deletedExt, 'w') as _d: pass
         if isdir(path):
             rmtree(path)
+        self._linkIndex().invalidate(path)
 
     def _isValidFSLink(self, link, subPath):
         '''
@@ -499,7 +584,8 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
         self._createDelMark(entryPath)
 
     def _createLinkToZipFile(self, path, zipFilePath, inFilePath):
-        repFilePath = self._getItemPath(path) + self._linkExt
+        itemPath = self._getItemPath(path)
+        repFilePath = itemPath + self._linkExt
         if isfile(repFilePath):
             with open(repFilePath, 'r') as f: links = json.load(f)
         else: links = []
@@ -511,10 +597,11 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
                     break
         else: links.insert(0, (self._zipHeader, zipFilePath, inFilePath))
 
-        with open(repFilePath, 'w') as f: json.dump(links, f)
+        self._linkIndex().writeLinks(itemPath, links)
 
     def _createLinkToFileOrDir(self, path, filePath):
-        repFilePath = self._getItemPath(path) + self._linkExt
+        itemPath = self._getItemPath(path)
+        repFilePath = itemPath + self._linkExt
         if isfile(repFilePath):
             with open(repFilePath, 'r') as f: links = json.load(f)
         else: links = []
@@ -525,7 +612,7 @@ class LocalFileSystemLinkCDM(LocalFileSystemCDM):
                     break
         else: links.insert(0, (self._fsHeader, filePath))
 
-        with open(repFilePath, 'w') as f: json.dump(links, f)
+        self._linkIndex().writeLinks(itemPath, links)
 
     def _publishFromFile(self, path, filePath):
         assert isinstance(path, str) and len(path) > 0, 'Invalid content path %s' % path
@@ -0,0 +1,86 @@
+'''
+Created on Jan 21, 2013
+
+@package: support cdm
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the pool of opened ZIP files used in delivering the content from ZIP archives.
+'''
+
+from collections import OrderedDict
+from os.path import normpath
+from threading import Lock
+from zipfile import ZipFile
+import os
+
+# --------------------------------------------------------------------
+
+class ZipFilePool:
+    '''
+    Provides a bounded pool of opened ZIP files indexed by path, with the least recently used ZIP files evicted first.
+    A ZIP file is opened again only if the modification time of the archive changed, this way the central directory of
+    the archive is not parsed for every request. The pooled ZIP files are shared between threads, the members are
+    opened by the ZIP file with their own file pointer.
+    '''
+
+    def __init__(self, size=20):
+        '''
+        Construct the ZIP file pool.
+
+        @param size: integer
+            The maximum number of ZIP files to be kept opened.
+        '''
+        assert isinstance(size, int) and size > 0, 'Invalid size %s' % size
+
+        self.size = size
+
+        self._zipFiles = OrderedDict()
+        self._lock = Lock()
+
+    def open(self, zipFilePath):
+        '''
+        Provides the opened ZIP file for the path, the returned ZIP file is owned by the pool and should not be closed.
+
+        @param zipFilePath: string
+            The path of the ZIP file.
+        @return: ZipFile
+            The opened ZIP file, the members are provided by the 'NameToInfo' dictionary of the ZIP file.
+        @raise IOError: If the ZIP file cannot be opened.
+        '''
+        assert isinstance(zipFilePath, str), 'Invalid ZIP file path %s' % zipFilePath
+        zipFilePath = normpath(zipFilePath)
+        modified = os.stat(zipFilePath).st_mtime
+        with self._lock:
+            entry = self._zipFiles.get(zipFilePath)
+            if entry is not None:
+                zipFile, zipModified = entry
+                if zipModified == modified:
+                    self._zipFiles.move_to_end(zipFilePath)
+                    return zipFile
+                # The ZIP file is not closed since other threads might still use it, it is closed when released.
+                del self._zipFiles[zipFilePath]
+
+        zipFile = ZipFile(zipFilePath)
+        with self._lock:
+            self._zipFiles[zipFilePath] = (zipFile, modified)
+            self._zipFiles.move_to_end(zipFilePath)
+            while len(self._zipFiles) > self.size: self._zipFiles.popitem(last=False)
+        return zipFile
+
+    def invalidate(self, zipFilePath):
+        '''
+        Removes the ZIP file for the path from the pool.
+
+        @param zipFilePath: string
+            The path of the ZIP file.
+        '''
+        assert isinstance(zipFilePath, str), 'Invalid ZIP file path %s' % zipFilePath
+        with self._lock: self._zipFiles.pop(normpath(zipFilePath), None)
+
+    def clear(self):
+        '''
+        Removes all the ZIP files from the pool.
+        '''
+        with self._lock: self._zipFiles.clear()
@@ -0,0 +1,227 @@
+'''
+Created on Oct 18, 2012
+
+@package: support cdm
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the content delivery handler.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from ally.container import ioc
+from ally.core.cdm.processor.content_delivery import ContentDeliveryHandler, \
+    Request, Response, ResponseContent
+from ally.core.http.impl.processor.header import HeaderHandler, DecoderHeader, \
+    EncoderHeader
+from ally.core.http.spec.codes import NOT_MODIFIED, PARTIAL_CONTENT, \
+    RANGE_NOT_SATISFIABLE
+from ally.core.spec.codes import RESOURCE_FOUND
+from ally.design.processor import Assembly, HandlerProcessorProceed
+from email.utils import formatdate
+from functools import partial
+from io import BytesIO
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+import re
+import unittest
+import zipfile
+
+# --------------------------------------------------------------------
+
+CONTENT = bytes(range(100))
+
+class BytesNotSeekable(BytesIO):
+    '''
+    Content that can not be seeked, like the members of a ZIP file.
+    '''
+
+    def seekable(self): return False
+
+    def seek(self, *args): raise AssertionError('No seek expected')
+
+class ErrorHandler(HandlerProcessorProceed):
+    '''
+    The error handler used for the content that can not be delivered.
+    '''
+
+    def process(self, response:Response, **keyargs): pass
+
+# --------------------------------------------------------------------
+
+class TestContentDelivery(unittest.TestCase):
+
+    def setUp(self):
+        self.repositoryPath = mkdtemp()
+        with open(join(self.repositoryPath, 'content.txt'), 'wb') as f: f.write(CONTENT)
+        with zipfile.ZipFile(join(self.repositoryPath, 'content.zip'), 'w', zipfile.ZIP_DEFLATED) as f:
+            f.writestr('inner/content.txt', CONTENT)
+
+        self.handler = ContentDeliveryHandler()
+        self.handler.repositoryPath = self.repositoryPath
+        self.handler.errorAssembly = Assembly()
+        self.handler.errorAssembly.add(ErrorHandler())
+        ioc.initialize(self.handler)
+
+        self.headerHandler = HeaderHandler()
+        ioc.initialize(self.headerHandler)
+
+    def tearDown(self):
+        self.handler._zipPool.invalidate(join(self.repositoryPath, 'content.zip'))
+        rmtree(self.repositoryPath)
+
+    def deliver(self, entry, **headers):
+        request, response, responseCnt = Request(), Response(), ResponseContent()
+        request.decoderHeader = DecoderHeader(self.headerHandler, headers)
+        response.encoderHeader = EncoderHeader(self.headerHandler)
+        delivered = self.handler._deliver(request, response, responseCnt, 'content.txt', *entry)
+
+        if ResponseContent.source in responseCnt:
+            source = responseCnt.source
+            body = source.read() if hasattr(source, 'read') else b''.join(source)
+            if hasattr(source, 'close'): source.close()
+        else: body = None
+        return delivered, response, responseCnt, response.encoderHeader.headers, body
+
+    def entries(self):
+        yield self.handler._processFile(join(self.repositoryPath, 'content.txt'))
+        yield self.handler._processZiplink('content.txt', join(self.repositoryPath, 'content.zip'), 'inner')
+        _opener, size, tag, modified = self.handler._processFile(join(self.repositoryPath, 'content.txt'))
+        yield partial(BytesNotSeekable, CONTENT), size, tag, modified
+
+    # ----------------------------------------------------------------
+
+    def testFull(self):
+        for entry in self.entries():
+            delivered, response, responseCnt, headers, body = self.deliver(entry)
+            self.assertTrue(delivered)
+            self.assertEqual(response.code, RESOURCE_FOUND)
+            self.assertEqual(headers['ETag'], entry[2])
+            self.assertEqual(headers['Last-Modified'], formatdate(entry[3], usegmt=True))
+            self.assertEqual(headers['Accept-Ranges'], 'bytes')
+            self.assertEqual(responseCnt.length, 100)
+            self.assertEqual(body, CONTENT)
+
+        entry = self.handler._processFile(join(self.repositoryPath, 'content.txt'))
+        _delivered, _response, responseCnt, _headers, _body = self.deliver(entry)
+        self.assertEqual(responseCnt.sourceFile[1:], (0, 100))
+
+    def testNotModified(self):
+        for entry in self.entries():
+            tag, modified = entry[2], entry[3]
+            for value in (tag, '*', 'W/' + tag, '"other", %s' % tag):
+                delivered, response, responseCnt, _headers, body = self.deliver(entry, **{'If-None-Match': value})
+                self.assertTrue(delivered)
+                self.assertEqual(response.code, NOT_MODIFIED)
+                self.assertFalse(ResponseContent.source in responseCnt)
+                self.assertIsNone(body)
+
+            _delivered, response, _responseCnt, _headers, body = self.deliver(entry, **{'If-None-Match': '"other"'})
+            self.assertEqual(response.code, RESOURCE_FOUND)
+            self.assertEqual(body, CONTENT)
+
+            _delivered, response, _responseCnt, _headers, body = \
+            self.deliver(entry, **{'If-Modified-Since': formatdate(modified, usegmt=True)})
+            self.assertEqual(response.code, NOT_MODIFIED)
+            _delivered, response, _responseCnt, _headers, body = \
+            self.deliver(entry, **{'If-Modified-Since': formatdate(modified - 60, usegmt=True)})
+            self.assertEqual(response.code, RESOURCE_FOUND)
+            self.assertEqual(body, CONTENT)
+
+    def testIfRange(self):
+        for entry in self.entries():
+            tag, modified = entry[2], entry[3]
+            for value, code in ((tag, PARTIAL_CONTENT), ('"other"', RESOURCE_FOUND),
+                                (formatdate(modified, usegmt=True), PARTIAL_CONTENT),
+                                (formatdate(modified - 60, usegmt=True), RESOURCE_FOUND)):
+                _delivered, response, responseCnt, _headers, body = \
+                self.deliver(entry, Range='bytes=10-19', **{'If-Range': value})
+                self.assertEqual(response.code, code)
+                if code == PARTIAL_CONTENT: self.assertEqual(body, CONTENT[10:20])
+                else: self.assertEqual(body, CONTENT)
+                self.assertEqual(responseCnt.length, len(body))
+
+    def testSingleRange(self):
+        for entry in self.entries():
+            for value, start, end in (('bytes=10-19', 10, 19), ('bytes=90-', 90, 99), ('bytes=95-200', 95, 99),
+                                      ('bytes=-5', 95, 99), ('bytes=-200', 0, 99), ('bytes=0-4,5-9', 0, 9)):
+                delivered, response, responseCnt, headers, body = self.deliver(entry, Range=value)
+                self.assertTrue(delivered)
+                self.assertEqual(response.code, PARTIAL_CONTENT)
+                self.assertEqual(headers['Content-Range'], 'bytes %s-%s/100' % (start, end))
+                self.assertEqual(responseCnt.length, end - start + 1)
+                self.assertEqual(body, CONTENT[start:end + 1])
+
+        entry = self.handler._processFile(join(self.repositoryPath, 'content.txt'))
+        _delivered, _response, responseCnt, _headers, _body = self.deliver(entry, Range='bytes=10-19')
+        self.assertEqual(responseCnt.sourceFile[1:], (10, 10))
+
+    def testRangeNotSatisfiable(self):
+        for entry in self.entries():
+            for value in ('bytes=-0', 'bytes=100-', 'bytes=200-300', 'bytes=100-,-0'):
+                delivered, response, responseCnt, headers, body = self.deliver(entry, Range=value)
+                self.assertFalse(delivered)
+                self.assertEqual(response.code, RANGE_NOT_SATISFIABLE)
+                self.assertEqual(headers['Content-Range'], 'bytes */100')
+                self.assertIsNone(body)
+
+            for value in ('items=0-10', 'bytes=10-5', 'bytes=a-b', 'bytes=10'):
+                _delivered, response, _responseCnt, _headers, body = self.deliver(entry, Range=value)
+                self.assertEqual(response.code, RESOURCE_FOUND)
+                self.assertEqual(body, CONTENT)
+
+    def testMultipleRanges(self):
+        for entry in self.entries():
+            delivered, response, responseCnt, headers, body = self.deliver(entry, Range='bytes=50-51,0-1,1-3,90-')
+            self.assertTrue(delivered)
+            self.assertEqual(response.code, PARTIAL_CONTENT)
+            self.assertNotIn('Content-Range', headers)
+            self.assertEqual(responseCnt.length, len(body))
+
+            boundary = re.match(r'multipart/byteranges; boundary=(\w+)$', responseCnt.type).group(1)
+            parts = body.split(('\r\n--%s' % boundary).encode('ascii'))
+            self.assertEqual(parts[0], b'')
+            self.assertEqual(parts[-1], b'--\r\n')
+            ranges = []
+            for part in parts[1:-1]:
+                head, content = part.split(b'\r\n\r\n', 1)
+                start, end = map(int, re.search(br'Content-Range: bytes (\d+)-(\d+)/100', head).groups())
+                self.assertEqual(content, CONTENT[start:end + 1])
+                ranges.append((start, end))
+            self.assertEqual(ranges, [(0, 3), (50, 51), (90, 99)])
+
+    def testMaximumRanges(self):
+        self.handler.maximumRanges = 2
+        for entry in self.entries():
+            _delivered, response, _responseCnt, _headers, body = self.deliver(entry, Range='bytes=0-1,0-3,50-51')
+            self.assertEqual(response.code, PARTIAL_CONTENT)
+
+            _delivered, response, responseCnt, headers, body = self.deliver(entry, Range='bytes=0-1,10-11,50-51')
+            self.assertEqual(response.code, RESOURCE_FOUND)
+            self.assertNotIn('Content-Range', headers)
+            self.assertEqual(responseCnt.length, 100)
+            self.assertEqual(body, CONTENT)
+
+    def testSkipNotSeekable(self):
+        content = BytesNotSeekable(CONTENT)
+        self.assertEqual(b''.join(self.handler._readPart(content, 0, 10, 19)), CONTENT[10:20])
+        self.assertEqual(b''.join(self.handler._readPart(content, 20, 30, 34)), CONTENT[30:35])
+        self.assertEqual(b''.join(self.handler._readPart(content, 35, 98, 120)), CONTENT[98:])
+        self.assertEqual(b''.join(self.handler._readPart(content, 100, 200, 210)), b'')
+
+        self.handler.bufferSize = 3
+        parts = [(b'<a>', 5, 12), (b'<b>', 40, 41)]
+        body = b''.join(self.handler._readRanges(partial(BytesNotSeekable, CONTENT), parts, b'<end>'))
+        self.assertEqual(body, b'<a>' + CONTENT[5:13] + b'<b>' + CONTENT[40:42] + b'<end>')
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
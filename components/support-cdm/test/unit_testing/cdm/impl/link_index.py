@@ -0,0 +1,81 @@
+'''
+Created on Jan 18, 2013
+
+@package: support cdm
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the link index.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from cdm.impl.link_index import LinkIndex
+from os import makedirs
+from os.path import join
+from tempfile import TemporaryDirectory
+import json
+import os
+import time
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestLinkIndex(unittest.TestCase):
+
+    def testLinkIndex(self):
+        rootDir = TemporaryDirectory()
+        index = LinkIndex(rootDir.name, revalidate=3600)
+        makedirs(join(rootDir.name, 'a'))
+
+        self.assertIsNone(index.findLinks(join(rootDir.name, 'a', 'b', 'c.txt')))
+        index.writeLinks(join(rootDir.name, 'a', 'b'), [['FS', '/some/dir']])
+        self.assertEqual(index.findLinks(join(rootDir.name, 'a', 'b', 'c.txt')),
+                         (join(rootDir.name, 'a', 'b'), [['FS', '/some/dir']]))
+        self.assertEqual(index.findLinks(join(rootDir.name, 'a', 'b')), (join(rootDir.name, 'a', 'b'),
+                                                                          [['FS', '/some/dir']]))
+
+        self.assertFalse(index.isDeleted(join(rootDir.name, 'a', 'b', 'c.txt')))
+        with open(join(rootDir.name, 'a', 'b.deleted'), 'w'): pass
+        # The index is not revalidated yet.
+        self.assertFalse(index.isDeleted(join(rootDir.name, 'a', 'b', 'c.txt')))
+        index.invalidate(join(rootDir.name, 'a', 'b.deleted'))
+        self.assertTrue(index.isDeleted(join(rootDir.name, 'a', 'b', 'c.txt')))
+        self.assertFalse(index.isDeleted(join(rootDir.name, 'a', 'd.txt')))
+
+        index.revalidate = 0
+        time.sleep(0.05)  # Making sure that the directory modification time changes.
+        with open(join(rootDir.name, 'a', 'd.txt.deleted'), 'w'): pass
+        self.assertTrue(index.isDeleted(join(rootDir.name, 'a', 'd.txt')))
+
+    def testRevalidate(self):
+        rootDir = TemporaryDirectory()
+        index = LinkIndex(rootDir.name, revalidate=0, granularity=0)
+        linkPath = join(rootDir.name, 'b')
+        index.writeLinks(linkPath, [['FS', '/some/dir']])
+        self.assertEqual(index.findLinks(linkPath)[1], [['FS', '/some/dir']])
+
+        # The link file is rewritten in place and the directory modification time is kept.
+        stat = os.stat(rootDir.name)
+        with open(linkPath + '.link', 'w') as f: json.dump([['FS', '/other/directory']], f)
+        os.utime(rootDir.name, (stat.st_atime, stat.st_mtime))
+        self.assertEqual(index.findLinks(linkPath)[1], [['FS', '/other/directory']])
+
+        # A directory modified within the granularity is loaded again even if nothing seems changed.
+        index.granularity = 3600
+        self.assertIsNotNone(index.findLinks(linkPath))
+        stat, statLink = os.stat(rootDir.name), os.stat(linkPath + '.link')
+        with open(linkPath + '.link', 'w') as f: json.dump([['FS', '/other/dir/paths']], f)
+        os.utime(linkPath + '.link', (statLink.st_atime, statLink.st_mtime))
+        os.utime(rootDir.name, (stat.st_atime, stat.st_mtime))
+        self.assertEqual(index.findLinks(linkPath)[1], [['FS', '/other/dir/paths']])
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -21,6 +21,7 @@ from cdm.impl.local_filesystem import HTTPDelivery, LocalFileSystemCDM, \
     LocalFileSystemLinkCDM
 from cdm.spec import PathNotFound
 from datetime import datetime
+from gzip import GzipFile
 from io import BytesIO
 from os import makedirs, remove, sep, stat
 from os.path import join, dirname, isfile, isdir
@@ -252,6 +253,33 @@ class TestHTTPDelivery(unittest.TestCase):
             rmtree(join(d.getRepositoryPath(), 'testlink2'))
             remove(dstLinkPath)
 
+    def testCompressedCDM(self):
+        d = HTTPDelivery()
+        rootDir = TemporaryDirectory()
+        d.serverURI = 'http://localhost/content/'
+        d.repositoryPath = rootDir.name
+        cdm = LocalFileSystemCDM()
+        cdm.delivery = d
+        cdm.compress = True
+
+        content = b'var x = 1;\n' * 100
+        cdm.publishContent('js/script.js', BytesIO(content))
+        compressedPath = join(d.getRepositoryPath(), 'js', 'script.js.gz')
+        self.assertTrue(isfile(compressedPath))
+        with GzipFile(compressedPath) as f: self.assertEqual(f.read(), content)
+
+        # Publishing again in the same second needs to store the sibling again.
+        cdm.publishContent('js/script.js', BytesIO(content * 2))
+        with GzipFile(compressedPath) as f: self.assertEqual(f.read(), content * 2)
+
+        cdm.publishContent('img/image.png', BytesIO(content))
+        self.assertFalse(isfile(join(d.getRepositoryPath(), 'img', 'image.png.gz')))
+        cdm.publishContent('js/small.js', BytesIO(b'var x;'))
+        self.assertFalse(isfile(join(d.getRepositoryPath(), 'js', 'small.js.gz')))
+
+        cdm.remove('js/script.js')
+        self.assertFalse(isfile(compressedPath))
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
@@ -0,0 +1,56 @@
+'''
+Created on Jan 21, 2013
+
+@package: support cdm
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides unit testing for the ZIP file pool.
+'''
+
+# Required in order to register the package extender whenever the unit test is run.
+if True:
+    import package_extender
+    package_extender.PACKAGE_EXTENDER.setForUnitTest(True)
+
+# --------------------------------------------------------------------
+
+from cdm.impl.zip_pool import ZipFilePool
+from os.path import join
+from tempfile import TemporaryDirectory
+from zipfile import ZipFile
+import os
+import unittest
+
+# --------------------------------------------------------------------
+
+class TestZipFilePool(unittest.TestCase):
+
+    def testZipFilePool(self):
+        rootDir = TemporaryDirectory()
+        pool = ZipFilePool(size=1)
+        pathA, pathB = join(rootDir.name, 'a.zip'), join(rootDir.name, 'b.zip')
+        with ZipFile(pathA, 'w') as zipFile: zipFile.writestr('a.txt', 'a')
+        with ZipFile(pathB, 'w') as zipFile: zipFile.writestr('b.txt', 'b')
+
+        zipFile = pool.open(pathA)
+        self.assertIn('a.txt', zipFile.NameToInfo)
+        self.assertIs(pool.open(pathA), zipFile)
+
+        with ZipFile(pathA, 'w') as newZipFile: newZipFile.writestr('c.txt', 'c')
+        stat = os.stat(pathA)
+        os.utime(pathA, (stat.st_atime, stat.st_mtime + 10))
+        changedZipFile = pool.open(pathA)
+        self.assertIsNot(changedZipFile, zipFile)
+        self.assertIn('c.txt', changedZipFile.NameToInfo)
+
+        self.assertIn('b.txt', pool.open(pathB).NameToInfo)
+        self.assertIsNot(pool.open(pathA), changedZipFile)
+        with pool.open(pathA).open('c.txt') as f: self.assertEqual(f.read(), b'c')
+
+        self.assertRaises(IOError, pool.open, join(rootDir.name, 'missing.zip'))
+
+# --------------------------------------------------------------------
+
+if __name__ == '__main__': unittest.main()
@@ -0,0 +1,48 @@
+'''
+Created on Oct 18, 2012
+
+@package: development support
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides the configurations for the processors profiling.
+'''
+
+from ..ally_core.resources import resourcesRoot
+from ..ally_core_http.processor import pathAssemblies
+from ..development.service import publish_development
+from ally.container import ioc
+from ally.design.processor import Assembly
+from ally.design.profiler import ProcessorProfiler
+from development.request.impl.processor_profile import ProcessorProfilePresenter
+
+# --------------------------------------------------------------------
+
+@ioc.config
+def profile_processors():
+    '''
+    If true the execution time of the processors is recorded and presented by the development services, attention this
+    adds an overhead to each processor execution.
+    '''
+    return False
+
+@ioc.entity
+def processorProfiler() -> ProcessorProfiler: return ProcessorProfiler()
+
+@ioc.entity
+def processorProfilePresenter():
+    b = ProcessorProfilePresenter()
+    b.root = resourcesRoot()
+    b.profiler = processorProfiler()
+    return b
+
+# --------------------------------------------------------------------
+
+@ioc.before(pathAssemblies)
+def enableProcessorProfiling():
+    if profile_processors(): Assembly.profiler = processorProfiler()
+
+@ioc.after(resourcesRoot)
+def developmentProcessorProfile():
+    if publish_development() and profile_processors(): processorProfilePresenter()
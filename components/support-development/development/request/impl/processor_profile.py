@@ -0,0 +1,83 @@
+'''
+Created on Oct 18, 2012
+
+@package: development support
+@copyright: 2012 Sourcefabric o.p.s.
+@license: http://www.gnu.org/licenses/gpl-3.0.txt
+@author: Gabriel Nistor
+
+Provides a Node on the resource manager with an invoker that presents the processors profiling.
+'''
+
+from ally.api.config import GET
+from ally.api.type import Input, Integer, typeFor, Non, Boolean
+from ally.container.ioc import injected
+from ally.core.impl.invoker import InvokerFunction
+from ally.core.impl.node import NodePath
+from ally.core.spec.resources import Node
+from ally.design.profiler import ProcessorProfiler, ProfileRecord
+from collections import OrderedDict
+
+# --------------------------------------------------------------------
+
+@injected
+class ProcessorProfilePresenter:
+    '''
+    Class providing the processors profiling presentation.
+    '''
+
+    root = Node
+    # The resources root node structure.
+    profiler = ProcessorProfiler
+    # The profiler that records the processors execution.
+
+    def __init__(self):
+        assert isinstance(self.root, Node), 'Invalid root node %s' % self.root
+        assert isinstance(self.profiler, ProcessorProfiler), 'Invalid profiler %s' % self.profiler
+        node = NodePath(self.root, True, 'ProcessorProfile')
+        node.get = InvokerFunction(GET, self.present, typeFor(Non),
+                                   [
+                                    Input('limit', typeFor(Integer), True, None),
+                                    Input('reset', typeFor(Boolean), True, None),
+                                    ], {})
+
+    def present(self, limit, reset=None):
+        '''
+        Provides the dictionary structure presenting the processors profiling, sorted by the total execution time.
+        
+        @return: dictionary
+            The dictionary containing the processors profiling.
+        '''
+        if not limit: limit = 50
+        records = sorted(self.profiler.records().items(), key=lambda pack: pack[1].total, reverse=True)
+        if reset: self.profiler.reset()
+
+        processors = OrderedDict()
+        for (name, fileName, lineNumber), record in records[:limit]:
+            assert isinstance(record, ProfileRecord)
+            if not record.count: continue
+            processors['%s at %s:%s' % (name, fileName, lineNumber)] = self.presentRecord(record)
+        return {'Processors': processors}
+
+    def presentRecord(self, record):
+        '''
+        Provides the presentation for the profile record, all the times are in milliseconds.
+        '''
+        assert isinstance(record, ProfileRecord), 'Invalid record %s' % record
+        histogram, lower = OrderedDict(), 0
+        for limit, count in zip(self.profiler.buckets, record.histogram):
+            histogram['%s-%s' % (msFormat(lower), msFormat(limit))] = str(count)
+            lower = limit
+        histogram['>%s' % msFormat(lower)] = str(record.histogram[-1])
+
+        return {'Count': str(record.count), 'Total': msFormat(record.total),
+                'Average': msFormat(record.total / record.count), 'Minimum': msFormat(record.minimum),
+                'Maximum': msFormat(record.maximum), 'Histogram': histogram}
+
+# --------------------------------------------------------------------
+
+def msFormat(seconds):
+    '''
+    Formats the provided seconds as milliseconds.
+    '''
+    return '%.3f' % (seconds * 1000)
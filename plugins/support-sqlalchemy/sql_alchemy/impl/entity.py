@@ -15,8 +15,11 @@ from ally.exception import InputError, Ref
 from ally.internationalization import _
 from ally.support.api import entity as api
 from ally.support.api.util_service import copy
+from ally.support.core.util_hint import propertiesHintFor
+from ally.support.sqlalchemy.cache import EntityCache, cacheFor, invalidateFor
 from ally.support.sqlalchemy.session import SessionSupport
-from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle
+from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle, \
+    buildAllWithCount, buildLoading, detachLoading, buildAllWithCursor, orderingFor
 from inspect import isclass
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 import logging
@@ -62,7 +65,7 @@ class EntitySupportAlchemy(SessionSupport):
             self.query = self.queryType = None
         self.QEntity = QEntity
 
-    def _getAll(self, filter=None, query=None, offset=None, limit=None, sqlQuery=None):
+    def _getAll(self, filter=None, query=None, offset=None, limit=None, sqlQuery=None, properties=None):
         '''
         Provides all the entities for the provided filter, with offset and limit. Also if query is known to the
         service then also a query can be provided.
@@ -77,6 +80,8 @@ class EntitySupportAlchemy(SessionSupport):
             The limit of elements to get.
         @param sqlQuery: SQL alchemy|None
             The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded as provided by the properties hint, None to load all properties.
         @return: list
             The list of all filtered and limited elements.
         '''
@@ -87,10 +92,10 @@ class EntitySupportAlchemy(SessionSupport):
             assert self.QEntity, 'No query provided for the entity service'
             assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
             sqlQuery = buildQuery(sqlQuery, query, self.Entity)
-        sqlQuery = buildLimits(sqlQuery, offset, limit)
-        return sqlQuery.all()
+        sqlQuery = buildLimits(self._buildLoading(sqlQuery, properties), offset, limit)
+        return self._detachLoading(sqlQuery.all(), properties)
 
-    def _getAllWithCount(self, filter=None, query=None, offset=None, limit=None, sql=None):
+    def _getAllWithCount(self, filter=None, query=None, offset=None, limit=None, sql=None, properties=None):
         '''
         Provides all the entities for the provided filter, with offset and limit and the total count. Also if query is 
         known to the service then also a query can be provided.
@@ -105,6 +110,8 @@ class EntitySupportAlchemy(SessionSupport):
             The limit of elements to get.
         @param sql: SQL alchemy|None
             The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded as provided by the properties hint, None to load all properties.
         @return: tuple(list, integer)
             The list of all filtered and limited elements and the count of the total elements.
         '''
@@ -114,9 +121,75 @@ class EntitySupportAlchemy(SessionSupport):
             assert self.QEntity, 'No query provided for the entity service'
             assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
             sql = buildQuery(sql, query, self.Entity)
-        sqlLimit = buildLimits(sql, offset, limit)
-        if limit == 0: return [], sql.count()
-        return sqlLimit.all(), sql.count()
+        entities, total = buildAllWithCount(self._buildLoading(sql, properties), offset, limit)
+        return self._detachLoading(entities, properties), total
+
+    def _getAllWithCursor(self, filter=None, query=None, limit=None, cursor=None, sql=None, properties=None):
+        '''
+        Provides all the entities for the provided filter, after the provided cursor and with limit, the total count and
+        the cursor for the next entities. Also if query is known to the service then also a query can be provided.
+        
+        @param filter: SQL alchemy filtering|None
+            The sql alchemy conditions to filter by.
+        @param query: query
+            The REST query object to provide filtering and ordering on.
+        @param limit: integer|None
+            The limit of elements to get.
+        @param cursor: string|None
+            The cursor to fetch elements after, if None the elements are fetched from the start.
+        @param sql: SQL alchemy|None
+            The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded as provided by the properties hint, None to load all properties.
+        @return: tuple(list, integer, integer, string|None)
+            The list of all filtered and limited elements, the count of the total elements, the offset of the elements
+            and the cursor for the next elements.
+        '''
+        sql = sql or self.session().query(self.Entity)
+        if filter is not None: sql = sql.filter(filter)
+        if query:
+            assert self.QEntity, 'No query provided for the entity service'
+            assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
+            sql = buildQuery(sql, query, self.Entity)
+        ordering = orderingFor(query, self.Entity)
+        entities, total, offset, cursor = buildAllWithCursor(self._buildLoading(sql, properties, ordering), ordering,
+                                                             limit, cursor)
+        return self._detachLoading(entities, properties), total, offset, cursor
+
+    def _buildLoading(self, sqlQuery, properties, ordering=None):
+        '''
+        Builds the columns loading on the SQL alchemy query based on the provided properties, the columns of the
+        properties that are not going to be rendered are deferred.
+        
+        @param sqlQuery: SQL alchemy
+            The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded, None to load all properties.
+        @param ordering: list[tuple(string, Column, boolean)]|None
+            The ordering used for the query, the ordered properties are always loaded.
+        @return: SQL alchemy
+            The sql alchemy query with the columns loading.
+        '''
+        if properties is None: return sqlQuery
+        properties = set(properties)
+        properties.add(self.model.propertyId)
+        if ordering: properties.update(name for name, _column, _asc in ordering)
+        return buildLoading(sqlQuery, self.Entity, properties)
+
+    def _detachLoading(self, entities, properties):
+        '''
+        Detaches the partially loaded entities from the session, this way the entities cannot be reused by the session
+        for other queries.
+        
+        @param entities: list
+            The entities loaded with @see: _buildLoading.
+        @param properties: frozenset(string)|None
+            The names of the properties that have been loaded, None if all properties have been loaded.
+        @return: list
+            The provided entities.
+        '''
+        if properties is not None: detachLoading(self.session(), self.Entity, entities)
+        return entities
 
 # --------------------------------------------------------------------
 
@@ -125,41 +198,101 @@ class EntityGetServiceAlchemy(EntitySupportAlchemy):
     Generic implementation for @see: IEntityGetService
     '''
 
+    cacheSize = 0
+    # The maximum number of entities cached by id, 0 disables the cache. The cache is process local and the cached
+    # entities are provided as API model objects, so they are not attached to the session.
+    cacheTimeOut = 60
+    # The number of seconds after which a cached entity expires.
+
     def getById(self, id):
         '''
         @see: IEntityGetService.getById
         '''
+        if self.cacheSize:
+            cache = cacheFor(self.Entity, self.cacheSize, self.cacheTimeOut)
+            assert isinstance(cache, EntityCache)
+            snapshot = cache.get(id)
+            if snapshot is None:
+                version = cache.version()
+                entity = self.session().query(self.Entity).get(id)
+                if not entity: raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
+                snapshot = copy(entity, self.modelType.base.clazz())
+                cache.put(id, snapshot, version)
+            return copy(snapshot, self.modelType.base.clazz())
+
         entity = self.session().query(self.Entity).get(id)
         if not entity: raise InputError(Ref(_('Unknown id'), ref=self.Entity.Id))
         return entity
 
+    def getByIds(self, ids):
+        '''
+        Provides the entities for the provided ids in a single query, the unknown ids are ignored. This is not part
+        of the service API, is used for batch fetching the referenced entities.
+
+        @param ids: list
+            The ids to provide the entities for.
+        @return: list
+            The entities found for the ids.
+        '''
+        if not ids: return []
+        if not self.cacheSize: return self.session().query(self.Entity).filter(self.Entity.Id.in_(ids)).all()
+
+        cache = cacheFor(self.Entity, self.cacheSize, self.cacheTimeOut)
+        assert isinstance(cache, EntityCache)
+        entities, missing = [], []
+        for id in ids:
+            snapshot = cache.get(id)
+            if snapshot is None: missing.append(id)
+            else: entities.append(copy(snapshot, self.modelType.base.clazz()))
+        if missing:
+            version = cache.version()
+            for entity in self.session().query(self.Entity).filter(self.Entity.Id.in_(missing)).all():
+                snapshot = copy(entity, self.modelType.base.clazz())
+                cache.put(entity.Id, snapshot, version)
+                entities.append(copy(snapshot, self.modelType.base.clazz()))
+        return entities
+
 class EntityFindServiceAlchemy(EntitySupportAlchemy):
     '''
     Generic implementation for @see: IEntityFindService
     '''
 
-    def getAll(self, offset=None, limit=None, detailed=False):
+    def getAll(self, offset=None, limit=None, detailed=False, cursor=None):
         '''
         @see: IEntityQueryService.getAll
         '''
+        properties = propertiesHintFor(self.model)
+        if cursor is not None:
+            # An empty cursor requests the first part with the cursor for the next part.
+            cursor = cursor or None
+            entities, total, offset, cursor = self._getAllWithCursor(None, None, limit, cursor, None, properties)
+            if detailed: return IterPart(entities, total, offset, limit, cursor)
+            return entities
         if detailed:
-            entities, total = self._getAllWithCount(None, None, offset, limit)
+            entities, total = self._getAllWithCount(None, None, offset, limit, properties=properties)
             return IterPart(entities, total, offset, limit)
-        return self._getAll(None, None, offset, limit)
+        return self._getAll(None, None, offset, limit, properties=properties)
 
 class EntityQueryServiceAlchemy(EntitySupportAlchemy):
     '''
     Generic implementation for @see: IEntityQueryService
     '''
 
-    def getAll(self, offset=None, limit=None, detailed=False, q=None):
+    def getAll(self, offset=None, limit=None, detailed=False, q=None, cursor=None):
         '''
         @see: IEntityQueryService.getAll
         '''
+        properties = propertiesHintFor(self.model)
+        if cursor is not None:
+            # An empty cursor requests the first part with the cursor for the next part.
+            cursor = cursor or None
+            entities, total, offset, cursor = self._getAllWithCursor(None, q, limit, cursor, None, properties)
+            if detailed: return IterPart(entities, total, offset, limit, cursor)
+            return entities
         if detailed:
-            entities, total = self._getAllWithCount(None, q, offset, limit)
+            entities, total = self._getAllWithCount(None, q, offset, limit, properties=properties)
             return IterPart(entities, total, offset, limit)
-        return self._getAll(None, q, offset, limit)
+        return self._getAll(None, q, offset, limit, properties=properties)
 
 class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
     '''
@@ -195,11 +328,57 @@ class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
         @see: IEntityCRUDService.delete
         '''
         try:
-            return self.session().query(self.Entity).filter(self.Entity.Id == id).delete() > 0
+            deleted = self.session().query(self.Entity).filter(self.Entity.Id == id).delete() > 0
+            # The query delete does not notify the mapper listeners.
+            if deleted: invalidateFor(self.Entity, id, self.session())
+            return deleted
         except OperationalError:
             assert log.debug('Could not delete entity %s with id \'%s\'', self.Entity, id, exc_info=True) or True
             raise InputError(Ref(_('Cannot delete because is in use'), model=self.model))
 
+class EntityBulkServiceAlchemy(EntitySupportAlchemy):
+    '''
+    Generic implementation for @see: IEntityBulkService
+    '''
+
+    def insertAll(self, entities):
+        '''
+        @see: IEntityBulkService.insertAll
+        '''
+        assert isinstance(entities, list), 'Invalid entities %s' % entities
+        entitiesDb = []
+        for entity in entities:
+            assert self.modelType.isValid(entity), 'Invalid entity %s, expected %s' % (entity, self.Entity)
+            entitiesDb.append(copy(entity, self.Entity()))
+        # The entities are flushed in one go in a single statement round, SQL alchemy batches the inserts only for the
+        # entities that have the primary key already set, the entities with generated ids are inserted one at a time
+        # since the generated id needs to be fetched for each of them.
+        try:
+            self.session().add_all(entitiesDb)
+            self.session().flush(entitiesDb)
+        except SQLAlchemyError as e: handle(e, self.Entity)
+        for entity, entityDb in zip(entities, entitiesDb): entity.Id = entityDb.Id
+        return [entityDb.Id for entityDb in entitiesDb]
+
+    def updateAll(self, entities):
+        '''
+        @see: IEntityBulkService.updateAll
+        '''
+        assert isinstance(entities, list), 'Invalid entities %s' % entities
+        for entity in entities:
+            assert self.modelType.isValid(entity), 'Invalid entity %s, expected %s' % (entity, self.Entity)
+            assert isinstance(entity.Id, int), 'Invalid entity %s, with id %s' % (entity, entity.Id)
+        if not entities: return
+
+        sql = self.session().query(self.Entity).filter(self.Entity.Id.in_(set(entity.Id for entity in entities)))
+        entitiesDb = {entityDb.Id: entityDb for entityDb in sql.all()}
+        errors = [Ref(_('Unknown id'), ref=self.Entity.Id, index=k)
+                  for k, entity in enumerate(entities) if entity.Id not in entitiesDb]
+        if errors: raise InputError(*errors)
+
+        try: self.session().flush([copy(entity, entitiesDb[entity.Id]) for entity in entities])
+        except SQLAlchemyError as e: handle(e, self.Entity)
+
 class EntityGetCRUDServiceAlchemy(EntityGetServiceAlchemy, EntityCRUDServiceAlchemy):
     '''
     Generic implementation for @see: IEntityGetCRUDService
@@ -15,8 +15,10 @@ from ally.exception import InputError, Ref
 from ally.internationalization import _
 from ally.support.api import keyed as api
 from ally.support.api.util_service import copy
+from ally.support.core.util_hint import propertiesHintFor
 from ally.support.sqlalchemy.session import SessionSupport
-from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle
+from ally.support.sqlalchemy.util_service import buildQuery, buildLimits, handle, \
+    buildAllWithCount, buildLoading, detachLoading
 from inspect import isclass
 from sqlalchemy.exc import SQLAlchemyError, OperationalError
 from sqlalchemy.orm.exc import NoResultFound
@@ -62,7 +64,7 @@ class EntitySupportAlchemy(SessionSupport):
             self.query = self.queryType = None
         self.QEntity = QEntity
 
-    def _getAll(self, filter=None, query=None, offset=None, limit=None, sqlQuery=None):
+    def _getAll(self, filter=None, query=None, offset=None, limit=None, sqlQuery=None, properties=None):
         '''
         Provides all the entities for the provided filter, with offset and limit. Also if query is known to the
         service then also a query can be provided.
@@ -77,6 +79,8 @@ class EntitySupportAlchemy(SessionSupport):
             The limit of elements to get.
         @param sqlQuery: SQL alchemy|None
             The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded as provided by the properties hint, None to load all properties.
         @return: list
             The list of all filtered and limited elements.
         '''
@@ -87,8 +91,8 @@ class EntitySupportAlchemy(SessionSupport):
             assert self.QEntity, 'No query provided for the entity service'
             assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
             sqlQuery = buildQuery(sqlQuery, query, self.Entity)
-        sqlQuery = buildLimits(sqlQuery, offset, limit)
-        return sqlQuery.all()
+        sqlQuery = buildLimits(self._buildLoading(sqlQuery, properties), offset, limit)
+        return self._detachLoading(sqlQuery.all(), properties)
 
     def _getCount(self, filter=None, query=None, sqlQuery=None):
         '''
@@ -112,7 +116,7 @@ class EntitySupportAlchemy(SessionSupport):
             sqlQuery = buildQuery(sqlQuery, query, self.Entity)
         return sqlQuery.count()
 
-    def _getAllWithCount(self, filter=None, query=None, offset=None, limit=None, sqlQuery=None):
+    def _getAllWithCount(self, filter=None, query=None, offset=None, limit=None, sqlQuery=None, properties=None):
         '''
         Provides all the entities for the provided filter, with offset and limit and the total count. Also if query is 
         known to the service then also a query can be provided.
@@ -127,6 +131,8 @@ class EntitySupportAlchemy(SessionSupport):
             The limit of elements to get.
         @param sqlQuery: SQL alchemy|None
             The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded as provided by the properties hint, None to load all properties.
         @return: tuple(list, integer)
             The list of all filtered and limited elements and the count of the total elements.
         '''
@@ -136,9 +142,43 @@ class EntitySupportAlchemy(SessionSupport):
             assert self.QEntity, 'No query provided for the entity service'
             assert self.queryType.isValid(query), 'Invalid query %s, expected %s' % (query, self.QEntity)
             sqlQuery = buildQuery(sqlQuery, query, self.Entity)
-        sql = buildLimits(sqlQuery, offset, limit)
-        if limit == 0: return [], sqlQuery.count()
-        return sql.all(), sqlQuery.count()
+        entities, total = buildAllWithCount(self._buildLoading(sqlQuery, properties), offset, limit)
+        return self._detachLoading(entities, properties), total
+
+    def _buildLoading(self, sqlQuery, properties, ordering=None):
+        '''
+        Builds the columns loading on the SQL alchemy query based on the provided properties, the columns of the
+        properties that are not going to be rendered are deferred.
+        
+        @param sqlQuery: SQL alchemy
+            The sql alchemy query to use.
+        @param properties: frozenset(string)|None
+            The names of the properties to be loaded, None to load all properties.
+        @param ordering: list[tuple(string, Column, boolean)]|None
+            The ordering used for the query, the ordered properties are always loaded.
+        @return: SQL alchemy
+            The sql alchemy query with the columns loading.
+        '''
+        if properties is None: return sqlQuery
+        properties = set(properties)
+        properties.add(self.model.propertyId)
+        if ordering: properties.update(name for name, _column, _asc in ordering)
+        return buildLoading(sqlQuery, self.Entity, properties)
+
+    def _detachLoading(self, entities, properties):
+        '''
+        Detaches the partially loaded entities from the session, this way the entities cannot be reused by the session
+        for other queries.
+        
+        @param entities: list
+            The entities loaded with @see: _buildLoading.
+        @param properties: frozenset(string)|None
+            The names of the properties that have been loaded, None if all properties have been loaded.
+        @return: list
+            The provided entities.
+        '''
+        if properties is not None: detachLoading(self.session(), self.Entity, entities)
+        return entities
 
 # --------------------------------------------------------------------
 
@@ -163,7 +203,7 @@ class EntityFindServiceAlchemy(EntitySupportAlchemy):
         '''
         @see: IEntityQueryService.getAll
         '''
-        return self._getAll(None, None, offset, limit)
+        return self._getAll(None, None, offset, limit, properties=propertiesHintFor(self.model))
 
 class EntityQueryServiceAlchemy(EntitySupportAlchemy):
     '''
@@ -174,7 +214,7 @@ class EntityQueryServiceAlchemy(EntitySupportAlchemy):
         '''
         @see: IEntityQueryService.getAll
         '''
-        return self._getAll(None, q, offset, limit)
+        return self._getAll(None, q, offset, limit, properties=propertiesHintFor(self.model))
 
 class EntityCRUDServiceAlchemy(EntitySupportAlchemy):
     '''
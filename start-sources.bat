@@ -11,6 +11,7 @@ set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-core-http
 set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-core-plugin
 set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-core-sqlalchemy
 set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-http-asyncore-server
+set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-http-asyncio-server
 set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-http-mongrel2-server
 set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%ally-utilities
 set PYTHONPATH=%PYTHONPATH%;%ALLYCOM%support-administration